@@ -59,7 +59,9 @@ async def main_workflow():
 
     print("\nTo analyze jobs, run the analysis server:")
     print("  python src/analysis/analysis_server.py")
-    print("\nThen for each job_id, call:")
+    print("\nThen analyze the most promising jobs first (triage order), e.g.:")
+    print("  analyze_batch(limit=20, time_budget_seconds=1800)")
+    print("Or for a single job_id, call:")
     print("  analyze_jd(job_id='<job_id>')")
 
     input("\nPress Enter after you've analyzed jobs...")
@@ -71,8 +73,16 @@ async def main_workflow():
 
     print("\nTo match profile, run the matcher server:")
     print("  python src/matcher/matcher_server.py")
-    print("\nThen for each analyzed job, call:")
+    print("\nThen match all analyzed jobs in one call:")
+    print("  match_all()")
+    print("Or for a single job, call:")
     print("  match_profile(job_id='<job_id>')")
+    print("To compare several profile variants, match them together:")
+    print("  match_profiles(profile_paths=['./data/profiles/profile.json', ...])")
+    print("After editing the profile, rescore only the affected jobs:")
+    print("  rematch_stale()")
+    print("Once applications reach interviews, find more jobs like them:")
+    print("  similar_jobs(seed_statuses=['interview', 'offer'])")
 
     input("\nPress Enter after you've matched jobs...")
 
@@ -83,8 +93,12 @@ async def main_workflow():
 
     print("\nTo generate resumes, run the document generator server:")
     print("  python src/generator/document_generator_server.py")
-    print("\nThen for each high-match job, call:")
+    print("\nThen generate resumes for every job above the threshold in one call:")
+    print("  generate_resumes_batch(use_ai_customization=true)")
+    print("Or for a single job, call:")
     print("  generate_resume(job_id='<job_id>', use_ai_customization=true)")
+    print("The batch writes ./generated_resumes/manifest.json listing the shortlist;")
+    print("jobs with identical resumes share one file, grouped under 'outputs'.")
 
     input("\nPress Enter after you've generated resumes...")
 
@@ -93,9 +107,11 @@ async def main_workflow():
     print("-" * 70)
     print("IMPORTANT: Human review is MANDATORY before applying!")
     print("\nReview generated resumes in: ./generated_resumes/")
+    print("With a local TeX engine (latexmk or tectonic), compile them all first:")
+    print("  compile_resumes()")
     print("\nFor each resume:")
     print("  1. Open the .tex file in Overleaf or local LaTeX editor")
-    print("  2. Compile to PDF and review")
+    print("  2. Compile to PDF (or open the compiled .pdf next to it) and review")
     print("  3. Check for accuracy (no fabricated information)")
     print("  4. Verify ATS compatibility")
     print("  5. Make any necessary edits")
@@ -114,6 +130,8 @@ async def main_workflow():
 
     print("\n\nTo view statistics:")
     print("  get_stats()")
+    print("\nOnce 20+ applications have a reply, calibrate match scores against them (matcher server):")
+    print("  calibrate_scores()")
 
     print("\n\n" + "=" * 70)
     print(" WORKFLOW COMPLETE!")
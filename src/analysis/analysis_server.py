@@ -5,16 +5,67 @@ Analyzes job descriptions using Ollama (Llama 3.1 8B)
 
 from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, Field, ConfigDict
+from contextlib import asynccontextmanager
+import asyncio
 import httpx
+import itertools
 import json
+import re
 import sqlite3
-from typing import Dict, Any, List
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 import os
 
-mcp = FastMCP("analysis_mcp")
+# Add src to path for shared modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from preferences import load_preferences
+from skills import SKILL_RESOLUTION_VERSION, resolve_requirements
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
 DB_PATH = "./data/databases/jobs.db"
+PROFILE_PATH = "./data/profiles/profile.json"
+
+# Triage weights (LLM-free relevance score used to order analysis)
+TRIAGE_SKILL_WEIGHT = 0.5
+TRIAGE_TITLE_WEIGHT = 0.3
+TRIAGE_LOCATION_WEIGHT = 0.2
+TRIAGE_SKILL_SATURATION = 8  # Matched skills needed for a full skill component
+
+# Opt-in background worker that analyzes newly scraped jobs in idle time
+BACKGROUND_WORKER_ENABLED = os.getenv("ANALYSIS_BACKGROUND_WORKER", "false").lower() in ("1", "true", "yes")
+BACKGROUND_POLL_INTERVAL = float(os.getenv("ANALYSIS_POLL_INTERVAL", "5"))
+BACKGROUND_PRIORITY = 10  # Lower number = served first
+BACKGROUND_MAX_ATTEMPTS = 3  # Failed analyses of one job before the worker gives up on it
+
+_worker_state = {
+    "idle": asyncio.Event(),     # Set while no foreground analyze_jd call is running
+    "foreground_active": 0,
+    "queue": None,               # asyncio.PriorityQueue, created inside the running loop
+    "queued": set(),
+    "failed": {},                # job_id -> failed attempts, only for jobs still new
+    "task": None,
+    "analyzed": 0,
+    "last_error": None,
+}
+_worker_state["idle"].set()
+_queue_seq = itertools.count()
+
+
+@asynccontextmanager
+async def _lifespan(server):
+    """Start the background worker with the server if enabled via env"""
+    if BACKGROUND_WORKER_ENABLED:
+        _start_background_worker()
+    try:
+        yield {}
+    finally:
+        await _stop_background_worker()
+
+
+mcp = FastMCP("analysis_mcp", lifespan=_lifespan)
 
 # CRITICAL: Constrained system prompt to prevent hallucinations
 ANALYSIS_SYSTEM_PROMPT = """You are a job description analyzer. Your task is to extract structured information.
@@ -68,45 +119,17 @@ async def analyze_jd(params: AnalyzeJDInput) -> str:
             return f"✓ Job already analyzed. Analysis: {json.dumps(existing_analysis, indent=2)}"
 
         # 3. Check if Ollama is accessible
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get("http://localhost:11434/api/tags")
-                if response.status_code != 200:
-                    return "Error: Ollama is not running. Please start Ollama first: ollama serve"
-        except Exception as e:
-            return f"Error: Cannot connect to Ollama. Make sure it's running: {str(e)}"
-
-        # 4. Prepare prompt
-        prompt = f"{ANALYSIS_SYSTEM_PROMPT}\n\nJob Title: {job['title']}\nCompany: {job['company']}\n\nJob Description:\n{job['description']}"
-
-        # 5. Call Ollama for analysis
-        print(f"Analyzing job: {job['title']} at {job['company']}...")
-
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                OLLAMA_URL,
-                json={
-                    "model": "llama3.1:8b",
-                    "prompt": prompt,
-                    "stream": False,
-                    "format": "json"  # Force JSON output
-                }
-            )
-
-        # 6. Parse response
-        ollama_result = response.json()
-        analysis = json.loads(ollama_result["response"])
+        ollama_error = await _check_ollama()
+        if ollama_error:
+            return ollama_error
 
-        # 7. Validate structure (prevent hallucinations)
-        required_keys = ["required_skills", "nice_to_have_skills", "ats_keywords",
-                        "role_category", "experience_level"]
+        # 4-8. Analyze and store (background worker yields while we run)
+        async with _foreground_analysis():
+            analysis = await _run_analysis(job)
 
-        if not all(key in analysis for key in required_keys):
+        if analysis is None:
             return f"Error: Invalid analysis structure from AI. Missing required fields."
 
-        # 8. Store analysis
-        _store_analysis(params.job_id, analysis)
-
         return f"✓ Analysis complete for job {params.job_id}\n\n{json.dumps(analysis, indent=2)}"
 
     except httpx.TimeoutException:
@@ -117,6 +140,70 @@ async def analyze_jd(params: AnalyzeJDInput) -> str:
         return f"Error analyzing job: {str(e)}"
 
 
+@asynccontextmanager
+async def _foreground_analysis():
+    """Mark a user-requested analysis so the background worker waits"""
+    _worker_state["foreground_active"] += 1
+    _worker_state["idle"].clear()
+    try:
+        yield
+    finally:
+        _worker_state["foreground_active"] -= 1
+        if _worker_state["foreground_active"] == 0:
+            _worker_state["idle"].set()
+
+
+async def _check_ollama() -> Optional[str]:
+    """Return an error message if Ollama is not reachable, None otherwise"""
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.get("http://localhost:11434/api/tags")
+            if response.status_code != 200:
+                return "Error: Ollama is not running. Please start Ollama first: ollama serve"
+    except Exception as e:
+        return f"Error: Cannot connect to Ollama. Make sure it's running: {str(e)}"
+    return None
+
+
+async def _run_analysis(job: Dict) -> Optional[Dict]:
+    """
+    Call Ollama for a single job and store the result
+    Returns the analysis, or None if the AI returned an invalid structure
+    """
+    # 4. Prepare prompt
+    prompt = f"{ANALYSIS_SYSTEM_PROMPT}\n\nJob Title: {job['title']}\nCompany: {job['company']}\n\nJob Description:\n{job['description']}"
+
+    # 5. Call Ollama for analysis (stdout is the MCP transport, so log to stderr)
+    print(f"Analyzing job: {job['title']} at {job['company']}...", file=sys.stderr)
+
+    async with httpx.AsyncClient(timeout=120.0) as client:
+        response = await client.post(
+            OLLAMA_URL,
+            json={
+                "model": "llama3.1:8b",
+                "prompt": prompt,
+                "stream": False,
+                "format": "json"  # Force JSON output
+            }
+        )
+
+    # 6. Parse response
+    ollama_result = response.json()
+    analysis = json.loads(ollama_result["response"])
+
+    # 7. Validate structure (prevent hallucinations)
+    required_keys = ["required_skills", "nice_to_have_skills", "ats_keywords",
+                    "role_category", "experience_level"]
+
+    if not all(key in analysis for key in required_keys):
+        return None
+
+    # 8. Store analysis
+    _store_analysis(job["job_id"], analysis)
+
+    return analysis
+
+
 def _get_job(job_id: str) -> Dict:
     """Retrieve job from database"""
     conn = sqlite3.connect(DB_PATH)
@@ -148,16 +235,14 @@ def _get_analysis(job_id: str) -> Dict:
     analysis["required_skills"] = json.loads(analysis.get("required_skills", "[]"))
     analysis["nice_to_have_skills"] = json.loads(analysis.get("nice_to_have_skills", "[]"))
     analysis["ats_keywords"] = json.loads(analysis.get("ats_keywords", "[]"))
+    analysis["required_skill_ids"] = json.loads(analysis.get("required_skill_ids") or "[]")
+    analysis["nice_to_have_skill_ids"] = json.loads(analysis.get("nice_to_have_skill_ids") or "[]")
 
     return analysis
 
 
-def _store_analysis(job_id: str, analysis: Dict) -> None:
-    """Store analysis in database"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Create analysis table if not exists
+def _ensure_analysis_table(cursor: sqlite3.Cursor) -> None:
+    """Create analysis table if not exists, adding skill ID columns to old tables"""
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS job_analysis (
             analysis_id TEXT PRIMARY KEY,
@@ -168,16 +253,40 @@ def _store_analysis(job_id: str, analysis: Dict) -> None:
             role_category TEXT,
             experience_level TEXT,
             analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            required_skill_ids TEXT,
+            nice_to_have_skill_ids TEXT,
+            skill_ids_version INTEGER,
             FOREIGN KEY (job_id) REFERENCES jobs(job_id)
         )
     """)
 
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(job_analysis)")]
+    for column in ("required_skill_ids", "nice_to_have_skill_ids"):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE job_analysis ADD COLUMN {column} TEXT")
+    if "skill_ids_version" not in columns:
+        cursor.execute("ALTER TABLE job_analysis ADD COLUMN skill_ids_version INTEGER")
+
+
+def _store_analysis(job_id: str, analysis: Dict) -> None:
+    """Store analysis in database"""
+    # Canonical skill IDs stored next to the text (synonyms share an ID),
+    # resolved once here so matching and generation only compare IDs
+    required_ids = resolve_requirements(analysis["required_skills"], DB_PATH)
+    nice_to_have_ids = resolve_requirements(analysis["nice_to_have_skills"], DB_PATH)
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    _ensure_analysis_table(cursor)
+
     # Insert analysis
     cursor.execute("""
         INSERT OR REPLACE INTO job_analysis
         (analysis_id, job_id, required_skills, nice_to_have_skills,
-         ats_keywords, role_category, experience_level)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
+         ats_keywords, role_category, experience_level,
+         required_skill_ids, nice_to_have_skill_ids, skill_ids_version)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
         job_id,  # Use job_id as analysis_id
         job_id,
@@ -185,7 +294,10 @@ def _store_analysis(job_id: str, analysis: Dict) -> None:
         json.dumps(analysis["nice_to_have_skills"]),
         json.dumps(analysis["ats_keywords"]),
         analysis["role_category"],
-        analysis["experience_level"]
+        analysis["experience_level"],
+        json.dumps(required_ids),
+        json.dumps(nice_to_have_ids),
+        SKILL_RESOLUTION_VERSION
     ))
 
     # Update job status
@@ -247,6 +359,405 @@ async def list_analyzed_jobs(params: ListAnalyzedJobsInput) -> str:
         return f"Error listing analyzed jobs: {str(e)}"
 
 
+# ============================================================================
+# TRIAGE - cheap, LLM-free relevance score used to order analysis
+# ============================================================================
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+
+
+def _normalize_text(text: str) -> str:
+    """Lowercase and tokenize into a space-padded string for phrase lookups"""
+    return " " + " ".join(_TOKEN_RE.findall((text or "").lower())) + " "
+
+
+def _load_triage_context(profile_path: str = PROFILE_PATH) -> Dict:
+    """Normalize profile skills and preference roles/locations once per run"""
+    skills = set()
+    path = Path(profile_path)
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+        for category in profile.get("skills", {}).values():
+            if isinstance(category, list):
+                skills.update(_normalize_text(s) for s in category)
+    skills.discard("  ")
+
+    prefs = load_preferences()
+
+    return {
+        "skills": skills,
+        "roles": [set(_TOKEN_RE.findall(role.lower())) for role in prefs.get("roles", [])],
+        "locations": [loc.lower() for loc in prefs.get("locations", [])]
+    }
+
+
+def _triage_score(job: Dict, context: Dict) -> float:
+    """
+    Score 0-100 from profile skill mentions, title similarity to
+    preferred roles, and location fit
+    """
+    text = _normalize_text(
+        f"{job.get('title') or ''} {job.get('description') or ''} {job.get('requirements') or ''}"
+    )
+
+    # Skills mentioned anywhere in the posting (saturates quickly)
+    matched = sum(1 for skill in context["skills"] if skill in text)
+    skill_component = min(1.0, matched / TRIAGE_SKILL_SATURATION)
+
+    # Best token Jaccard between the title and any preferred role
+    title_tokens = set(_TOKEN_RE.findall((job.get("title") or "").lower()))
+    title_component = 0.0
+    for role_tokens in context["roles"]:
+        union = title_tokens | role_tokens
+        if union:
+            title_component = max(title_component, len(title_tokens & role_tokens) / len(union))
+
+    # Location match, or remote posting if remote is acceptable
+    location = (job.get("location") or "").lower()
+    if any(loc in location for loc in context["locations"]):
+        location_component = 1.0
+    elif "remote" in context["locations"] and " remote " in text:
+        location_component = 1.0
+    else:
+        location_component = 0.0
+
+    score = (
+        skill_component * TRIAGE_SKILL_WEIGHT +
+        title_component * TRIAGE_TITLE_WEIGHT +
+        location_component * TRIAGE_LOCATION_WEIGHT
+    ) * 100
+
+    return round(score, 2)
+
+
+def _ensure_triage_column(conn: sqlite3.Connection) -> None:
+    """Add jobs.triage_score to databases created before triage existed"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+    if columns and "triage_score" not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN triage_score FLOAT")
+        conn.commit()
+
+
+def _triage_new_jobs(conn: sqlite3.Connection, profile_path: str = PROFILE_PATH,
+                     rescore: bool = False) -> int:
+    """Compute and store triage scores for unanalyzed jobs, return count scored"""
+    _ensure_triage_column(conn)
+
+    query = "SELECT job_id, title, location, description, requirements FROM jobs WHERE status = 'new'"
+    if not rescore:
+        query += " AND triage_score IS NULL"
+
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(query).fetchall()
+    conn.row_factory = None
+    if not rows:
+        return 0
+
+    context = _load_triage_context(profile_path)
+    updates = [(_triage_score(dict(row), context), row["job_id"]) for row in rows]
+
+    conn.executemany("UPDATE jobs SET triage_score = ? WHERE job_id = ?", updates)
+    conn.commit()
+
+    return len(updates)
+
+
+class TriageJobsInput(BaseModel):
+    """Input for triaging unanalyzed jobs"""
+    model_config = ConfigDict(extra='forbid')
+    profile_path: str = Field(default=PROFILE_PATH, description="Path to profile")
+    rescore: bool = Field(default=True, description="Recompute scores for all new jobs, not only unscored ones")
+    limit: int = Field(default=20, description="Number of top jobs to return")
+
+
+@mcp.tool(
+    name="triage_jobs",
+    annotations={
+        "title": "Triage Unanalyzed Jobs",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def triage_jobs(params: TriageJobsInput) -> str:
+    """
+    Score all unanalyzed jobs without the LLM so the best get analyzed first
+    """
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        scored = _triage_new_jobs(conn, params.profile_path, rescore=params.rescore)
+
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("""
+            SELECT job_id, title, company, location, triage_score
+            FROM jobs
+            WHERE status = 'new'
+            ORDER BY triage_score DESC
+            LIMIT ?
+        """, (params.limit,)).fetchall()
+        conn.close()
+
+        return json.dumps({
+            "scored": scored,
+            "top_jobs": [dict(row) for row in rows]
+        }, indent=2, ensure_ascii=False)
+
+    except Exception as e:
+        return f"Error triaging jobs: {str(e)}"
+
+
+class AnalyzeBatchInput(BaseModel):
+    """Input for analyzing jobs in triage order"""
+    model_config = ConfigDict(extra='forbid')
+    limit: int = Field(default=10, description="Maximum number of jobs to analyze")
+    time_budget_seconds: Optional[float] = Field(default=None, description="Stop starting new analyses after this many seconds")
+    profile_path: str = Field(default=PROFILE_PATH, description="Path to profile (used for triage)")
+
+
+@mcp.tool(
+    name="analyze_batch",
+    annotations={
+        "title": "Analyze Jobs in Triage Order",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": False,
+        "openWorldHint": False
+    }
+)
+async def analyze_batch(params: AnalyzeBatchInput) -> str:
+    """
+    Analyze unanalyzed jobs, highest triage score first, within a limit/time budget
+    """
+    try:
+        ollama_error = await _check_ollama()
+        if ollama_error:
+            return ollama_error
+
+        conn = sqlite3.connect(DB_PATH)
+        _triage_new_jobs(conn, params.profile_path)
+        job_ids = [row[0] for row in conn.execute("""
+            SELECT job_id FROM jobs
+            WHERE status = 'new'
+            ORDER BY triage_score DESC, scraped_at
+            LIMIT ?
+        """, (params.limit,)).fetchall()]
+        conn.close()
+
+        started = time.monotonic()
+        analyzed, failed, remaining = [], [], []
+
+        for job_id in job_ids:
+            if params.time_budget_seconds is not None and time.monotonic() - started >= params.time_budget_seconds:
+                remaining.append(job_id)
+                continue
+
+            try:
+                job = _get_job(job_id)
+                async with _foreground_analysis():
+                    analysis = await _run_analysis(job)
+            except Exception as e:
+                print(f"Error analyzing job {job_id}: {e}", file=sys.stderr)
+                analysis = None
+
+            (analyzed if analysis is not None else failed).append(job_id)
+
+        return json.dumps({
+            "analyzed": analyzed,
+            "failed": failed,
+            "not_started": remaining,
+            "elapsed_seconds": round(time.monotonic() - started, 2)
+        }, indent=2)
+
+    except Exception as e:
+        return f"Error in batch analysis: {str(e)}"
+
+
+# ============================================================================
+# BACKGROUND ANALYSIS WORKER
+# ============================================================================
+
+def _find_new_jobs(conn: sqlite3.Connection) -> List[tuple]:
+    """Triage unscored new jobs and return (job_id, triage_score), best first"""
+    try:
+        _triage_new_jobs(conn)
+    except Exception as e:
+        _worker_state["last_error"] = f"Triage failed: {str(e)}"
+
+    try:
+        rows = conn.execute("""
+            SELECT job_id, triage_score FROM jobs
+            WHERE status = 'new'
+            ORDER BY triage_score DESC, scraped_at
+        """).fetchall()
+    except sqlite3.OperationalError:
+        # jobs table not created yet (scraper never ran)
+        return []
+    return [(row[0], row[1] or 0.0) for row in rows]
+
+
+def _enqueue_background(job_id: str, triage_score: float = 0.0,
+                        priority: int = BACKGROUND_PRIORITY) -> bool:
+    """Queue a job for background analysis unless already queued or out of attempts"""
+    queue = _worker_state["queue"]
+    if queue is None or job_id in _worker_state["queued"]:
+        return False
+    if _worker_state["failed"].get(job_id, 0) >= BACKGROUND_MAX_ATTEMPTS:
+        return False
+
+    # Higher triage score first; sequence number keeps FIFO order on ties
+    queue.put_nowait((priority, -triage_score, next(_queue_seq), job_id))
+    _worker_state["queued"].add(job_id)
+    return True
+
+
+async def _background_worker() -> None:
+    """
+    Poll the database for new jobs and analyze them one by one.
+    PRAGMA data_version only changes when another connection commits,
+    so polling it is cheap and we only rescan jobs after real writes.
+    A failed job is retried on later rescans, up to BACKGROUND_MAX_ATTEMPTS.
+    """
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    last_version = None
+    queue = _worker_state["queue"]
+
+    try:
+        while True:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != last_version:
+                last_version = version
+                new_jobs = _find_new_jobs(conn)
+                # Forget failures of jobs analyzed by hand or deleted meanwhile
+                new_ids = {job_id for job_id, _ in new_jobs}
+                _worker_state["failed"] = {
+                    job_id: attempts for job_id, attempts in _worker_state["failed"].items() if job_id in new_ids
+                }
+                for job_id, triage_score in new_jobs:
+                    _enqueue_background(job_id, triage_score)
+
+            if queue.empty():
+                await asyncio.sleep(BACKGROUND_POLL_INTERVAL)
+                continue
+
+            # Only use idle time - foreground analyze_jd calls go first
+            await _worker_state["idle"].wait()
+
+            _, neg_score, _, job_id = queue.get_nowait()
+            _worker_state["queued"].discard(job_id)
+
+            ollama_error = await _check_ollama()
+            if ollama_error:
+                _worker_state["last_error"] = ollama_error
+                _enqueue_background(job_id, -neg_score)
+                await asyncio.sleep(BACKGROUND_POLL_INTERVAL)
+                continue
+
+            try:
+                job = _get_job(job_id)
+                if not job or job["status"] != "new":
+                    continue
+                analysis = await _run_analysis(job)
+            except Exception as e:
+                analysis = None
+                _worker_state["last_error"] = f"{job_id}: {str(e)}"
+
+            if analysis is None:
+                # Retried on later rescans; analyze_jd can still be called by hand
+                _worker_state["failed"][job_id] = _worker_state["failed"].get(job_id, 0) + 1
+            else:
+                _worker_state["failed"].pop(job_id, None)
+                _worker_state["analyzed"] += 1
+    finally:
+        conn.close()
+
+
+def _start_background_worker() -> bool:
+    """Start the worker task in the running event loop (no-op if running)"""
+    task = _worker_state["task"]
+    if task is not None and not task.done():
+        return False
+
+    _worker_state["queue"] = asyncio.PriorityQueue()
+    _worker_state["queued"] = set()
+    _worker_state["task"] = asyncio.create_task(_background_worker())
+    return True
+
+
+async def _stop_background_worker() -> None:
+    """Cancel the worker task if it is running"""
+    task = _worker_state["task"]
+    if task is None:
+        return
+
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+    _worker_state["task"] = None
+
+
+class BackgroundAnalysisInput(BaseModel):
+    """Input for controlling the background analysis worker"""
+    model_config = ConfigDict(extra='forbid')
+    enabled: bool = Field(default=True, description="Start (True) or stop (False) the background worker")
+
+
+@mcp.tool(
+    name="set_background_analysis",
+    annotations={
+        "title": "Start/Stop Background Analysis",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def set_background_analysis(params: BackgroundAnalysisInput) -> str:
+    """
+    Start or stop the worker that analyzes new jobs in idle time
+    """
+    try:
+        if params.enabled:
+            started = _start_background_worker()
+            return "✓ Background analysis started" if started else "✓ Background analysis already running"
+
+        await _stop_background_worker()
+        return "✓ Background analysis stopped"
+
+    except Exception as e:
+        return f"Error controlling background analysis: {str(e)}"
+
+
+@mcp.tool(
+    name="get_background_status",
+    annotations={
+        "title": "Background Analysis Status",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def get_background_status() -> str:
+    """
+    Show whether the background worker is running and its progress
+    """
+    task = _worker_state["task"]
+    queue = _worker_state["queue"]
+
+    return json.dumps({
+        "running": task is not None and not task.done(),
+        "queued": queue.qsize() if queue is not None else 0,
+        "analyzed": _worker_state["analyzed"],
+        "failed": sorted(_worker_state["failed"]),
+        "last_error": _worker_state["last_error"]
+    }, indent=2)
+
+
 def main():
     """Run the Analysis MCP server using stdio transport."""
     mcp.run()
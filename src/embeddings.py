@@ -0,0 +1,390 @@
+"""
+Local vector embeddings of jobs and the profile
+Vectors live in a memory-mapped float32 matrix next to jobs.db, with a
+job_id -> row index in SQLite, so similarity against every job is one
+matrix-vector product and several server processes share the same pages
+"""
+
+import os
+import re
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+from relevance import clean_description, job_text
+
+DB_PATH = "./data/databases/jobs.db"
+
+# Empty: hashed n-gram vectors (no service needed). Otherwise an Ollama
+# embedding model such as "nomic-embed-text".
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "")
+OLLAMA_EMBEDDINGS_URL = os.getenv("OLLAMA_EMBEDDINGS_URL", "http://localhost:11434/api/embeddings")
+
+HASHED_DIM = 1024
+VECTORS_FILE = "job_vectors.f32"  # Generation N (after N backend changes): job_vectors.N.f32
+
+# Below ANN_MIN_ROWS an exact scan is as fast as probing an index
+ANN_MIN_ROWS = 2048
+ANN_PROBES = 8
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+
+
+def _hashed_vector(text: str, dim: int = HASHED_DIM) -> np.ndarray:
+    """
+    Signed feature hashing of word unigrams, word bigrams and character
+    trigrams, L2-normalized. Deterministic across processes (crc32).
+    """
+    words = _WORD_RE.findall(clean_description(text).lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in set(words):
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    hashes = np.fromiter((zlib.crc32(feature.encode()) for feature in features),
+                         dtype=np.uint32, count=len(features))
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+    vector = np.bincount(hashes % dim, weights=signs, minlength=dim).astype(np.float32)
+
+    # Sublinear term weighting, then unit length for cosine similarity
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _ollama_vectors(texts: Sequence[str], model: str) -> np.ndarray:
+    """Embed texts with the Ollama embeddings endpoint, L2-normalized"""
+    vectors = []
+    with httpx.Client(timeout=60.0) as client:
+        for text in texts:
+            response = client.post(OLLAMA_EMBEDDINGS_URL, json={
+                "model": model,
+                "prompt": clean_description(text)
+            })
+            response.raise_for_status()
+            vectors.append(response.json()["embedding"])
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+def embed_texts(texts: Sequence[str], model: str = None) -> np.ndarray:
+    """Embed texts as unit float32 rows with the configured backend"""
+    model = EMBEDDING_MODEL if model is None else model
+    if model:
+        return _ollama_vectors(texts, model)
+    if not texts:
+        return np.zeros((0, HASHED_DIM), dtype=np.float32)
+    return np.vstack([_hashed_vector(text) for text in texts])
+
+
+def backend_name(model: str = None) -> str:
+    """Identifier of the embedding backend stored with the vectors"""
+    model = EMBEDDING_MODEL if model is None else model
+    return f"ollama:{model}" if model else f"hashed:{HASHED_DIM}"
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index: rows are bucketed
+    by their nearest k-means centroid (cosine), and a query only scores
+    rows in its ANN_PROBES closest buckets. New rows are assigned to
+    the existing centroids, so appends don't require a rebuild.
+    """
+
+    def __init__(self, matrix: np.ndarray, seed: int = 0, iterations: int = 10):
+        n_rows = len(matrix)
+        n_lists = max(1, int(np.sqrt(n_rows)))
+        rng = np.random.default_rng(seed)
+
+        # Spherical k-means on a sample of the rows
+        sample = np.asarray(matrix[np.sort(rng.choice(n_rows, min(n_rows, 64 * n_lists), replace=False))])
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        self.centroids = centroids.astype(np.float32)
+        self.built_rows = n_rows
+        self.lists = np.zeros(0, dtype=np.int32)  # Row -> bucket
+        self.add(matrix)
+
+    def add(self, matrix: np.ndarray) -> None:
+        """Assign rows appended since the last call to their nearest bucket"""
+        start = len(self.lists)
+        assigned = [self.lists]
+        for chunk_start in range(start, len(matrix), 8192):
+            chunk = np.asarray(matrix[chunk_start:chunk_start + 8192])
+            assigned.append(np.argmax(chunk @ self.centroids.T, axis=1).astype(np.int32))
+        self.lists = np.concatenate(assigned)
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, k: int,
+               exclude: np.ndarray, probes: int = ANN_PROBES) -> List[Tuple[int, float]]:
+        """Top-k (row, similarity) among rows of the closest buckets, minus excluded rows"""
+        probes = min(probes, len(self.centroids))
+        closest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+        candidates = np.flatnonzero(np.isin(self.lists, closest) & ~exclude[:len(self.lists)])
+        return _top_k(candidates, np.asarray(matrix[candidates]) @ query, k)
+
+
+def _top_k(rows: np.ndarray, sims: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """(row, similarity) pairs of the k highest similarities, best first"""
+    if len(rows) > k:
+        top = np.argpartition(-sims, k - 1)[:k]
+        rows, sims = rows[top], sims[top]
+    order = np.argsort(-sims, kind="stable")
+    return [(int(rows[i]), float(sims[i])) for i in order]
+
+
+class VectorStore:
+    """
+    Append-only float32 matrix file plus a job_id -> row table.
+    Rows are allocated inside a SQLite write transaction, so concurrent
+    writers never hand out the same row; readers only map committed rows.
+    A backend change starts a new file generation instead of rewriting
+    the file other processes have mapped.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, model: str = None):
+        self.db_path = db_path
+        self.model = EMBEDDING_MODEL if model is None else model
+        self.backend = backend_name(self.model)
+        self.directory = os.path.dirname(os.path.abspath(db_path))
+        self.path = os.path.join(self.directory, VECTORS_FILE)  # File of the committed generation
+        self._map: Optional[np.memmap] = None
+        self._map_path: Optional[str] = None  # Generation the cached rows and map belong to
+        self._rows: Dict[str, int] = {}
+        self._row_ids: List[str] = []
+        self._ann: Optional[IVFIndex] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_vectors (
+                job_id TEXT PRIMARY KEY,
+                row INTEGER NOT NULL UNIQUE
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS vector_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        return conn
+
+    def _connect_read_only(self) -> Optional[sqlite3.Connection]:
+        """Connection for readers, or None before anything was embedded"""
+        if not os.path.exists(self.db_path):
+            return None
+        conn = sqlite3.connect(f"{Path(self.db_path).absolute().as_uri()}?mode=ro", uri=True, timeout=30.0)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not {"job_vectors", "vector_meta"} <= tables:
+            conn.close()
+            return None
+        return conn
+
+    def _is_current(self, conn: sqlite3.Connection) -> bool:
+        """Whether stored vectors come from this store's backend"""
+        row = conn.execute("SELECT value FROM vector_meta WHERE key = 'backend'").fetchone()
+        return row is not None and row[0] == self.backend
+
+    def _vector_path(self, meta: Dict[str, str]) -> str:
+        """Matrix file of the generation recorded in vector_meta"""
+        return os.path.join(self.directory, meta.get("file", VECTORS_FILE))
+
+    def _check_backend(self, conn: sqlite3.Connection, dim: int) -> Tuple[str, int, Optional[str]]:
+        """
+        (file, dim, replaced file) for this backend, inside the caller's write
+        transaction. Vectors from another model are not comparable: a backend
+        change drops the rows and starts a new file generation, so processes
+        still mapping the old file are unaffected until the switch commits.
+        The replaced file is deleted by the caller after commit.
+        """
+        meta = dict(conn.execute("SELECT key, value FROM vector_meta"))
+        if meta.get("backend") == self.backend:
+            return self._vector_path(meta), int(meta["dim"]), None
+
+        generation = int(meta.get("generation", 0)) + 1
+        stem, extension = os.path.splitext(VECTORS_FILE)
+        meta_rows = [("backend", self.backend), ("dim", str(dim)),
+                     ("generation", str(generation)), ("file", f"{stem}.{generation}{extension}")]
+        conn.execute("DELETE FROM job_vectors")
+        conn.executemany("INSERT OR REPLACE INTO vector_meta (key, value) VALUES (?, ?)", meta_rows)
+
+        # Not referenced until commit; a leftover from an aborted switch is overwritten
+        path = self._vector_path(dict(meta_rows))
+        open(path, "wb").close()
+        return path, dim, self._vector_path(meta) if meta else None
+
+    def add(self, items: Iterable[Tuple[str, str]]) -> int:
+        """Embed and append (job_id, text) pairs not stored yet; returns count added"""
+        conn = self._connect()
+        try:
+            stored = set()
+            if self._is_current(conn):  # Vectors of another backend get replaced
+                stored = {row[0] for row in conn.execute("SELECT job_id FROM job_vectors")}
+            pending = {}
+            for job_id, text in items:
+                if job_id not in stored:
+                    pending.setdefault(job_id, text)
+            if not pending:
+                return 0
+
+            # Embed outside the write lock - this may call Ollama
+            job_ids = list(pending)
+            vectors = embed_texts([pending[job_id] for job_id in job_ids], self.model)
+
+            conn.execute("BEGIN IMMEDIATE")
+            path, dim, replaced = self._check_backend(conn, vectors.shape[1])
+
+            # Another writer may have stored some of these meanwhile
+            stored = {row[0] for row in conn.execute("SELECT job_id FROM job_vectors")}
+            keep = [i for i, job_id in enumerate(job_ids) if job_id not in stored]
+            job_ids = [job_ids[i] for i in keep]
+            vectors = vectors[keep]
+
+            start = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM job_vectors").fetchone()[0]
+            mode = "r+b" if os.path.exists(path) else "wb"
+            with open(path, mode) as f:
+                f.seek(start * dim * 4)
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            conn.executemany(
+                "INSERT INTO job_vectors (job_id, row) VALUES (?, ?)",
+                [(job_id, start + i) for i, job_id in enumerate(job_ids)]
+            )
+            conn.commit()
+            self.path = path
+
+            # Readers still mapping the old generation keep their pages
+            if replaced and replaced != path and os.path.exists(replaced):
+                try:
+                    os.remove(replaced)
+                except OSError:
+                    pass  # Still open elsewhere (Windows); orphaned, not referenced
+            return len(job_ids)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def add_missing_jobs(self, job_ids: Optional[Iterable[str]] = None) -> int:
+        """Embed jobs (or just job_ids) stored before vectors existed or after a backend change"""
+        wanted = None if job_ids is None else set(job_ids)
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        missing = "LEFT JOIN job_vectors v ON v.job_id = j.job_id WHERE v.job_id IS NULL"
+        rows = conn.execute(f"""
+            SELECT j.job_id, j.title, j.description, j.requirements
+            FROM jobs j
+            {missing if self._is_current(conn) else ""}
+        """).fetchall()
+        conn.close()
+        return self.add(
+            (row["job_id"], job_text(dict(row))) for row in rows if wanted is None or row["job_id"] in wanted
+        )
+
+    def matrix(self) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Read-only (rows x dim) view of committed vectors and the job_id -> row map"""
+        conn = self._connect_read_only()
+        if conn is None:
+            return np.zeros((0, 0), dtype=np.float32), {}
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM vector_meta"))
+            if meta.get("backend") != self.backend:
+                return np.zeros((0, 0), dtype=np.float32), {}
+            path = self._vector_path(meta)
+            if path != self._map_path:
+                # Another generation - nothing cached belongs to it
+                self._map, self._rows, self._row_ids, self._ann = None, {}, [], None
+                self._map_path = path
+            # Rows are append-only, so an unchanged count means an unchanged map
+            count = conn.execute("SELECT COUNT(*) FROM job_vectors").fetchone()[0]
+            if count != len(self._rows):
+                self._rows = dict(conn.execute("SELECT job_id, row FROM job_vectors"))
+                self._row_ids = [None] * (max(self._rows.values()) + 1 if self._rows else 0)
+                for job_id, row in self._rows.items():
+                    self._row_ids[row] = job_id
+        finally:
+            conn.close()
+
+        rows = self._rows
+        dim = int(meta["dim"])
+        n_rows = len(self._row_ids)
+        self.path = path
+        # Re-map only when other writers have appended rows
+        if self._map is None or self._map.shape != (n_rows, dim):
+            if self._map is not None and self._map.shape[1:] != (dim,):
+                self._ann = None
+            self._map = (np.memmap(self.path, dtype=np.float32, mode="r", shape=(n_rows, dim))
+                         if n_rows else np.zeros((0, dim), dtype=np.float32))
+        return self._map, rows
+
+    def similarities(self, query: np.ndarray,
+                     job_ids: Optional[List[str]] = None) -> Dict[str, float]:
+        """Cosine similarity of the query vector to every stored job (or job_ids)"""
+        matrix, rows = self.matrix()
+        if not rows:
+            return {}
+        query = np.asarray(query, dtype=np.float32)
+        if job_ids is None:
+            sims = (matrix @ query).tolist()
+            return {job_id: sims[row] for job_id, row in rows.items()}
+
+        job_ids = [job_id for job_id in job_ids if job_id in rows]
+        indices = np.fromiter((rows[job_id] for job_id in job_ids), dtype=np.int64, count=len(job_ids))
+        sims = matrix[indices] @ query
+        return dict(zip(job_ids, sims.tolist()))
+
+    def nearest(self, query: np.ndarray, k: int,
+                exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """
+        Top-k (job_id, cosine) for the query, skipping excluded jobs.
+        Exact below ANN_MIN_ROWS, otherwise through the IVF index, which is
+        rebuilt only when the corpus has doubled since it was trained.
+        """
+        matrix, rows = self.matrix()
+        if not rows or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+
+        job_ids = self._row_ids
+        excluded = np.zeros(len(matrix), dtype=bool)
+        excluded[[rows[job_id] for job_id in exclude if job_id in rows]] = True
+
+        if len(matrix) < ANN_MIN_ROWS:
+            candidates = np.flatnonzero(~excluded)
+            top = _top_k(candidates, np.asarray(matrix[candidates]) @ query, k)
+        else:
+            if self._ann is None or len(matrix) > 2 * self._ann.built_rows:
+                self._ann = IVFIndex(matrix)
+            elif len(matrix) > len(self._ann.lists):
+                self._ann.add(matrix)
+            top = self._ann.search(matrix, query, k, excluded)
+
+        return [(job_ids[row], sim) for row, sim in top if job_ids[row] is not None]
+
+
+# (abspath db, backend) -> VectorStore, one per process
+_stores: Dict[tuple, VectorStore] = {}
+
+
+def get_vector_store(db_path: str = DB_PATH) -> VectorStore:
+    """Return the shared vector store for a database"""
+    key = (os.path.abspath(db_path), backend_name())
+    if key not in _stores:
+        _stores[key] = VectorStore(db_path)
+    return _stores[key]
@@ -5,20 +5,77 @@ Generates personalized LaTeX resumes with STRICT validation to prevent hallucina
 
 from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, Field, ConfigDict
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+from markupsafe import Markup
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+import asyncio
+import hashlib
 import httpx
 import json
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, FrozenSet, List, Literal, Optional, Tuple, Union
 import os
+import re
+import shlex
+import shutil
 import sqlite3
+import sys
+import threading
+import time
+
+# Add src to path for shared modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from preferences import load_preferences
+from profiles import claim_legacy_rows, stable_profile_id
+from relevance import tokenize
+from skills import analysis_skill_ids, get_vocabulary
 
 mcp = FastMCP("document_generator_mcp")
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+OLLAMA_TAGS_URL = OLLAMA_URL.rsplit("/api/", 1)[0] + "/api/tags"
+OLLAMA_MODEL = "llama3.1:8b"
+
+# Per-experience AI calls run concurrently over one pooled client
+AI_CONCURRENCY = int(os.getenv("GENERATOR_AI_CONCURRENCY", "4"))         # In-flight Ollama requests
+AI_REQUEST_TIMEOUT = float(os.getenv("GENERATOR_AI_TIMEOUT", "30"))      # Seconds per request
+AI_DEADLINE = float(os.getenv("GENERATOR_AI_DEADLINE", "60"))            # Seconds for a whole resume
+
+_ollama_state = {
+    "loop": None,        # Event loop the client and semaphore belong to
+    "client": None,      # httpx.AsyncClient, open while its loop has a session
+    "sessions": 0,       # Open _ollama_session() blocks; the last one closes the client
+    "semaphore": None,   # Bounds in-flight requests across all resumes being generated
+    "inflight": {},      # Highlight cache key -> Future of the request computing it
+}
+
+# Persistent cache of AI-customized highlights (LRU, bounded by entries and bytes)
+HIGHLIGHT_CACHE_MAX_ENTRIES = int(os.getenv("GENERATOR_HIGHLIGHT_CACHE_ENTRIES", "5000"))
+HIGHLIGHT_CACHE_MAX_BYTES = int(os.getenv("GENERATOR_HIGHLIGHT_CACHE_BYTES", str(20 * 1024 * 1024)))
+
 OUTPUT_DIR = Path("./generated_resumes")
-TEMPLATE_PATH = Path("./templates/resume_template.tex")
+RESUME_STORE_NAME = "by_hash"  # Content-addressed .tex files under OUTPUT_DIR
+TEMPLATE_DIR = Path("./templates")
+TEMPLATE_NAME = "resume_template.tex"
+TEMPLATE_PATH = TEMPLATE_DIR / TEMPLATE_NAME
+SECTIONS_TEMPLATE_NAME = "resume_sections.tex"  # Invariant section macros, imported by the template
+TEMPLATE_CACHE_DIR = Path("./data/cache/templates")  # Compiled template bytecode
 DB_PATH = "./data/databases/jobs.db"
+MANIFEST_NAME = "manifest.json"
+
+# Optional local PDF compilation: {tex} and {outdir} are substituted per resume
+TEX_COMMAND = os.getenv(
+    "GENERATOR_TEX_COMMAND", "latexmk -pdf -interaction=nonstopmode -halt-on-error -outdir={outdir} {tex}"
+)
+COMPILE_WORKERS = int(os.getenv("GENERATOR_COMPILE_WORKERS", "0")) or os.cpu_count() or 1  # TeX processes at once
+COMPILE_TIMEOUT = float(os.getenv("GENERATOR_COMPILE_TIMEOUT", "120"))                   # Seconds per resume
 
 # CRITICAL: System prompt that prevents hallucinations
 PERSONALIZATION_SYSTEM_PROMPT = """You are a resume bullet point customizer.
@@ -35,12 +92,55 @@ Task: Reorder bullet points to match job requirements. Emphasize relevant points
 Return JSON array with same structure as input.
 """
 
+# Per-mode request prompts, filled with str.format
+CUSTOMIZATION_PROMPTS = {
+    "per_entry": """{system}
+
+Job Requirements:
+{requirements}
+
+Original Highlights (keep count={count}):
+{highlights}
+
+Task: Return JSON array with {count} highlights, reordered to emphasize skills matching job requirements.
+""",
+    "single_request": """{system}
+
+Job Requirements:
+{requirements}
+
+Original Highlights by section (keep each section's count):
+{highlights}
+
+Task: Return a JSON object with exactly the keys {keys}. Each value is that section's highlights, same count, reordered to emphasize skills matching job requirements. Never move a highlight to another section.
+""",
+}
+
+# Prompt version per customization mode, part of highlight cache keys.
+# Together with the model, the entry's highlights and the required skills,
+# this covers every input of the prompts above. Deliberately not in the key:
+# - the spelling and order of the required skills: the key uses their sorted
+#   canonical skill IDs, so "PyTorch, Python" and "python, pytorch" share answers
+# - in single_request mode, the other sections sent in the same request: each
+#   section's answer is validated on its own and reused on its own
+# Nothing else of the job (ATS keywords, title, nice-to-have skills) is sent.
+# Bump the prefix when a new input is added to the prompts.
+PROMPT_VERSIONS = {
+    mode: "2:" + hashlib.sha256((PERSONALIZATION_SYSTEM_PROMPT + prompt).encode()).hexdigest()[:12]
+    for mode, prompt in CUSTOMIZATION_PROMPTS.items()
+}
+
 
 class GenerateResumeInput(BaseModel):
     model_config = ConfigDict(extra='forbid')
     job_id: str = Field(..., description="Job ID to generate resume for")
     profile_path: str = Field(default="./data/profiles/profile.json", description="Path to profile")
     use_ai_customization: bool = Field(default=True, description="Whether to use AI for customization")
+    customization_mode: Literal["per_entry", "single_request"] = Field(
+        default="per_entry",
+        description="One AI request per experience entry, or one structured request for all entries"
+    )
+    include_projects: bool = Field(default=False, description="Also customize project highlights with AI")
 
 
 @mcp.tool(
@@ -66,50 +166,32 @@ async def generate_resume(params: GenerateResumeInput) -> str:
         with open(profile_path, 'r', encoding='utf-8') as f:
             profile = json.load(f)
 
-        # 2. Get job analysis and match score
-        analysis = _get_analysis(params.job_id)
-        match_score_data = _get_match_score(params.job_id)
-
-        if not analysis:
-            return f"Error: Analysis not found for job {params.job_id}. Please run analyze_jd first."
-
-        if not match_score_data:
-            return f"Error: Match score not found. Please run match_profile first."
-
-        # 3. Get job details
-        job = _get_job(params.job_id)
-        if not job:
-            return f"Error: Job {params.job_id} not found"
-
-        # 4. CRITICAL: Customize content with validation
-        if params.use_ai_customization:
-            customized_profile = await _customize_profile_safe(profile, analysis, match_score_data)
-        else:
-            customized_profile = _customize_profile_no_ai(profile, analysis, match_score_data)
-
-        # 5. CRITICAL: Validate structure hasn't changed
-        if not _validate_structure(profile, customized_profile):
-            print("WARNING: AI attempted to modify structure - using original profile")
-            customized_profile = profile
-
-        # 6. Load and render LaTeX template
+        # 2-3. Get job analysis, match score and job details
+        profile_id = _claim_profile_id(profile_path, profile)
+        context = _load_job_context(params.job_id, profile_id)
+        if isinstance(context, str):
+            return context
+        analysis, match_score_data, job = context
+
+        # 4-5. CRITICAL: Customize content with validation
+        options = CustomizationOptions(
+            params.use_ai_customization, params.customization_mode, params.include_projects
+        )
+        started = time.perf_counter()
+        customized_profile = await _customize_for_job(profile, analysis, match_score_data, options)
+        customization_seconds = time.perf_counter() - started
+
+        # 6-7. Render LaTeX template (compiled once, reloaded when the file changes) and save
         if not TEMPLATE_PATH.exists():
             return f"Error: Template not found at {TEMPLATE_PATH}"
 
-        with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
-            template_content = f.read()
-
-        template = Template(template_content)
-        latex_content = template.render(**customized_profile)
-
-        # 7. Save file
-        company_safe = job['company'].replace(' ', '_').replace('/', '_')
-        filename = f"resume_{company_safe}_{params.job_id[:8]}.tex"
-        output_path = OUTPUT_DIR / filename
-
-        OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(latex_content)
+        profile_hash = _file_hash(profile_path)
+        output_path, content_hash, written = _render_resume(customized_profile, profile, profile_hash)
+        _record_resumes(profile_id, [(
+            params.job_id, str(output_path),
+            _resume_version(profile_hash, match_score_data, _template_hash(), options),
+            content_hash
+        )])
 
         # 8. Return success with details
         result = {
@@ -121,6 +203,10 @@ async def generate_resume(params: GenerateResumeInput) -> str:
             "match_score": match_score_data["overall_score"],
             "variant_used": match_score_data["recommended_variant"],
             "ai_customization": params.use_ai_customization,
+            "customization_mode": params.customization_mode if params.use_ai_customization else None,
+            "customization_seconds": round(customization_seconds, 3),
+            "content_hash": content_hash,
+            "unchanged": not written,
             "message": f"Resume generated successfully. Review at: {output_path}"
         }
 
@@ -130,94 +216,1133 @@ async def generate_resume(params: GenerateResumeInput) -> str:
         return f"Error generating resume: {str(e)}"
 
 
-async def _customize_profile_safe(profile: Dict, analysis: Dict, match_score: Dict) -> Dict:
+class GenerateResumesBatchInput(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    profile_path: str = Field(default="./data/profiles/profile.json", description="Path to profile")
+    min_score: Optional[float] = Field(
+        default=None, description="Minimum overall match score (default: preferences match_threshold)"
+    )
+    limit: Optional[int] = Field(default=None, ge=1, description="Maximum number of jobs, best matches first")
+    use_ai_customization: bool = Field(default=True, description="Whether to use AI for customization")
+    customization_mode: Literal["per_entry", "single_request"] = Field(
+        default="per_entry",
+        description="One AI request per experience entry, or one structured request for all entries"
+    )
+    include_projects: bool = Field(default=False, description="Also customize project highlights with AI")
+    max_concurrency: int = Field(default=4, ge=1, le=32, description="Resumes customized and rendered at once")
+    force: bool = Field(default=False, description="Regenerate resumes that are already up to date")
+
+
+@mcp.tool(
+    name="generate_resumes_batch",
+    annotations={
+        "title": "Generate Resumes for All Strong Matches",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def generate_resumes_batch(params: GenerateResumesBatchInput) -> str:
     """
-    Customize profile content using AI with STRICT validation
-    Section-by-section to limit AI scope
+    Generate resumes for every match above the threshold that has no
+    up-to-date resume, and write a manifest of the shortlist.
+    A resume is up to date while the profile file, the job's match row and
+    the template are unchanged. Customization runs concurrently (bounded by
+    max_concurrency); rendering and file writes run in a thread pool so the
+    event loop keeps serving AI calls. Files are stored by content hash, so
+    jobs with byte-identical resumes share one file.
     """
-    customized = profile.copy()
+    try:
+        started = time.perf_counter()
+
+        # 1. Load profile and versions once
+        profile_path = Path(params.profile_path)
+        if not profile_path.exists():
+            return f"Error: Profile not found at {params.profile_path}"
+        if not TEMPLATE_PATH.exists():
+            return f"Error: Template not found at {TEMPLATE_PATH}"
+
+        with open(profile_path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+        profile_id = _claim_profile_id(profile_path, profile)
+        profile_hash = _file_hash(profile_path)
+        template_hash = _template_hash()
+        options = CustomizationOptions(
+            params.use_ai_customization, params.customization_mode, params.include_projects
+        )
+
+        threshold = params.min_score
+        if threshold is None:
+            threshold = float(load_preferences().get("match_threshold", 70.0))
+
+        # 2. Shortlist, split into up-to-date and to-generate
+        candidates = _get_resume_candidates(profile_id, threshold, params.limit)
+        existing = _get_resume_records(profile_id)
+        todo, entries = [], {}
+        for match in candidates:
+            version = _resume_version(profile_hash, match, template_hash, options)
+            entries[match["job_id"]] = {
+                "job_id": match["job_id"],
+                "company": match["company"],
+                "job_title": match["title"],
+                "match_score": match["overall_score"],
+                "variant_used": match["recommended_variant"],
+                "file": None,
+                "content_hash": None,
+                "status": "pending"
+            }
+            record = existing.get(match["job_id"])
+            if not params.force and record and record[1] == version and Path(record[0]).exists():
+                entries[match["job_id"]].update(file=record[0], content_hash=record[2], status="up_to_date")
+            else:
+                todo.append((match, version))
+
+        # 3. Customize and render with bounded concurrency
+        analyses = _get_analyses([match["job_id"] for match, _ in todo])
+        _get_template_env()  # Create the environment before worker threads use it
+        semaphore = asyncio.Semaphore(params.max_concurrency)
+        loop = asyncio.get_running_loop()
+
+        async def generate(match: Dict, executor: ThreadPoolExecutor) -> Path:
+            async with semaphore:
+                analysis = analyses.get(match["job_id"])
+                if not analysis:
+                    raise ValueError("analysis not found")
+                customized = await _customize_for_job(profile, analysis, match, options)
+                return await loop.run_in_executor(executor, _render_resume, customized, profile, profile_hash)
+
+        # One Ollama session for the whole batch, so all resumes share its connection pool
+        async with _ollama_session() if options.use_ai else nullcontext():
+            with ThreadPoolExecutor(max_workers=params.max_concurrency) as executor:
+                outcomes = await asyncio.gather(
+                    *(generate(match, executor) for match, _ in todo), return_exceptions=True
+                )
+
+        # 4. Record successes in one transaction
+        generated, files_written = [], 0
+        for (match, version), outcome in zip(todo, outcomes):
+            entry = entries[match["job_id"]]
+            if isinstance(outcome, Exception):
+                entry.update(status="failed", error=str(outcome))
+            else:
+                output_path, content_hash, written = outcome
+                entry.update(file=str(output_path), content_hash=content_hash, status="generated")
+                generated.append((match["job_id"], str(output_path), version, content_hash))
+                files_written += written
+        _record_resumes(profile_id, generated)
+
+        # 5. Manifest of the whole shortlist, and which jobs share each distinct resume
+        outputs = {}
+        for entry in entries.values():
+            if entry["content_hash"]:
+                output = outputs.setdefault(entry["content_hash"], {"file": entry["file"], "job_ids": []})
+                output["job_ids"].append(entry["job_id"])
+
+        OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
+        manifest_path = OUTPUT_DIR / MANIFEST_NAME
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "profile_id": profile_id,
+                "min_score": threshold,
+                "resumes": list(entries.values()),
+                "outputs": outputs
+            }, f, indent=2, ensure_ascii=False)
+
+        failed = [entry for entry in entries.values() if entry["status"] == "failed"]
+        return json.dumps({
+            "shortlisted": len(entries),
+            "generated": len(generated),
+            "up_to_date": len(entries) - len(todo),
+            "distinct_resumes": len(outputs),
+            "files_written": files_written,
+            "failed": [{"job_id": entry["job_id"], "error": entry["error"]} for entry in failed],
+            "manifest": str(manifest_path),
+            "elapsed_seconds": round(time.perf_counter() - started, 3)
+        }, indent=2, ensure_ascii=False)
+
+    except Exception as e:
+        return f"Error generating resumes: {str(e)}"
+
+
+class CompileResumesInput(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    profile_path: str = Field(default="./data/profiles/profile.json", description="Path to profile")
+    job_ids: Optional[List[str]] = Field(
+        default=None, description="Jobs to compile (default: every generated resume of the profile)"
+    )
+    max_workers: Optional[int] = Field(
+        default=None, ge=1, le=64, description="TeX processes at once (default: GENERATOR_COMPILE_WORKERS or CPU count)"
+    )
+    force: bool = Field(default=False, description="Recompile resumes that already have a PDF")
+
 
-    # Check if Ollama is available
+@mcp.tool(
+    name="compile_resumes",
+    annotations={
+        "title": "Compile Generated Resumes to PDF",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def compile_resumes(params: CompileResumesInput) -> str:
+    """
+    Compile a profile's generated resumes to PDF with the local TeX engine.
+    Each distinct content hash is compiled once, by up to max_workers engine
+    processes at a time; a hash whose PDF already exists is skipped. The
+    engine output is kept next to each PDF as a .log file.
+    """
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            await client.get("http://localhost:11434/api/tags")
-    except:
-        print("WARNING: Ollama not available, using non-AI customization")
-        return _customize_profile_no_ai(profile, analysis, match_score)
+        started = time.perf_counter()
+
+        command = shlex.split(TEX_COMMAND)
+        if not command or shutil.which(command[0]) is None:
+            return f"Error: TeX engine not found: {TEX_COMMAND!r}. Set GENERATOR_TEX_COMMAND to latexmk or tectonic."
+
+        # 1. Resumes to compile, grouped by content
+        profile_id = _claim_profile_id(Path(params.profile_path))
+        records = _get_resume_records(profile_id)
+        job_ids = list(records) if params.job_ids is None else params.job_ids
+
+        results, by_hash, tex_files = {}, {}, {}
+        for job_id in job_ids:
+            record = records.get(job_id)
+            if record is None:
+                results[job_id] = {"job_id": job_id, "status": "failed", "error": "no generated resume"}
+            elif not record[2]:
+                results[job_id] = {
+                    "job_id": job_id, "status": "failed",
+                    "error": "resume predates content-addressed storage; regenerate it"
+                }
+            else:
+                by_hash.setdefault(record[2], []).append(job_id)
+                tex_files[record[2]] = Path(record[0])
+
+        # 2. Compile distinct resumes over a bounded pool of engine processes
+        semaphore = asyncio.Semaphore(params.max_workers or COMPILE_WORKERS)
+
+        async def compile_one(content_hash: str) -> Dict:
+            async with semaphore:
+                try:
+                    return await _compile_resume(command, tex_files[content_hash], params.force)
+                except Exception as e:  # A failed resume does not stop the others
+                    return {"status": "failed", "error": str(e)}
+
+        outcomes = await asyncio.gather(*(compile_one(content_hash) for content_hash in by_hash))
+
+        # 3. Report per job
+        for (content_hash, shared_job_ids), outcome in zip(by_hash.items(), outcomes):
+            for job_id in shared_job_ids:
+                results[job_id] = {"job_id": job_id, "content_hash": content_hash, **outcome}
+
+        statuses = [result["status"] for result in results.values()]
+        return json.dumps({
+            "jobs": len(results),
+            "distinct_resumes": len(by_hash),
+            "compiled": sum(outcome["status"] == "compiled" for outcome in outcomes),
+            "up_to_date": sum(outcome["status"] == "up_to_date" for outcome in outcomes),
+            "failed_jobs": statuses.count("failed"),
+            "resumes": [results[job_id] for job_id in job_ids],
+            "elapsed_seconds": round(time.perf_counter() - started, 3)
+        }, indent=2, ensure_ascii=False)
 
-    # ONLY customize experience highlights (most impactful)
-    print("Customizing experience section with AI...")
+    except Exception as e:
+        return f"Error compiling resumes: {str(e)}"
 
-    for i, exp in enumerate(profile.get("experience", [])):
+
+# ============================================================================
+# TEMPLATES - one compiled, auto-reloading LaTeX environment per template dir
+# ============================================================================
+
+_LATEX_SPECIAL = {
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+    "<": r"\textless{}",
+    ">": r"\textgreater{}",
+}
+_LATEX_SPECIAL_RE = re.compile("|".join(re.escape(char) for char in _LATEX_SPECIAL))
+_URL_SPECIAL_RE = re.compile(r"([%#])")
+
+
+class LatexText(str):
+    """Text that is already valid LaTeX and must not be escaped again"""
+
+
+def latex_escape(value: Any) -> LatexText:
+    """Escape LaTeX special characters (no-op for text already escaped or marked safe)"""
+    if isinstance(value, (LatexText, Markup)):
+        return LatexText(value)
+    return LatexText(_LATEX_SPECIAL_RE.sub(lambda m: _LATEX_SPECIAL[m.group()], str(value)))
+
+
+def latex_url(value: Any) -> LatexText:
+    """Escape a URL for \\href, where only % and # are special"""
+    return LatexText(_URL_SPECIAL_RE.sub(r"\\\1", str(value)))
+
+
+def _finalize_latex(value: Any) -> str:
+    """Escape every rendered value; missing values render as nothing"""
+    if value is None:
+        return ""
+    return latex_escape(value)
+
+
+_template_envs: Dict[str, Environment] = {}
+
+
+def _get_template_env() -> Environment:
+    """
+    Template environment for TEMPLATE_DIR, created once per process.
+    Templates are compiled on first use and kept in memory; auto_reload
+    recompiles one when its file's mtime changes, and the bytecode cache
+    lets new processes skip the compile as well.
+    """
+    key = str(TEMPLATE_DIR.resolve())
+    env = _template_envs.get(key)
+    if env is None:
+        TEMPLATE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        env = Environment(
+            loader=FileSystemLoader(key),
+            bytecode_cache=FileSystemBytecodeCache(str(TEMPLATE_CACHE_DIR)),
+            auto_reload=True,
+            # LaTeX-safe delimiters: {{ }} and {% %} collide with TeX braces and comments
+            block_start_string=r"\BLOCK{",
+            block_end_string="}",
+            variable_start_string=r"\VAR{",
+            variable_end_string="}",
+            comment_start_string=r"\#{",
+            comment_end_string="}",
+            keep_trailing_newline=True,
+            finalize=_finalize_latex,
+        )
+        env.filters["latex_escape"] = latex_escape
+        env.filters["latex_url"] = latex_url
+        _template_envs[key] = env
+    return env
+
+
+# Sections of SECTIONS_TEMPLATE_NAME that only read profile fields customization never changes
+INVARIANT_SECTIONS = ("personal", "education", "certifications", "achievements")
+INVARIANT_CACHE_MAX_ENTRIES = 32  # (sections template, profile version) pairs kept in memory, least recently used evicted
+
+_invariant_sections_cache: OrderedDict[Tuple[Template, str], Dict[str, LatexText]] = OrderedDict()
+_invariant_sections_lock = threading.Lock()
+
+
+def _invariant_sections(profile: Dict, profile_hash: str) -> Dict[str, LatexText]:
+    """
+    Invariant sections of a profile, rendered by calling the section macros,
+    keyed by the compiled sections template and the profile's content hash.
+    A template reload yields a new Template object, so edited templates and
+    profiles both miss the cache.
+    """
+    template = _get_template_env().get_template(SECTIONS_TEMPLATE_NAME)
+    key = (template, profile_hash)
+    with _invariant_sections_lock:
+        sections = _invariant_sections_cache.get(key)
+        if sections is not None:
+            _invariant_sections_cache.move_to_end(key)
+            return sections
+
+    macros = template.module
+    sections = {name: LatexText(getattr(macros, name)(profile.get(name))) for name in INVARIANT_SECTIONS}
+    with _invariant_sections_lock:
+        _invariant_sections_cache[key] = sections
+        if len(_invariant_sections_cache) > INVARIANT_CACHE_MAX_ENTRIES:
+            _invariant_sections_cache.popitem(last=False)
+    return sections
+
+
+def _render_latex(template: Template, customized_profile: Mapping, invariant: Dict[str, LatexText]) -> str:
+    """Render the template for a customized profile with pre-rendered invariant sections"""
+    return template.render(customized_profile, invariant=invariant)
+
+
+# ============================================================================
+# PROFILE OVERLAY - per-job overrides over one shared, read-only profile
+# ============================================================================
+
+class _Overrides:
+    """Values by path, plus every proper prefix of those paths for quick lookups"""
+
+    def __init__(self):
+        self.values: Dict[Tuple, Any] = {}
+        self.prefixes: set = set()
+
+    def set(self, path: Tuple, value: Any) -> None:
+        self.values[path] = value
+        self.prefixes.update(path[:length] for length in range(1, len(path)))
+
+    def child(self, path: Tuple, value: Any) -> Any:
+        """Value at path: the override, a view if something below it is overridden, or the base value"""
+        if path in self.values:
+            return self.values[path]
+        if path not in self.prefixes:
+            return value
+        if isinstance(value, Mapping):
+            return ProfileOverlay(value, self, path)
+        return _OverlayList(value, self, path)
+
+
+class ProfileOverlay(Mapping):
+    """
+    Copy-on-write view of a profile for one job.
+    The base profile is shared and never modified; the overlay only stores
+    the paths a job overrides, e.g. ("skills",) or ("experience", 0, "highlights").
+    Reads (including the template's) see the override where one exists and
+    the base everywhere else, so untouched sections are the base objects.
+    """
+
+    def __init__(self, base: Mapping, overrides: Optional[_Overrides] = None, path: Tuple = ()):
+        self._base = base
+        self._overrides = overrides if overrides is not None else _Overrides()
+        self._path = path
+
+    def override(self, path: Tuple, value: Any) -> None:
+        """Replace the value at path (relative to this view) for this job only"""
+        self._overrides.set(self._path + tuple(path), value)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._overrides.child(self._path + (key,), self._base[key])
+
+    def __iter__(self):
+        return iter(self._base)
+
+    def __len__(self) -> int:
+        return len(self._base)
+
+
+class _OverlayList(Sequence):
+    """List inside a ProfileOverlay with an override somewhere below it"""
+
+    def __init__(self, base: Sequence, overrides: _Overrides, path: Tuple):
+        self._base = base
+        self._overrides = overrides
+        self._path = path
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self._base))[index]]
+        if index < 0:
+            index += len(self._base)
+        return self._overrides.child(self._path + (index,), self._base[index])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self._base)))
+
+    def __len__(self) -> int:
+        return len(self._base)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Sequence) and not isinstance(other, str) and list(self) == list(other)
+
+
+# ============================================================================
+# HIGHLIGHT CACHE - AI-customized highlights keyed by content, not by job
+# ============================================================================
+
+def _required_skills_key(analysis: Dict) -> str:
+    """Hash of the job's required skills as sorted canonical skill IDs"""
+    skill_ids = sorted(set(analysis_skill_ids(analysis, "required_skills", DB_PATH)))
+    return hashlib.sha256(json.dumps(skill_ids).encode()).hexdigest()
+
+
+def _highlight_cache_key(highlights: List[str], required_key: str, mode: str) -> str:
+    """Cache key: hash(highlights) + hash(required skills) + model + mode and its prompt version"""
+    highlights_hash = hashlib.sha256(json.dumps(highlights).encode()).hexdigest()
+    return hashlib.sha256(
+        f"{highlights_hash}:{required_key}:{OLLAMA_MODEL}:{mode}:{PROMPT_VERSIONS[mode]}".encode()
+    ).hexdigest()
+
+
+def _ensure_highlight_cache_table(cursor: sqlite3.Cursor) -> None:
+    """Create highlight_cache table if not exists"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS highlight_cache (
+            cache_key TEXT PRIMARY KEY,
+            highlights TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_highlight_cache_last_used ON highlight_cache(last_used)")
+
+
+def _highlight_cache_get(cache_keys: List[str]) -> Dict[str, List[str]]:
+    """Cached highlights for the keys found, marking them recently used"""
+    if not cache_keys:
+        return {}
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    _ensure_highlight_cache_table(cursor)
+
+    found = {}
+    for start in range(0, len(cache_keys), 500):  # Stay below SQLite's parameter limit
+        chunk = cache_keys[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for cache_key, highlights in cursor.execute(
+            f"SELECT cache_key, highlights FROM highlight_cache WHERE cache_key IN ({placeholders})", chunk
+        ).fetchall():
+            found[cache_key] = json.loads(highlights)
+
+    if found:
+        cursor.executemany(
+            "UPDATE highlight_cache SET last_used = ? WHERE cache_key = ?",
+            [(time.time(), cache_key) for cache_key in found]
+        )
+    conn.commit()
+    conn.close()
+    return found
+
+
+def _highlight_cache_put(entries: Dict[str, List[str]]) -> None:
+    """Store customized highlights, then evict least recently used entries over the limits"""
+    if not entries:
+        return
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    _ensure_highlight_cache_table(cursor)
+
+    now = time.time()
+    rows = []
+    for cache_key, highlights in entries.items():
+        payload = json.dumps(highlights, ensure_ascii=False)
+        rows.append((cache_key, payload, len(payload.encode()), now))
+    cursor.executemany("""
+        INSERT OR REPLACE INTO highlight_cache (cache_key, highlights, size, last_used)
+        VALUES (?, ?, ?, ?)
+    """, rows)
+
+    # Keep the most recently used entries within both the count and byte budget
+    cursor.execute("""
+        DELETE FROM highlight_cache WHERE cache_key IN (
+            SELECT cache_key FROM (
+                SELECT cache_key,
+                       ROW_NUMBER() OVER recent AS position,
+                       SUM(size) OVER recent AS total_size
+                FROM highlight_cache
+                WINDOW recent AS (ORDER BY last_used DESC, cache_key)
+            )
+            WHERE position > ? OR total_size > ?
+        )
+    """, (HIGHLIGHT_CACHE_MAX_ENTRIES, HIGHLIGHT_CACHE_MAX_BYTES))
+    conn.commit()
+    conn.close()
+
+
+# ============================================================================
+# RESUME PIPELINE - context, customization, rendering and records
+# ============================================================================
+
+def _load_job_context(job_id: str, profile_id: str) -> Union[Tuple[Dict, Dict, Dict], str]:
+    """(analysis, match score, job) of a job, or the error message for what is missing"""
+    analysis = _get_analysis(job_id)
+    match_score_data = _get_match_score(job_id, profile_id)
+
+    if not analysis:
+        return f"Error: Analysis not found for job {job_id}. Please run analyze_jd first."
+
+    if not match_score_data:
+        return f"Error: Match score not found. Please run match_profile first."
+
+    job = _get_job(job_id)
+    if not job:
+        return f"Error: Job {job_id} not found"
+
+    return analysis, match_score_data, job
+
+
+@dataclass(frozen=True)
+class CustomizationOptions:
+    """How a resume's content is customized"""
+    use_ai: bool
+    mode: str = "per_entry"           # "per_entry" or "single_request"
+    include_projects: bool = False    # AI also reorders project highlights
+
+    @property
+    def version(self) -> str:
+        """Part of the resume version: output only depends on the mode when AI is used"""
+        if not self.use_ai:
+            return "rules"
+        return f"{self.mode}+projects" if self.include_projects else self.mode
+
+
+async def _customize_for_job(profile: Dict, analysis: Dict, match_score: Dict,
+                             options: CustomizationOptions) -> ProfileOverlay:
+    """
+    Customized view of the profile for one job, validated against it.
+    Customization only records overrides, so the loaded profile is shared
+    unmodified across a batch without copying it per job.
+    """
+    if options.use_ai:
+        customized = await _customize_profile_safe(
+            profile, analysis, match_score, options.mode, options.include_projects
+        )
+    else:
+        customized = _customize_profile_no_ai(profile, analysis, match_score)
+
+    # CRITICAL: Validate structure hasn't changed
+    if not _validate_structure(profile, customized):
+        print("WARNING: AI attempted to modify structure - using original profile")
+        customized = ProfileOverlay(profile)
+
+    return customized
+
+
+def _render_resume(customized_profile: Mapping, profile: Dict, profile_hash: str) -> Tuple[Path, str, bool]:
+    """
+    Render the LaTeX template for a customized profile and store it by content hash.
+    Only the job-dependent sections are rendered here; the invariant ones come
+    from the base profile, rendered once per profile version.
+    Returns (file path, content hash, whether the file was written).
+    """
+    template = _get_template_env().get_template(TEMPLATE_NAME)
+    invariant = _invariant_sections(profile, profile_hash)
+    latex_content = _render_latex(template, customized_profile, invariant)
+    return _store_resume(latex_content.encode('utf-8'))
+
+
+def _store_resume(content: bytes) -> Tuple[Path, str, bool]:
+    """
+    Write a resume to the content-addressed store unless an identical one is there.
+    Writes go through a temporary file so a concurrent render of the same
+    content never sees a partial file.
+    """
+    content_hash = hashlib.sha256(content).hexdigest()
+    output_path = OUTPUT_DIR / RESUME_STORE_NAME / f"resume_{content_hash[:16]}.tex"
+    if output_path.exists():
+        return output_path, content_hash, False
+
+    output_path.parent.mkdir(exist_ok=True, parents=True)
+    temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    temp_path.write_bytes(content)
+    os.replace(temp_path, output_path)
+    return output_path, content_hash, True
+
+
+async def _compile_resume(command: List[str], tex_path: Path, force: bool) -> Dict:
+    """
+    Compile one stored resume to a PDF next to it, in its own build directory.
+    The PDF is named after the content hash, so an existing one is up to date.
+    Returns the status, PDF and log paths, and the engine's error on failure.
+    """
+    pdf_path = tex_path.with_suffix(".pdf")
+    log_path = tex_path.with_suffix(".log")
+    if not force and pdf_path.exists():
+        return {"status": "up_to_date", "pdf": str(pdf_path)}
+    if not tex_path.exists():
+        return {"status": "failed", "error": f"{tex_path} not found"}
+
+    build_dir = OUTPUT_DIR / "build" / tex_path.stem
+    build_dir.mkdir(parents=True, exist_ok=True)
+    args = [
+        arg.replace("{tex}", str(tex_path.resolve())).replace("{outdir}", str(build_dir.resolve()))
+        for arg in command
+    ]
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args, cwd=build_dir, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
         try:
-            # Prepare prompt with strict constraints
-            prompt = f"""{PERSONALIZATION_SYSTEM_PROMPT}
+            output, _ = await asyncio.wait_for(process.communicate(), COMPILE_TIMEOUT)
+            error = None if process.returncode == 0 else f"exit code {process.returncode}"
+        except asyncio.TimeoutError:
+            process.kill()
+            output, _ = await process.communicate()
+            error = f"timed out after {COMPILE_TIMEOUT:g}s"
+        log_path.write_bytes(output)
+
+        built_pdf = build_dir / pdf_path.name
+        if error is None and not built_pdf.exists():
+            error = "engine produced no PDF"
+        if error is not None:
+            return {"status": "failed", "error": _tex_error(output, error), "log": str(log_path)}
+
+        os.replace(built_pdf, pdf_path)
+        return {"status": "compiled", "pdf": str(pdf_path), "log": str(log_path)}
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+
+def _tex_error(output: bytes, reason: str) -> str:
+    """Reason for a failed compile with TeX's first error line (lines starting with '!'), if any"""
+    lines = output.decode('utf-8', errors='replace').splitlines()
+    tex_errors = [line for line in lines if line.startswith("!")]
+    return f"{reason}: {tex_errors[0]}" if tex_errors else reason
+
+
+def _file_hash(path: Path) -> str:
+    """sha256 of a file's contents"""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _template_hash() -> str:
+    """sha256 over the template and the section macros it imports"""
+    paths = (TEMPLATE_PATH, TEMPLATE_DIR / SECTIONS_TEMPLATE_NAME)
+    return hashlib.sha256("".join(_file_hash(path) for path in paths if path.exists()).encode()).hexdigest()
+
+
+def _resume_version(profile_hash: str, match_score: Dict, template_hash: str,
+                    options: CustomizationOptions) -> str:
+    """Everything a generated resume depends on: profile, match row stamps, template and mode"""
+    return hashlib.sha256(json.dumps([
+        profile_hash,
+        match_score.get("profile_version"),
+        match_score.get("analysis_version"),
+        template_hash,
+        options.version
+    ]).encode()).hexdigest()[:16]
+
+
+def _claim_profile_id(profile_path: Path, profile: Optional[Dict] = None) -> str:
+    """Stable ID of a profile (see profiles.stable_profile_id), claiming its pre-ID rows"""
+    profile_id = stable_profile_id(str(profile_path), profile)
+    conn = sqlite3.connect(DB_PATH)
+    claim_legacy_rows(conn, str(profile_path), profile_id)
+    conn.commit()
+    conn.close()
+    return profile_id
+
+
+def _ensure_resume_table(cursor: sqlite3.Cursor) -> None:
+    """Create generated_resumes table if not exists"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS generated_resumes (
+            resume_id TEXT PRIMARY KEY,      -- "<profile_id>:<job_id>"
+            profile_id TEXT NOT NULL,
+            job_id TEXT NOT NULL,
+            file TEXT NOT NULL,
+            resume_version TEXT NOT NULL,
+            content_hash TEXT,               -- sha256 of the .tex file; jobs may share one
+            generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(generated_resumes)")}
+    if "content_hash" not in columns:
+        cursor.execute("ALTER TABLE generated_resumes ADD COLUMN content_hash TEXT")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_generated_resumes_profile ON generated_resumes(profile_id)"
+    )
+
+
+def _record_resumes(profile_id: str, resumes: List[Tuple[str, str, str, str]]) -> None:
+    """Upsert (job_id, file, resume_version, content_hash) records of generated resumes"""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    _ensure_resume_table(cursor)
+    cursor.executemany("""
+        INSERT OR REPLACE INTO generated_resumes
+            (resume_id, profile_id, job_id, file, resume_version, content_hash)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        (f"{profile_id}:{job_id}", profile_id, job_id, file, version, content_hash)
+        for job_id, file, version, content_hash in resumes
+    ])
+    conn.commit()
+    conn.close()
 
-Job Requirements:
-{json.dumps(analysis.get("required_skills", []))}
 
-Original Highlights (keep count={len(exp["highlights"])}):
-{json.dumps(exp["highlights"])}
+def _get_resume_records(profile_id: str) -> Dict[str, Tuple[str, str, Optional[str]]]:
+    """job_id -> (file, resume_version, content_hash) of a profile's generated resumes"""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    _ensure_resume_table(cursor)
+    records = {
+        job_id: (file, version, content_hash) for job_id, file, version, content_hash in cursor.execute(
+            "SELECT job_id, file, resume_version, content_hash FROM generated_resumes WHERE profile_id = ?",
+            (profile_id,)
+        )
+    }
+    conn.close()
+    return records
 
-Task: Return JSON array with {len(exp["highlights"])} highlights, reordered to emphasize skills matching job requirements.
-"""
 
-            # Call Ollama with timeout
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    OLLAMA_URL,
-                    json={
-                        "model": "llama3.1:8b",
-                        "prompt": prompt,
-                        "stream": False
-                    }
-                )
+def _get_resume_candidates(profile_id: str, min_score: float, limit: Optional[int]) -> List[Dict]:
+    """Match rows (with job title and company) at or above min_score, best first, not yet applied to"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    # Walks the (profile_id, overall_score DESC, job_id) index of match_scores
+    cursor.execute("""
+        SELECT m.*, j.title, j.company
+        FROM match_scores m
+        CROSS JOIN jobs j ON j.job_id = m.job_id
+        WHERE m.profile_id = ? AND m.overall_score >= ?
+          AND j.status NOT IN ('applied', 'skipped')
+        ORDER BY m.overall_score DESC
+        LIMIT ?
+    """, (profile_id, min_score, -1 if limit is None else limit))
+    rows = cursor.fetchall()
+    conn.close()
 
-            result = response.json()
-            customized_highlights = json.loads(result["response"])
+    candidates = []
+    for row in rows:
+        match = dict(row)
+        match["skills_to_emphasize"] = json.loads(match.get("skills_to_emphasize") or "[]")
+        candidates.append(match)
+    return candidates
 
-            # CRITICAL: Validate same number of highlights
-            if len(customized_highlights) == len(exp["highlights"]):
-                customized["experience"][i]["highlights"] = customized_highlights
-            else:
-                print(f"WARNING: AI changed highlight count ({len(customized_highlights)} vs {len(exp['highlights'])}), using original")
 
-        except Exception as e:
-            print(f"Error customizing highlights for {exp.get('company', 'unknown')}: {e}, using original")
+async def _customize_profile_safe(profile: Dict, analysis: Dict, match_score: Dict,
+                                  mode: str = "per_entry", include_projects: bool = False) -> ProfileOverlay:
+    """
+    Customize profile content using AI with STRICT validation
+    Section-by-section to limit AI scope. In "per_entry" mode every section
+    is its own request (run concurrently, so latency is that of the slowest);
+    in "single_request" mode one structured request covers all sections, so
+    the job requirements are processed once instead of once per section.
+    Either way each section is validated on its own and bounded by AI_DEADLINE;
+    a section that fails, times out or is invalid gets its highlights ranked
+    by rank_highlights, as without AI.
+    """
+    customized = ProfileOverlay(profile)
+
+    # ONLY customize highlights (most impactful): experience, optionally projects
+    sections = _customization_sections(profile, include_projects)
+
+    # Sections customized before for the same required skills come from the cache
+    required_key = _required_skills_key(analysis)
+    cache_keys = [_highlight_cache_key(entry["highlights"], required_key, mode) for _, _, _, entry in sections]
+    results = _highlight_cache_get(cache_keys)
+    missing = [i for i, cache_key in enumerate(cache_keys) if cache_key not in results]
+
+    if missing:
+        async with _ollama_session():
+            client, semaphore = _get_ollama_client()
+
+            # Check if Ollama is available
+            try:
+                await client.get(OLLAMA_TAGS_URL, timeout=5.0)
+            except Exception:
+                print("WARNING: Ollama not available, using non-AI customization")
+                return _customize_profile_no_ai(profile, analysis, match_score)
+
+            print(f"Customizing {len(missing)} of {len(sections)} sections with AI ({mode})...")
+            results.update(await _customize_uncached(
+                client, semaphore, [sections[i] for i in missing], [cache_keys[i] for i in missing], analysis, mode
+            ))
+
+    # Sections the AI could not customize get the deterministic ranking instead
+    job_terms = _job_terms(analysis)
+    for (key, section, i, entry), cache_key in zip(sections, cache_keys):
+        customized_highlights = results.get(cache_key)
+        if customized_highlights is None:
+            customized_highlights = rank_highlights(entry["highlights"], job_terms)
+        customized.override((section, i, "highlights"), customized_highlights)
 
     # Reorder skills (matched skills first) - NO AI needed
-    required_skills = analysis.get("required_skills", [])
-    customized["skills"] = _reorder_skills(profile["skills"], required_skills)
+    customized.override(("skills",), _reorder_skills(profile["skills"], analysis_skill_ids(analysis, "required_skills", DB_PATH)))
 
     return customized
 
 
-def _customize_profile_no_ai(profile: Dict, analysis: Dict, match_score: Dict) -> Dict:
+async def _customize_uncached(client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                              sections: List[Tuple[str, str, int, Dict]], cache_keys: List[str],
+                              analysis: Dict, mode: str) -> Dict[str, Optional[List[str]]]:
+    """
+    AI-customize sections missing from the cache and store the valid results.
+    A key another resume is already requesting is awaited instead of
+    requested again, so concurrent resumes for similar jobs share one call.
+    """
+    inflight = _ollama_state["inflight"]
+    loop = asyncio.get_running_loop()
+
+    owned, owned_keys, waiting = [], [], {}
+    for section, cache_key in zip(sections, cache_keys):
+        if cache_key in inflight:
+            waiting[cache_key] = inflight[cache_key]
+        elif cache_key not in owned_keys:
+            owned.append(section)
+            owned_keys.append(cache_key)
+            inflight[cache_key] = loop.create_future()
+
+    results: Dict[str, Optional[List[str]]] = {}
+    try:
+        if owned:
+            if mode == "single_request":
+                computed = await _customize_sections_at_once(client, semaphore, owned, analysis)
+            else:
+                computed = await _customize_sections_per_entry(client, semaphore, owned, analysis)
+            results.update(zip(owned_keys, computed))
+            _highlight_cache_put({key: value for key, value in results.items() if value is not None})
+    finally:
+        for cache_key in owned_keys:
+            future = inflight.pop(cache_key)
+            if not future.done():
+                future.set_result(results.get(cache_key))
+
+    for cache_key, future in waiting.items():
+        results[cache_key] = await asyncio.shield(future)
+    return results
+
+
+def _customization_sections(profile: Dict, include_projects: bool) -> List[Tuple[str, str, int, Dict]]:
+    """(key, section, index, entry) of every entry whose highlights the AI may reorder"""
+    names = ["experience", "projects"] if include_projects else ["experience"]
+    return [
+        (f"{section}_{i}", section, i, entry)
+        for section in names
+        for i, entry in enumerate(profile.get(section) or [])
+        if entry.get("highlights")
+    ]
+
+
+def _validated_highlights(entry: Dict, customized_highlights: Any) -> Optional[List[str]]:
+    """The AI's highlights for an entry if they keep the original count, else None"""
+    original = entry["highlights"]
+    if not isinstance(customized_highlights, list) or not all(isinstance(h, str) for h in customized_highlights):
+        print(f"WARNING: AI returned no highlight list for {entry.get('company', entry.get('title', 'unknown'))}, ranking highlights instead")
+        return None
+    # CRITICAL: Validate same number of highlights
+    if len(customized_highlights) != len(original):
+        print(f"WARNING: AI changed highlight count ({len(customized_highlights)} vs {len(original)}), ranking highlights instead")
+        return None
+    return customized_highlights
+
+
+async def _customize_sections_per_entry(client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                                        sections: List[Tuple[str, str, int, Dict]],
+                                        analysis: Dict) -> List[Optional[List[str]]]:
+    """One concurrent request per section; sections past the deadline get None and are ranked instead"""
+    tasks = [
+        asyncio.ensure_future(_customize_highlights(client, semaphore, entry, analysis))
+        for _, _, _, entry in sections
+    ]
+    if not tasks:
+        return []
+
+    done, pending = await asyncio.wait(tasks, timeout=AI_DEADLINE)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for (key, _, _, entry), task in zip(sections, tasks):
+        if task.cancelled():
+            print(f"WARNING: AI deadline reached for {entry.get('company', key)}, ranking highlights instead")
+            results.append(None)
+        else:
+            results.append(task.result())
+    return results
+
+
+async def _customize_highlights(client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                                exp: Dict, analysis: Dict) -> Optional[List[str]]:
+    """
+    AI-reordered highlights of one experience entry
+    Returns None on any error or count mismatch; the caller then ranks
+    the original highlights with rank_highlights
+    """
+    try:
+        # Prepare prompt with strict constraints
+        prompt = CUSTOMIZATION_PROMPTS["per_entry"].format(
+            system=PERSONALIZATION_SYSTEM_PROMPT,
+            requirements=json.dumps(analysis.get("required_skills", [])),
+            count=len(exp["highlights"]),
+            highlights=json.dumps(exp["highlights"])
+        )
+
+        # Call Ollama with timeout
+        async with semaphore:
+            response = await client.post(
+                OLLAMA_URL,
+                json={
+                    "model": OLLAMA_MODEL,
+                    "prompt": prompt,
+                    "stream": False
+                },
+                timeout=AI_REQUEST_TIMEOUT
+            )
+
+        result = response.json()
+        return _validated_highlights(exp, json.loads(result["response"]))
+
+    except Exception as e:
+        print(f"Error customizing highlights for {exp.get('company', exp.get('title', 'unknown'))}: {e}, ranking highlights instead")
+
+    return None
+
+
+def _sections_schema(sections: List[Tuple[str, str, int, Dict]]) -> Dict:
+    """JSON schema of the single-request answer: one fixed-length string array per section key"""
+    return {
+        "type": "object",
+        "properties": {
+            key: {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": len(entry["highlights"]),
+                "maxItems": len(entry["highlights"])
+            }
+            for key, _, _, entry in sections
+        },
+        "required": [key for key, _, _, _ in sections],
+        "additionalProperties": False
+    }
+
+
+async def _customize_sections_at_once(client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                                      sections: List[Tuple[str, str, int, Dict]],
+                                      analysis: Dict) -> List[Optional[List[str]]]:
+    """
+    One structured request for all sections, constrained by an indexed JSON
+    schema (Ollama "format"); each section of the answer is validated alone
+    """
+    if not sections:
+        return []
+
+    original = {key: entry["highlights"] for key, _, _, entry in sections}
+    prompt = CUSTOMIZATION_PROMPTS["single_request"].format(
+        system=PERSONALIZATION_SYSTEM_PROMPT,
+        requirements=json.dumps(analysis.get("required_skills", [])),
+        highlights=json.dumps(original, indent=1),
+        keys=json.dumps(list(original))
+    )
+
+    try:
+        async with semaphore:
+            response = await asyncio.wait_for(client.post(
+                OLLAMA_URL,
+                json={
+                    "model": OLLAMA_MODEL,
+                    "prompt": prompt,
+                    "stream": False,
+                    "format": _sections_schema(sections)
+                },
+                timeout=AI_DEADLINE
+            ), timeout=AI_DEADLINE)
+
+        answer = json.loads(response.json()["response"])
+        if not isinstance(answer, dict):
+            raise ValueError("expected a JSON object")
+    except Exception as e:
+        print(f"Error customizing highlights in one request: {e}, ranking highlights instead")
+        return [None] * len(sections)
+
+    return [_validated_highlights(entry, answer.get(key)) for key, _, _, entry in sections]
+
+
+@asynccontextmanager
+async def _ollama_session():
+    """
+    Keep the running loop's shared client open for the block.
+    Sessions nest and overlap (a batch holds one around all its resumes);
+    the last one to exit closes the client, so no connection pool outlives
+    the asyncio.run call that opened it.
+    """
+    loop = asyncio.get_running_loop()
+    if _ollama_state["loop"] is not loop:
+        _ollama_state.update(
+            loop=loop,
+            client=httpx.AsyncClient(
+                timeout=AI_REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=AI_CONCURRENCY, max_keepalive_connections=AI_CONCURRENCY)
+            ),
+            sessions=0,
+            semaphore=asyncio.Semaphore(AI_CONCURRENCY),
+            inflight={}
+        )
+    _ollama_state["sessions"] += 1
+    try:
+        yield
+    finally:
+        _ollama_state["sessions"] -= 1
+        if not _ollama_state["sessions"]:
+            client = _ollama_state["client"]
+            _ollama_state.update(loop=None, client=None, semaphore=None)
+            await client.aclose()
+
+
+def _get_ollama_client() -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    """Shared client and request semaphore of the running event loop's open session"""
+    if _ollama_state["loop"] is not asyncio.get_running_loop():
+        raise RuntimeError("Ollama client requested outside _ollama_session()")
+    return _ollama_state["client"], _ollama_state["semaphore"]
+
+
+def _customize_profile_no_ai(profile: Dict, analysis: Dict, match_score: Dict) -> ProfileOverlay:
     """
     Customize profile WITHOUT AI - safer alternative
-    Uses rule-based skill reordering only
+    Rule-based skill reordering and highlight ranking; nothing is dropped
     """
-    customized = profile.copy()
+    customized = ProfileOverlay(profile)
 
     # Reorder skills to show matched skills first
-    required_skills = analysis.get("required_skills", [])
-    customized["skills"] = _reorder_skills(profile["skills"], required_skills)
+    customized.override(("skills",), _reorder_skills(profile["skills"], analysis_skill_ids(analysis, "required_skills", DB_PATH)))
 
     # Use recommended variant for experience if available
     variant = match_score.get("recommended_variant", "ml_focused")
+    job_terms = _job_terms(analysis)
 
-    # Reorder experience highlights to emphasize variant
-    for i, exp in enumerate(customized.get("experience", [])):
-        # If latex_variants exists, we can use variant-specific description
-        if "latex_variants" in exp and variant in exp["latex_variants"]:
-            # Add variant-optimized bullet point at the beginning
-            variant_text = exp["latex_variants"][variant]
-            # Keep original highlights but emphasize variant first
-            customized["experience"][i]["highlights"] = [variant_text] + exp["highlights"][:2]
+    # Rank experience highlights by overlap with the job, most relevant first
+    for i, exp in enumerate(profile.get("experience", [])):
+        terms = job_terms
+        # The variant-specific description restates existing bullets, so it
+        # steers the ranking instead of being added as another bullet
+        variant_terms = _terms(str(exp.get("latex_variants", {}).get(variant) or ""))
+        if variant_terms:
+            terms = job_terms + [(variant_terms, RANK_VARIANT_WEIGHT)]
+        customized.override(("experience", i, "highlights"), rank_highlights(exp.get("highlights", []), terms))
 
     return customized
 
 
+# ============================================================================
+# HIGHLIGHT RANKING - deterministic, LLM-free ordering by job overlap
+# ============================================================================
+
+# Weight of a fully covered required skill vs. a fully covered ATS keyword
+RANK_REQUIRED_WEIGHT = 2.0
+RANK_KEYWORD_WEIGHT = 1.0
+RANK_VARIANT_WEIGHT = 1.0  # Highlight fully restating the recommended latex_variants text
+
+
+@lru_cache(maxsize=4096)
+def _terms(text: str) -> FrozenSet[str]:
+    """Distinct terms of a highlight or skill (cached: the same bullets recur for every job)"""
+    return frozenset(tokenize(text))
+
+
+def _job_terms(analysis: Dict) -> List[Tuple[FrozenSet[str], float]]:
+    """(terms, weight) of each distinct required skill and ATS keyword of a job"""
+    weighted = {}
+    for key, weight in (("ats_keywords", RANK_KEYWORD_WEIGHT), ("required_skills", RANK_REQUIRED_WEIGHT)):
+        for text in analysis.get(key) or []:
+            terms = _terms(str(text))
+            if terms:
+                weighted[terms] = max(weight, weighted.get(terms, 0.0))
+    return list(weighted.items())
+
+
+def rank_highlights(highlights: List[str], job_terms: List[Tuple[FrozenSet[str], float]]) -> List[str]:
+    """
+    Highlights ordered by how much of the job's skills and keywords they
+    mention: each skill/keyword adds its weight times the share of its
+    terms found in the bullet. Stable, so ties keep the profile's order,
+    and every highlight is kept.
+    """
+    def score(highlight: str) -> float:
+        terms = _terms(highlight)
+        return sum(weight * len(terms & wanted) / len(wanted) for wanted, weight in job_terms)
+
+    return sorted(highlights, key=score, reverse=True)
+
+
 def _validate_structure(original: Dict, customized: Dict) -> bool:
     """
     Validate AI didn't add/remove sections
@@ -238,30 +1363,49 @@ def _validate_structure(original: Dict, customized: Dict) -> bool:
         print(f"ERROR: Education count changed")
         return False
 
-    # Check each experience has same number of highlights (if AI was used)
+    # Check each experience has the same number of highlights
     for i, exp in enumerate(original.get("experience", [])):
         if i < len(customized.get("experience", [])):
             orig_highlights = len(exp.get("highlights", []))
             cust_highlights = len(customized["experience"][i].get("highlights", []))
-            if abs(orig_highlights - cust_highlights) > 1:  # Allow 1 difference for variant
+            if orig_highlights != cust_highlights:
                 print(f"ERROR: Highlight count mismatch at index {i}")
                 return False
 
     return True
 
 
-def _reorder_skills(skills: Dict, required_skills: List[str]) -> Dict:
-    """Reorder skills to show matched skills first"""
+@lru_cache(maxsize=32)
+def _profile_skill_ids(db_path: str, skills_json: str) -> Dict[str, FrozenSet[int]]:
+    """Skill IDs each profile skill covers (itself plus implied), once per profile version"""
+    vocabulary = get_vocabulary(db_path)
+    covered = {}
+    for skill_list in json.loads(skills_json).values():
+        if isinstance(skill_list, list):
+            for skill in skill_list:
+                skill_id = vocabulary.resolve(skill)
+                covered[skill] = vocabulary.implied(skill_id) if skill_id is not None else frozenset()
+    return covered
+
+
+def _reorder_skills(skills: Dict, required_ids: List[int]) -> Dict:
+    """
+    Reorder skills to show matched skills first, comparing the job's stored
+    requirement skill IDs. A skill also matches when it implies a required
+    one (PyTorch => Deep Learning).
+    """
     reordered = {}
-    required_lower = [s.lower().strip() for s in required_skills]
+    covered = _profile_skill_ids(os.path.abspath(DB_PATH), json.dumps(skills, sort_keys=True))
+    required = set(required_ids)
 
     for category, skill_list in skills.items():
         if not isinstance(skill_list, list):
             reordered[category] = skill_list
             continue
 
-        matched = [s for s in skill_list if s.lower().strip() in required_lower]
-        unmatched = [s for s in skill_list if s.lower().strip() not in required_lower]
+        is_match = [not required.isdisjoint(covered[skill]) for skill in skill_list]
+        matched = [s for s, hit in zip(skill_list, is_match) if hit]
+        unmatched = [s for s, hit in zip(skill_list, is_match) if not hit]
         reordered[category] = matched + unmatched
 
     return reordered
@@ -280,6 +1424,28 @@ def _get_analysis(job_id: str) -> Dict:
     if not row:
         return None
 
+    return _parse_analysis(row)
+
+
+def _get_analyses(job_ids: List[str]) -> Dict[str, Dict]:
+    """Get the analyses of many jobs, keyed by job_id"""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    analyses = {}
+    for start in range(0, len(job_ids), 500):  # Stay below SQLite's parameter limit
+        chunk = job_ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for row in cursor.execute(f"SELECT * FROM job_analysis WHERE job_id IN ({placeholders})", chunk):
+            analyses[row["job_id"]] = _parse_analysis(row)
+    conn.close()
+
+    return analyses
+
+
+def _parse_analysis(row: sqlite3.Row) -> Dict:
+    """Analysis row with its JSON skill lists decoded"""
     analysis = dict(row)
     analysis["required_skills"] = json.loads(analysis.get("required_skills", "[]"))
     analysis["nice_to_have_skills"] = json.loads(analysis.get("nice_to_have_skills", "[]"))
@@ -288,13 +1454,13 @@ def _get_analysis(job_id: str) -> Dict:
     return analysis
 
 
-def _get_match_score(job_id: str) -> Dict:
-    """Get match score from database"""
+def _get_match_score(job_id: str, profile_id: str) -> Dict:
+    """Get a profile's match score from database"""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
-    cursor.execute("SELECT * FROM match_scores WHERE job_id = ?", (job_id,))
+    cursor.execute("SELECT * FROM match_scores WHERE profile_id = ? AND job_id = ?", (profile_id, job_id))
     row = cursor.fetchone()
     conn.close()
 
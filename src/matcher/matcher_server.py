@@ -7,12 +7,29 @@ from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, Field, ConfigDict
 import sqlite3
 import json
-from typing import Dict, Any, Set
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, FrozenSet, List, Literal, Optional, Set, Tuple
 from pathlib import Path
+import os
+import sys
+import httpx
+import numpy as np
+
+# Add src to path for shared modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from embeddings import embed_texts, get_vector_store
+from preferences import DEFAULT_PREFERENCES, load_preferences
+from profiles import claim_legacy_rows, stable_profile_id
+from relevance import bm25_scores, index_missing_jobs, tokenize
+from skills import SKILL_IMPLICATIONS_VERSION, analysis_skill_ids, batch_skill_ids, get_vocabulary, jobs_mentioning
 
 mcp = FastMCP("matcher_mcp")
 
 DB_PATH = "./data/databases/jobs.db"
+DEFAULT_PROFILE_PATH = "./data/profiles/profile.json"
 
 
 class MatchProfileInput(BaseModel):
@@ -37,13 +54,13 @@ async def match_profile(params: MatchProfileInput) -> str:
     Returns match score and recommendations
     """
     try:
-        # 1. Load profile
+        # 1. Load profile (compiled index, cached until the file changes)
         profile_path = Path(params.profile_path)
         if not profile_path.exists():
             return f"Error: Profile not found at {params.profile_path}"
 
-        with open(profile_path, 'r', encoding='utf-8') as f:
-            profile = json.load(f)
+        index = _load_profile_index(params.profile_path)
+        config = _load_scoring_config()
 
         # 2. Get job analysis
         analysis = _get_analysis(params.job_id)
@@ -56,32 +73,42 @@ async def match_profile(params: MatchProfileInput) -> str:
             return f"Error: Job {params.job_id} not found"
 
         # 4. Calculate match scores
-        skills_score = _calculate_skills_match(profile, analysis)
-        experience_score = _calculate_experience_match(profile, analysis)
-        domain_score = _calculate_domain_match(profile, analysis)
+        skills_score = _calculate_skills_match(index, analysis)
+        experience_score = _calculate_experience_match(index, analysis, config)
+        domain_score = _calculate_domain_match(index, analysis)
 
-        # 5. Weighted overall score
+        # 5. Weighted overall score (weights from preferences)
+        skills_weight, experience_weight, domain_weight = config.weights
         overall_score = (
-            skills_score * 0.4 +
-            experience_score * 0.3 +
-            domain_score * 0.3
+            skills_score * skills_weight +
+            experience_score * experience_weight +
+            domain_score * domain_weight
         )
 
         # 6. Recommend variant
         variant = _recommend_variant(analysis["role_category"])
 
         # 7. Identify skills to emphasize
-        skills_to_emphasize = _identify_skills_to_emphasize(profile, analysis)
+        skills_to_emphasize = _identify_skills_to_emphasize(index, analysis)
 
-        # 8. Store match score
-        _store_match_score(params.job_id, {
+        # 8. Calibrated outcome probability and store match score
+        scores = {
+            "analysis_version": _analysis_version(analysis),
             "overall_score": overall_score,
             "skills_score": skills_score,
             "experience_score": experience_score,
             "domain_score": domain_score,
             "recommended_variant": variant,
             "skills_to_emphasize": skills_to_emphasize
-        })
+        }
+        # BM25 and embedding similarity of the description to the profile text
+        # (reported, not weighted; None below the match threshold)
+        _add_text_scores(index, {params.job_id: scores}, config)
+        _add_outcome_probabilities(index, {params.job_id: scores})
+        _store_match_score(index, config, params.job_id, scores)
+        relevance_score = scores["relevance_score"]
+        semantic_score = scores["semantic_score"]
+        outcome_probability = scores["outcome_probability"]
 
         # 9. Format response
         result = {
@@ -94,8 +121,11 @@ async def match_profile(params: MatchProfileInput) -> str:
             "breakdown": {
                 "skills": round(skills_score, 2),
                 "experience": round(experience_score, 2),
-                "domain": round(domain_score, 2)
+                "domain": round(domain_score, 2),
+                "relevance": None if relevance_score is None else round(relevance_score, 2),
+                "semantic": None if semantic_score is None else round(semantic_score, 2)
             },
+            "outcome_probability": None if outcome_probability is None else round(outcome_probability, 3),
             "recommendation": _get_recommendation(overall_score)
         }
 
@@ -105,49 +135,550 @@ async def match_profile(params: MatchProfileInput) -> str:
         return f"Error matching profile: {str(e)}"
 
 
-def _calculate_skills_match(profile: Dict, analysis: Dict) -> float:
-    """Calculate skills overlap percentage"""
-    # Get all user skills
-    user_skills = set()
-    for category in profile.get("skills", {}).values():
-        if isinstance(category, list):
-            user_skills.update([s.lower().strip() for s in category])
+class MatchAllInput(BaseModel):
+    """Input for matching the profile against every analyzed job"""
+    model_config = ConfigDict(extra='forbid')
+    profile_path: str = Field(default="./data/profiles/profile.json", description="Path to profile")
+    limit: int = Field(default=20, description="Number of top matches to return")
 
-    # Get required skills from analysis
-    required = set([s.lower().strip() for s in analysis.get("required_skills", [])])
 
-    # Calculate overlap
-    if not required:
-        return 100.0
+@mcp.tool(
+    name="match_all",
+    annotations={
+        "title": "Match Profile to All Analyzed Jobs",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def match_all(params: MatchAllInput) -> str:
+    """
+    Score the profile against every analyzed job in one vectorized pass
+    and store all match scores in a single transaction
+    """
+    try:
+        started = time.perf_counter()
 
-    overlap = user_skills.intersection(required)
-    match_percentage = (len(overlap) / len(required)) * 100
+        # 1. Load profile once
+        profile_path = Path(params.profile_path)
+        if not profile_path.exists():
+            return f"Error: Profile not found at {params.profile_path}"
 
-    # Bonus points for nice-to-have skills
-    nice_to_have = set([s.lower().strip() for s in analysis.get("nice_to_have_skills", [])])
-    bonus_overlap = user_skills.intersection(nice_to_have)
+        index = _load_profile_index(params.profile_path)
+        config = _load_scoring_config()
 
-    if nice_to_have:
-        bonus = (len(bonus_overlap) / len(nice_to_have)) * 10  # Up to 10% bonus
-        match_percentage = min(100, match_percentage + bonus)
+        # 2. Load every analysis in one query
+        analyses = _get_all_analyses()
+        if not analyses:
+            return "Error: No analyzed jobs found. Please run analyze_jd first."
 
-    return match_percentage
+        # 3. Score all jobs
+        scores_by_job = _batch_match_scores(index, analyses, config)
+        _add_text_scores(index, scores_by_job, config)
+        _add_outcome_probabilities(index, scores_by_job)
 
+        # 4. Bulk upsert
+        _store_match_scores_bulk(index, config, scores_by_job)
 
-def _calculate_experience_match(profile: Dict, analysis: Dict) -> float:
-    """Match experience level"""
-    level_map = {
-        "entry": 0,
-        "junior": 0,
-        "mid": 1,
-        "mid-level": 1,
-        "senior": 2,
-        "lead": 3,
-        "staff": 3,
-        "principal": 4
+        top = sorted(scores_by_job.items(), key=lambda item: item[1]["overall_score"], reverse=True)
+
+        return json.dumps({
+            "matched": len(scores_by_job),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "top_matches": [
+                {
+                    "job_id": job_id,
+                    "overall_score": round(scores["overall_score"], 2),
+                    "relevance_score": None if scores["relevance_score"] is None
+                    else round(scores["relevance_score"], 2),
+                    "semantic_score": None if scores["semantic_score"] is None
+                    else round(scores["semantic_score"], 2),
+                    "outcome_probability": None if scores["outcome_probability"] is None
+                    else round(scores["outcome_probability"], 3),
+                    "recommended_variant": scores["recommended_variant"]
+                }
+                for job_id, scores in top[:params.limit]
+            ]
+        }, indent=2, ensure_ascii=False)
+
+    except Exception as e:
+        return f"Error matching all jobs: {str(e)}"
+
+
+class MatchProfilesInput(BaseModel):
+    """Input for matching several profiles against every analyzed job"""
+    model_config = ConfigDict(extra='forbid')
+    profile_paths: List[str] = Field(..., min_length=1, description="Paths to the profiles to match")
+    limit: int = Field(default=5, description="Number of top matches to return per profile")
+
+
+@mcp.tool(
+    name="match_profiles",
+    annotations={
+        "title": "Match Several Profiles to All Analyzed Jobs",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def match_profiles(params: MatchProfilesInput) -> str:
+    """
+    Score every profile against every analyzed job as one profiles x jobs
+    matrix and store all match scores in a single transaction
+    """
+    try:
+        started = time.perf_counter()
+
+        # 1. Load profiles once
+        missing = [path for path in params.profile_paths if not Path(path).exists()]
+        if missing:
+            return f"Error: Profile not found at {', '.join(missing)}"
+
+        indexes = [_load_profile_index(path) for path in params.profile_paths]
+        profile_ids = [index.profile_id for index in indexes]
+        duplicates = sorted({profile_id for profile_id in profile_ids if profile_ids.count(profile_id) > 1})
+        if duplicates:
+            return (f"Error: Profiles share the profile_id {', '.join(duplicates)}, which keys the stored "
+                    "matches. Set distinct \"profile_id\" fields in these profiles.")
+        config = _load_scoring_config()
+
+        # 2. Load every analysis in one query
+        analyses = _get_all_analyses()
+        if not analyses:
+            return "Error: No analyzed jobs found. Please run analyze_jd first."
+
+        # 3. Score the whole matrix
+        results = _batch_match_matrix(indexes, analyses, config)
+        for index, scores_by_job in zip(indexes, results):
+            _add_text_scores(index, scores_by_job, config)
+            _add_outcome_probabilities(index, scores_by_job)
+
+        # 4. Bulk upsert
+        _store_match_matrix(config, list(zip(indexes, results)))
+
+        profiles = {}
+        for index, scores_by_job in zip(indexes, results):
+            top = sorted(scores_by_job.items(), key=lambda item: item[1]["overall_score"], reverse=True)
+            profiles[index.profile_id] = [
+                {
+                    "job_id": job_id,
+                    "overall_score": round(scores["overall_score"], 2),
+                    "recommended_variant": scores["recommended_variant"]
+                }
+                for job_id, scores in top[:params.limit]
+            ]
+
+        return json.dumps({
+            "profiles": len(indexes),
+            "jobs": len(analyses),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "top_matches": profiles
+        }, indent=2, ensure_ascii=False)
+
+    except Exception as e:
+        return f"Error matching profiles: {str(e)}"
+
+
+class RematchStaleInput(BaseModel):
+    """Input for recomputing stale match scores"""
+    model_config = ConfigDict(extra='forbid')
+    profile_path: str = Field(default="./data/profiles/profile.json", description="Path to profile")
+
+
+@mcp.tool(
+    name="rematch_stale",
+    annotations={
+        "title": "Recompute Stale Match Scores",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def rematch_stale(params: RematchStaleInput) -> str:
+    """
+    Recompute only the match scores made stale by a profile or analysis change.
+    After a skill-only profile edit just the jobs mentioning a changed skill
+    are rescored; the remaining rows are re-stamped with the new version.
+    """
+    try:
+        started = time.perf_counter()
+
+        profile_path = Path(params.profile_path)
+        if not profile_path.exists():
+            return f"Error: Profile not found at {params.profile_path}"
+
+        index = _load_profile_index(params.profile_path)
+        config = _load_scoring_config()
+        version, signature = _scoring_version(index, config)
+
+        analyses = {analysis["job_id"]: analysis for analysis in _get_all_analyses()}
+        versions = {job_id: _analysis_version(analysis) for job_id, analysis in analyses.items()}
+
+        conn = sqlite3.connect(DB_PATH)
+        cursor = conn.cursor()
+        _ensure_match_table(cursor)
+
+        stamps = {
+            job_id: (profile_version, analysis_version) for job_id, profile_version, analysis_version in
+            cursor.execute(
+                "SELECT job_id, profile_version, analysis_version FROM match_scores WHERE profile_id = ?",
+                (index.profile_id,)
+            )
+        }
+        known_profiles = {
+            version: (signature, dict(json.loads(skill_names))) for version, signature, skill_names in
+            cursor.execute("SELECT version, signature, skill_names FROM profile_versions")
+        }
+
+        # New or re-analyzed jobs always rescore; the rest group by old profile version
+        rescore, restamp = set(), set()
+        by_profile_version = {}
+        for job_id in analyses:
+            stamp = stamps.get(job_id)
+            if stamp is None or stamp[1] != versions[job_id]:
+                rescore.add(job_id)
+            elif stamp[0] != version:
+                by_profile_version.setdefault(stamp[0], []).append(job_id)
+
+        for old_version, job_ids in by_profile_version.items():
+            old = known_profiles.get(old_version)
+            if old is None or old[0] != signature:
+                rescore.update(job_ids)  # Unknown version or a non-skill/config change
+                continue
+
+            old_names = old[1]
+            changed = {
+                skill_id for skill_id in old_names.keys() | index.skill_names.keys()
+                if old_names.get(skill_id) != index.skill_names.get(skill_id)
+            }
+            affected = jobs_mentioning(
+                conn, changed, {job_id: (versions[job_id], analyses[job_id]) for job_id in job_ids}, DB_PATH
+            )
+            rescore.update(affected)
+            restamp.update(set(job_ids) - affected)
+
+        # Unaffected scores are still correct - only the version stamp moves
+        _record_profile_version(cursor, index, config)
+        cursor.executemany(
+            "UPDATE match_scores SET profile_version = ? WHERE profile_id = ? AND job_id = ?",
+            [(version, index.profile_id, job_id) for job_id in restamp]
+        )
+        conn.commit()
+        conn.close()
+
+        if rescore:
+            scores_by_job = _batch_match_scores(index, [analyses[job_id] for job_id in rescore], config)
+            _add_text_scores(index, scores_by_job, config)
+            _add_outcome_probabilities(index, scores_by_job)
+            _store_match_scores_bulk(index, config, scores_by_job)
+
+        return json.dumps({
+            "profile_version": version[:12],
+            "analyzed_jobs": len(analyses),
+            "rescored": len(rescore),
+            "restamped": len(restamp),
+            "elapsed_seconds": round(time.perf_counter() - started, 3)
+        }, indent=2)
+
+    except Exception as e:
+        return f"Error rematching stale jobs: {str(e)}"
+
+
+class SimulateWeightsInput(BaseModel):
+    """Input for what-if evaluation of scoring weights"""
+    model_config = ConfigDict(extra='forbid')
+    profile_path: str = Field(default="./data/profiles/profile.json", description="Profile whose stored matches to re-rank")
+    weights: List[List[float]] = Field(
+        ..., min_length=1,
+        description="Candidate [skills, experience, domain] weight vectors; each is scaled to sum to 1"
+    )
+    threshold: Optional[float] = Field(
+        default=None, description="Pass threshold (default: preferences match_threshold)"
+    )
+    top_n: int = Field(default=10, ge=1, description="Length of the ranking returned per weight vector")
+    outcome_statuses: List[str] = Field(
+        default_factory=lambda: ["interview", "offer"],
+        description="Application statuses counted as a good outcome"
+    )
+
+
+@mcp.tool(
+    name="simulate_weights",
+    annotations={
+        "title": "Simulate Scoring Weights",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
     }
+)
+async def simulate_weights(params: SimulateWeightsInput) -> str:
+    """
+    Re-rank stored matches under many weight vectors at once.
+    Stored sub-scores form an N x 3 matrix S and the candidates a K x 3
+    matrix W, so every overall score is one product S @ W.T.
+    """
+    try:
+        started = time.perf_counter()
+        weights = np.array([_normalize_weights(w) for w in params.weights])
+        threshold = params.threshold
+        if threshold is None:
+            threshold = float(load_preferences().get("match_threshold", 70.0))
+
+        conn = _connect_read_only()
+        cursor = conn.cursor()
+        rows = []
+        if _has_table(cursor, "match_scores"):
+            rows = cursor.execute(
+                "SELECT job_id, skills_score, experience_score, domain_score FROM match_scores WHERE profile_id = ?",
+                (stable_profile_id(params.profile_path),)
+            ).fetchall()
+
+        good = set()
+        if _has_table(cursor, "applications") and params.outcome_statuses:
+            placeholders = ",".join("?" * len(params.outcome_statuses))
+            good = {row[0] for row in cursor.execute(
+                f"SELECT job_id FROM applications WHERE status IN ({placeholders})",
+                params.outcome_statuses
+            )}
+        conn.close()
+
+        if not rows:
+            return "Error: No match scores found. Please run match_all first."
+
+        job_ids = [row[0] for row in rows]
+        sub_scores = np.array([row[1:] for row in rows], dtype=np.float64)  # N x 3
+        overall = sub_scores @ weights.T                                   # N x K
+
+        passing = overall >= threshold
+        is_good = np.array([job_id in good for job_id in job_ids])
+        top_n = min(params.top_n, len(job_ids))
+        top = np.argpartition(-overall, top_n - 1, axis=0)[:top_n]        # top_n x K
+
+        results = []
+        for k in range(len(weights)):
+            ranking = top[np.argsort(-overall[top[:, k], k], kind="stable"), k]
+            results.append({
+                "weights": [round(w, 4) for w in weights[k]],
+                "passing": int(passing[:, k].sum()),
+                "good_outcomes_passing": int((passing[:, k] & is_good).sum()),
+                "good_outcomes_in_top": int(is_good[ranking].sum()),
+                "ranking": [
+                    {"job_id": job_ids[i], "overall_score": round(float(overall[i, k]), 2)}
+                    for i in ranking
+                ]
+            })
+
+        return json.dumps({
+            "jobs": len(job_ids),
+            "threshold": threshold,
+            "good_outcomes": int(is_good.sum()),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "simulations": results
+        }, indent=2)
+
+    except Exception as e:
+        return f"Error simulating weights: {str(e)}"
+
+
+def _add_text_scores(index: "ProfileIndex", scores_by_job: Dict[str, Dict], config: "ScoringConfig") -> None:
+    """
+    Attach BM25 relevance and embedding similarity to the scores passing the
+    match threshold. Text scoring is the expensive part of a full rematch,
+    so jobs the vectorized pass already ruled out keep None for both.
+    """
+    passing = [job_id for job_id, scores in scores_by_job.items() if scores["overall_score"] >= config.threshold]
+    relevance = _relevance_scores(index, passing) if passing else {}
+    semantic = _semantic_scores(index, passing) if passing else {}
+    for job_id, scores in scores_by_job.items():
+        scores["relevance_score"] = relevance.get(job_id)
+        scores["semantic_score"] = semantic.get(job_id)  # None: below threshold or no embedding available
+
+
+def _batch_match_scores(index: "ProfileIndex", analyses: List[Dict],
+                        config: "ScoringConfig") -> Dict[str, Dict]:
+    """Compute match scores of one profile against many jobs at once"""
+    return _batch_match_matrix([index], analyses, config)[0]
+
+
+def _batch_match_matrix(indexes: List["ProfileIndex"], analyses: List[Dict],
+                        config: "ScoringConfig") -> List[Dict[str, Dict]]:
+    """
+    Compute the profiles x jobs match score matrix in one pass.
+    The skill IDs stored with each analysis are gathered once into sparse
+    (COO) job x skill lists, and the skill overlaps of every (profile, job)
+    pair come from one bincount per profile.
+    """
+    n_profiles, n_jobs = len(indexes), len(analyses)
+    required_ids = batch_skill_ids(analyses, "required_skills", DB_PATH)  # Unique per job
+
+    def gather(skill_ids: List[List[int]]):
+        lengths = np.fromiter((len(ids) for ids in skill_ids), dtype=np.int64, count=n_jobs)
+        ids = np.fromiter((skill_id for ids in skill_ids for skill_id in ids), dtype=np.int64, count=lengths.sum())
+        return np.repeat(np.arange(n_jobs), lengths), ids
+
+    req_rows, req_ids = gather(required_ids)
+    nice_rows, nice_ids = gather(batch_skill_ids(analyses, "nice_to_have_skills", DB_PATH))
+
+    # Distinct skill ID -> column (transient IDs of unknown strings are negative)
+    skill_ids, cols = np.unique(np.concatenate([req_ids, nice_ids]), return_inverse=True)
+    req_cols, nice_cols = cols[:len(req_ids)], cols[len(req_ids):]
+    owned = np.array([np.isin(skill_ids, list(index.expanded_skills)) for index in indexes], dtype=np.float64)
+    owned = owned.reshape(n_profiles, len(skill_ids))
+
+    def overlaps(rows: np.ndarray, cols: np.ndarray):
+        """(total, covered) required skill counts, both profiles x jobs"""
+        total = np.bincount(rows, minlength=n_jobs).astype(np.float64)
+        covered = np.array([np.bincount(rows, weights=owned[k, cols], minlength=n_jobs) for k in range(n_profiles)])
+        return np.tile(total, (n_profiles, 1)), covered.reshape(n_profiles, n_jobs)
+
+    req_total, req_overlap = overlaps(req_rows, req_cols)
+    nice_total, nice_overlap = overlaps(nice_rows, nice_cols)
+
+    # Same rules as _calculate_skills_match: no requirements = 100,
+    # nice-to-have overlap adds up to 10 bonus points
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skills = np.where(req_total > 0, req_overlap / req_total * 100, 100.0)
+        bonus = np.where(nice_total > 0, nice_overlap / nice_total * 10, 0.0)
+    skills = np.where(req_total > 0, np.minimum(100.0, skills + bonus), skills)
+
+    # Experience/domain/variant depend only on a few distinct labels -
+    # score each label once per profile and gather
+    levels, level_idx = np.unique(
+        [analysis.get("experience_level", "Mid") for analysis in analyses], return_inverse=True
+    )
+    categories, category_idx = np.unique(
+        [analysis.get("role_category", "") for analysis in analyses], return_inverse=True
+    )
+    experience = np.array([
+        [_calculate_experience_match(index, {"experience_level": level}, config) for level in levels]
+        for index in indexes
+    ]).reshape(n_profiles, len(levels))[:, level_idx.ravel()]
+    domain = np.array([
+        [_calculate_domain_match(index, {"role_category": category}) for category in categories]
+        for index in indexes
+    ]).reshape(n_profiles, len(categories))[:, category_idx.ravel()]
+    variant_by_category = [_recommend_variant(category) for category in categories]
+
+    skills_weight, experience_weight, domain_weight = config.weights
+    overall = skills * skills_weight + experience * experience_weight + domain * domain_weight
+
+    analysis_versions = [_analysis_version(analysis) for analysis in analyses]
+    variants = [variant_by_category[i] for i in category_idx.ravel()]
+
+    results = []
+    for k, index in enumerate(indexes):
+        scores_by_job = {}
+        for i, analysis in enumerate(analyses):
+            # Profile skill covering each required skill, in job order
+            emphasize = []
+            for skill_id in required_ids[i]:
+                name = index.skill_names.get(skill_id)
+                if name is not None and name not in emphasize:
+                    emphasize.append(name)
+
+            scores_by_job[analysis["job_id"]] = {
+                "analysis_version": analysis_versions[i],
+                "overall_score": float(overall[k, i]),
+                "skills_score": float(skills[k, i]),
+                "experience_score": float(experience[k, i]),
+                "domain_score": float(domain[k, i]),
+                "recommended_variant": variants[i],
+                "skills_to_emphasize": emphasize
+            }
+        results.append(scores_by_job)
+
+    return results
+
+
+# ============================================================================
+# PROFILE INDEX - derived once per profile version
+# ============================================================================
+
+ML_TERMS = ["machine learning", "ml", "tensorflow", "pytorch", "ai"]
+AUTOMOTIVE_TERMS = ["automotive", "bosch", "car", "vehicle"]
+BACKEND_TERMS = ["backend", "api", "fastapi", "flask", "django"]
+
+
+@dataclass(frozen=True)
+class ProfileIndex:
+    """Precompiled, read-only view of one profile version used for matching"""
+    path: str
+    profile_id: str                   # Explicit "profile_id" field, else the resolved path
+    version: str                      # sha256 of the profile file contents
+    signature: str                    # sha256 of every non-skill input to scoring
+    profile: Dict[str, Any]
+    skills: FrozenSet[int]            # Canonical skill IDs listed in the profile
+    expanded_skills: FrozenSet[int]   # skills plus everything they imply
+    skill_names: Dict[int, str]       # Expanded skill ID -> profile skill to emphasize
+    text: str                         # Highlights, technologies and projects
+    query_terms: Tuple[str, ...]      # BM25 query terms of text
+    has_ml: bool
+    has_automotive: bool
+    has_backend: bool
+    years_of_experience: float
+    experience_level: int             # 0=Entry, 1=Mid, 2=Senior, 3=Lead/Staff
+
+
+# (resolved path, database) -> (mtime_ns, size, ProfileIndex)
+_profile_index_cache: Dict[tuple, tuple] = {}
+
+
+def _claim_profile_rows(profile_path: str, key: str) -> None:
+    """Move the profile's rows from before stable profile IDs onto its ID"""
+    conn = sqlite3.connect(DB_PATH)
+    claim_legacy_rows(conn, profile_path, key)
+    conn.commit()
+    conn.close()
+
+
+def _build_profile_index(path: str, version: str, profile: Dict) -> ProfileIndex:
+    """Derive skill sets, domain flags and experience level from a profile"""
+    # All user skills as canonical IDs, preserving original casing for
+    # skills_to_emphasize (first spelling wins when synonyms are listed)
+    vocabulary = get_vocabulary(DB_PATH)
+    skill_names = {}
+    for skills_list in profile.get("skills", {}).values():
+        if isinstance(skills_list, list):
+            for skill in skills_list:
+                skill_id = vocabulary.resolve(skill)
+                if skill_id is not None:
+                    skill_names.setdefault(skill_id, skill)
+    skills = frozenset(skill_names)
+
+    # Implied skills (e.g. PyTorch => Deep Learning) credit the profile
+    # skill that implies them; explicit profile skills take precedence
+    for skill_id in list(skill_names):
+        for implied_id in vocabulary.implied(skill_id):
+            skill_names.setdefault(implied_id, skill_names[skill_id])
+
+    # Domain experience from highlights and technologies
+    has_ml = has_automotive = has_backend = False
+    profile_text = []
+    for exp in profile.get("experience", []):
+        highlights = " ".join(exp.get("highlights", [])).lower()
+        techs = " ".join(exp.get("technologies", [])).lower()
+        profile_text.extend([highlights, techs])
 
-    # Calculate user's experience level from years
+        if any(term in highlights or term in techs for term in ML_TERMS):
+            has_ml = True
+        if any(term in highlights or term in techs for term in AUTOMOTIVE_TERMS):
+            has_automotive = True
+        if any(term in highlights or term in techs for term in BACKEND_TERMS):
+            has_backend = True
+
+    for project in profile.get("projects", []):
+        profile_text.append(project.get("title") or project.get("name") or "")
+        profile_text.append(project.get("description") or "")
+        profile_text.extend(project.get("highlights", []))
+        profile_text.extend(project.get("technologies", []))
+    profile_text = " ".join(profile_text)
+    query_terms = tuple(sorted(set(tokenize(profile_text))))
+
+    # User's experience level from years
     years_exp = float(profile.get("metadata", {}).get("years_of_experience", "3.5"))
     if years_exp < 2:
         user_level = 0  # Entry
@@ -158,62 +689,259 @@ def _calculate_experience_match(profile: Dict, analysis: Dict) -> float:
     else:
         user_level = 3  # Lead/Staff
 
-    # Get required level
-    required_level_str = analysis.get("experience_level", "Mid").lower()
-    required_level = level_map.get(required_level_str, 1)
+    # A profile edit that leaves this unchanged only affects jobs mentioning
+    # the changed skills (see rematch_stale)
+    signature = hashlib.sha256(json.dumps(
+        [has_ml, has_automotive, has_backend, user_level, profile_text]
+    ).encode()).hexdigest()
+
+    return ProfileIndex(
+        path=path,
+        profile_id=stable_profile_id(path, profile),
+        version=version,
+        signature=signature,
+        profile=profile,
+        skills=skills,
+        expanded_skills=frozenset(skill_names),
+        skill_names=skill_names,
+        text=profile_text,
+        query_terms=query_terms,
+        has_ml=has_ml,
+        has_automotive=has_automotive,
+        has_backend=has_backend,
+        years_of_experience=years_exp,
+        experience_level=user_level
+    )
+
+
+def _load_profile_index(profile_path: str) -> ProfileIndex:
+    """
+    Return the compiled index for a profile file.
+    Cached in-process; rebuilt only when the file's mtime/size changes
+    and its content hash differs from the cached version.
+    """
+    path = str(Path(profile_path).resolve())
+    stat = Path(path).stat()
+    key = (path, os.path.abspath(DB_PATH))  # Skill IDs are per database
 
-    # Calculate score
-    # Perfect match = 100, one level off = 80, two levels = 60, etc.
-    diff = abs(user_level - required_level)
+    cached = _profile_index_cache.get(key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
 
-    if diff == 0:
-        return 100.0
-    elif diff == 1:
-        return 80.0
-    elif diff == 2:
-        return 60.0
+    with open(path, 'rb') as f:
+        raw = f.read()
+    version = hashlib.sha256(raw).hexdigest()
+
+    if cached and cached[2].version == version:
+        index = cached[2]  # Touched but unchanged
     else:
-        return 40.0
+        index = _build_profile_index(path, version, json.loads(raw.decode('utf-8')))
+        _claim_profile_rows(path, index.profile_id)
+
+    _profile_index_cache[key] = (stat.st_mtime_ns, stat.st_size, index)
+    return index
+
+
+# ============================================================================
+# SCORING CONFIG - weights and experience ladder from preferences
+# ============================================================================
+
+@dataclass(frozen=True)
+class ScoringConfig:
+    """Scoring weights, experience-level ladder and match threshold read from preferences"""
+    weights: Tuple[float, float, float]   # skills, experience, domain (sum to 1)
+    level_map: Dict[str, int]             # Job experience_level label -> level
+    level_scores: Tuple[float, ...]       # Score by level gap; last entry for larger gaps
+    threshold: float                      # Overall score from which text scores are computed
+    version: str                          # Hash of the above, part of match row stamps
+
+
+def _normalize_weights(weights) -> Tuple[float, float, float]:
+    """Validate (skills, experience, domain) weights and scale them to sum to 1"""
+    if isinstance(weights, dict):
+        weights = [weights.get(key, 0.0) for key in ("skills", "experience", "domain")]
+    weights = [float(w) for w in weights]
+    if len(weights) != 3 or any(w < 0 for w in weights) or sum(weights) <= 0:
+        raise ValueError(f"Weights must be three non-negative numbers (skills, experience, domain), got {weights}")
+    total = sum(weights)
+    return tuple(w / total for w in weights)
+
+
+def _load_scoring_config() -> ScoringConfig:
+    """Scoring config from preferences, falling back to the defaults"""
+    prefs = load_preferences()
+    weights = _normalize_weights(prefs.get("match_weights", DEFAULT_PREFERENCES["match_weights"]))
+    level_map = {
+        str(label).lower(): int(level)
+        for label, level in prefs.get("experience_levels", DEFAULT_PREFERENCES["experience_levels"]).items()
+    }
+    level_scores = tuple(
+        float(score) for score in
+        prefs.get("experience_level_scores", DEFAULT_PREFERENCES["experience_level_scores"])
+    ) or (100.0,)
+    threshold = float(prefs.get("match_threshold", DEFAULT_PREFERENCES["match_threshold"]))
 
+    version = hashlib.sha256(json.dumps(
+        [weights, sorted(level_map.items()), level_scores, threshold]
+    ).encode()).hexdigest()[:16]
+    return ScoringConfig(weights, level_map, level_scores, threshold, version)
 
-def _calculate_domain_match(profile: Dict, analysis: Dict) -> float:
-    """Calculate domain expertise match"""
-    role_category = analysis.get("role_category", "").lower()
 
-    # Extract user's domain experience from profile
-    has_ml = False
-    has_automotive = False
-    has_backend = False
+def _scoring_version(index: ProfileIndex, config: ScoringConfig) -> Tuple[str, str]:
+    """
+    (version, signature) stamped on match rows: the profile's combined with
+    the config's. The skill implications only enter the version, so a change
+    to them rescores just the jobs mentioning a skill whose coverage moved.
+    """
+    return (
+        hashlib.sha256(f"{index.version}:{config.version}:{SKILL_IMPLICATIONS_VERSION}".encode()).hexdigest(),
+        hashlib.sha256(f"{index.signature}:{config.version}".encode()).hexdigest()
+    )
 
-    # Check from experience
-    for exp in profile.get("experience", []):
-        highlights = " ".join(exp.get("highlights", [])).lower()
-        techs = " ".join(exp.get("technologies", [])).lower()
 
-        if any(term in highlights or term in techs for term in ["machine learning", "ml", "tensorflow", "pytorch", "ai"]):
-            has_ml = True
-        if any(term in highlights or term in techs for term in ["automotive", "bosch", "car", "vehicle"]):
-            has_automotive = True
-        if any(term in highlights or term in techs for term in ["backend", "api", "fastapi", "flask", "django"]):
-            has_backend = True
+# ============================================================================
+# CALIBRATION - sub-scores -> probability of a good application outcome
+# ============================================================================
+
+# Sub-scores the logistic model reads, each scaled to 0-1
+CALIBRATION_FEATURES = ("skills_score", "experience_score", "domain_score", "relevance_score", "semantic_score")
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35.0, 35.0)))
+
+
+def _fit_logistic(X: np.ndarray, y: np.ndarray, l2: float = 1.0,
+                  iterations: int = 50) -> Tuple[np.ndarray, float]:
+    """
+    L2-regularized logistic regression by Newton's method (IRLS).
+    The intercept is not penalized. Returns (coefficients, intercept).
+    """
+    n, d = X.shape
+    design = np.hstack([np.ones((n, 1)), X])
+    penalty = np.full(d + 1, float(l2))
+    penalty[0] = 0.0
+    beta = np.zeros(d + 1)
+
+    for _ in range(iterations):
+        p = _sigmoid(design @ beta)
+        gradient = design.T @ (p - y) + penalty * beta
+        hessian = (design * (p * (1 - p))[:, None]).T @ design + np.diag(penalty + 1e-9)
+        step = np.linalg.solve(hessian, gradient)
+        beta -= step
+        if np.max(np.abs(step)) < 1e-8:
+            break
+
+    return beta[1:], float(beta[0])
+
+
+def _feature_matrix(rows: List[Dict]) -> np.ndarray:
+    """Calibration features of score rows (missing sub-scores count as 0)"""
+    return np.array([
+        [(row.get(feature) or 0.0) / 100.0 for feature in CALIBRATION_FEATURES]
+        for row in rows
+    ], dtype=np.float64).reshape(len(rows), len(CALIBRATION_FEATURES))
+
+
+def _load_calibration(profile_id: str) -> Optional[Tuple[np.ndarray, float]]:
+    """Stored (coefficients, intercept) of a profile, if calibrated with the current features"""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    _ensure_match_table(cursor)
+    row = cursor.execute(
+        "SELECT features, coefficients, intercept FROM score_calibration WHERE profile_id = ?",
+        (profile_id,)
+    ).fetchone()
+    conn.close()
+
+    if not row or tuple(json.loads(row[0])) != CALIBRATION_FEATURES:
+        return None
+    return np.array(json.loads(row[1]), dtype=np.float64), float(row[2])
+
+
+def _add_outcome_probabilities(index: ProfileIndex, scores_by_job: Dict[str, Dict]) -> None:
+    """Attach the calibrated outcome probability (None until calibrate_scores has run)"""
+    calibration = _load_calibration(index.profile_id)
+    if calibration is None:
+        for scores in scores_by_job.values():
+            scores["outcome_probability"] = None
+        return
+
+    coefficients, intercept = calibration
+    probabilities = _sigmoid(_feature_matrix(list(scores_by_job.values())) @ coefficients + intercept)
+    for scores, probability in zip(scores_by_job.values(), probabilities):
+        scores["outcome_probability"] = float(probability)
+
+
+def _analysis_version(analysis: Dict) -> str:
+    """Hash of the analysis fields scoring reads - changes when a job is re-analyzed"""
+    return hashlib.sha256(json.dumps([
+        analysis.get("required_skills", []),
+        analysis.get("nice_to_have_skills", []),
+        analysis.get("role_category"),
+        analysis.get("experience_level"),
+        analysis.get("required_skill_ids"),
+        analysis.get("nice_to_have_skill_ids"),
+        analysis.get("skill_ids_version")
+    ]).encode()).hexdigest()[:16]
+
+
+def _calculate_skills_match(index: ProfileIndex, analysis: Dict) -> float:
+    """Calculate skills overlap percentage"""
+    # Get required skills from analysis
+    required = set(analysis_skill_ids(analysis, "required_skills", DB_PATH))
+
+    # Calculate overlap
+    if not required:
+        return 100.0
+
+    overlap = index.expanded_skills & required
+    match_percentage = (len(overlap) / len(required)) * 100
+
+    # Bonus points for nice-to-have skills
+    nice_to_have = set(analysis_skill_ids(analysis, "nice_to_have_skills", DB_PATH))
+    bonus_overlap = index.expanded_skills & nice_to_have
+
+    if nice_to_have:
+        bonus = (len(bonus_overlap) / len(nice_to_have)) * 10  # Up to 10% bonus
+        match_percentage = min(100, match_percentage + bonus)
+
+    return match_percentage
+
+
+def _calculate_experience_match(index: ProfileIndex, analysis: Dict, config: "ScoringConfig") -> float:
+    """Match experience level"""
+    # Get required level
+    required_level_str = analysis.get("experience_level", "Mid").lower()
+    required_level = config.level_map.get(required_level_str, 1)
+
+    # Calculate score from the ladder in preferences
+    # (default: perfect match = 100, one level off = 80, two levels = 60, etc.)
+    diff = abs(index.experience_level - required_level)
+    return config.level_scores[min(diff, len(config.level_scores) - 1)]
+
+
+def _calculate_domain_match(index: ProfileIndex, analysis: Dict) -> float:
+    """Calculate domain expertise match"""
+    role_category = analysis.get("role_category", "").lower()
 
     # Score based on role category
     if "ml" in role_category or "machine learning" in role_category or "ai" in role_category:
-        if has_ml and has_automotive:
+        if index.has_ml and index.has_automotive:
             return 100.0  # Perfect match for ML + Automotive
-        elif has_ml:
+        elif index.has_ml:
             return 90.0
         else:
             return 50.0
 
     elif "backend" in role_category or "software engineer" in role_category:
-        if has_backend:
+        if index.has_backend:
             return 90.0
         else:
             return 70.0
 
     elif "data" in role_category:
-        if has_ml:
+        if index.has_ml:
             return 85.0
         else:
             return 60.0
@@ -238,24 +966,14 @@ def _recommend_variant(role_category: str) -> str:
         return "ml_focused"  # Default to ML for Aditya
 
 
-def _identify_skills_to_emphasize(profile: Dict, analysis: Dict) -> list:
+def _identify_skills_to_emphasize(index: ProfileIndex, analysis: Dict) -> list:
     """Identify which skills to emphasize based on job requirements"""
-    # Get all user skills
-    user_skills = {}
-    for category, skills_list in profile.get("skills", {}).items():
-        if isinstance(skills_list, list):
-            for skill in skills_list:
-                user_skills[skill.lower().strip()] = skill  # Preserve original casing
-
-    # Get required skills
-    required = [s.lower().strip() for s in analysis.get("required_skills", [])]
-
-    # Find matches
+    # Profile skills covering each required skill, in job order, deduplicated
     matched_skills = []
-    for req_skill in required:
-        if req_skill in user_skills:
-            matched_skills.append(user_skills[req_skill])
-
+    for skill_id in analysis_skill_ids(analysis, "required_skills", DB_PATH):
+        name = index.skill_names.get(skill_id)
+        if name is not None and name not in matched_skills:
+            matched_skills.append(name)
     return matched_skills
 
 
@@ -293,6 +1011,31 @@ def _get_analysis(job_id: str) -> Dict:
     return analysis
 
 
+def _get_all_analyses() -> List[Dict]:
+    """Retrieve every job analysis in a single query"""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    # IN builds the set of job IDs once instead of probing jobs per row
+    cursor.execute("""
+        SELECT ja.*
+        FROM job_analysis ja
+        WHERE ja.job_id IN (SELECT job_id FROM jobs)
+    """)
+    columns = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    conn.close()
+
+    analyses = [dict(zip(columns, row)) for row in rows]
+    # Parse each JSON column with one json.loads instead of one per row
+    for field in ("required_skills", "nice_to_have_skills"):
+        values = json.loads(f"[{','.join(analysis[field] or '[]' for analysis in analyses)}]")
+        for analysis, value in zip(analyses, values):
+            analysis[field] = value
+
+    return analyses
+
+
 def _get_job(job_id: str) -> Dict:
     """Retrieve job from database"""
     conn = sqlite3.connect(DB_PATH)
@@ -306,60 +1049,384 @@ def _get_job(job_id: str) -> Dict:
     return dict(row) if row else None
 
 
-def _store_match_score(job_id: str, scores: Dict) -> None:
-    """Store match score in database"""
+def _relevance_scores(index: ProfileIndex, job_ids: List[str] = None) -> Dict[str, float]:
+    """BM25 relevance (0-100) of job descriptions to the profile text"""
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    try:
+        index_missing_jobs(conn)  # Jobs stored before ingest-time indexing
+        return bm25_scores(conn, index.query_terms, job_ids)
+    finally:
+        conn.close()
+
+
+# (profile version, embedding backend) -> profile vector
+_profile_vectors: Dict[tuple, np.ndarray] = {}
+
+
+def _semantic_scores(index: ProfileIndex, job_ids: List[str] = None) -> Dict[str, float]:
+    """
+    Embedding cosine similarity (0-100) of jobs to the profile text.
+    Empty when the embedding backend (Ollama) is unreachable - matching
+    doesn't depend on it, so the scores are reported as unknown.
+    """
+    store = get_vector_store(DB_PATH)
+    key = (index.version, store.backend)
+    try:
+        store.add_missing_jobs(job_ids)  # Jobs stored before ingest-time embedding
+        if key not in _profile_vectors:
+            _profile_vectors[key] = embed_texts([index.text], store.model)[0]
+    except (httpx.HTTPError, KeyError, ValueError) as e:
+        print(f"Warning: embedding backend unavailable, semantic scores skipped: {str(e)}", file=sys.stderr)
+        return {}
 
-    # Create table if not exists
+    similarities = store.similarities(_profile_vectors[key], job_ids)
+    return {job_id: max(0.0, sim) * 100 for job_id, sim in similarities.items()}
+
+
+def _connect_read_only() -> sqlite3.Connection:
+    """Connection for read-only tools: fails instead of creating or altering anything"""
+    return sqlite3.connect(f"{Path(DB_PATH).absolute().as_uri()}?mode=ro", uri=True)
+
+
+def _has_table(cursor: sqlite3.Cursor, name: str) -> bool:
+    """Whether a table exists (read-only tools never create one)"""
+    return cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+def _migrate_database() -> None:
+    """Bring match tables of an existing database up to date before serving reads"""
+    if not Path(DB_PATH).exists():
+        return  # Created by the first match tool call
+
+    conn = sqlite3.connect(DB_PATH)
+    _ensure_match_table(conn.cursor())
+    # Other profiles' rows are claimed when they are next matched
+    if Path(DEFAULT_PROFILE_PATH).exists():
+        claim_legacy_rows(conn, DEFAULT_PROFILE_PATH, stable_profile_id(DEFAULT_PROFILE_PATH))
+    conn.commit()
+    conn.close()
+
+
+def _ensure_match_table(cursor: sqlite3.Cursor) -> None:
+    """Create match_scores table if not exists"""
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS match_scores (
-            match_id TEXT PRIMARY KEY,
+            match_id TEXT PRIMARY KEY,       -- "<profile_id>:<job_id>"
+            profile_id TEXT NOT NULL DEFAULT 'profile',
             job_id TEXT,
             overall_score FLOAT,
             skills_score FLOAT,
             experience_score FLOAT,
             domain_score FLOAT,
+            relevance_score FLOAT,
+            semantic_score FLOAT,
+            outcome_probability FLOAT,
             recommended_variant TEXT,
             skills_to_emphasize TEXT,
+            profile_version TEXT,
+            analysis_version TEXT,
             calculated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (job_id) REFERENCES jobs(job_id)
         )
     """)
 
-    # Insert or update
+    # Databases created before relevance/semantic scoring, versioning and calibration
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(match_scores)")}
+    for column, column_type in [("relevance_score", "FLOAT"), ("semantic_score", "FLOAT"),
+                                ("profile_version", "TEXT"), ("analysis_version", "TEXT"),
+                                ("outcome_probability", "FLOAT")]:
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE match_scores ADD COLUMN {column} {column_type}")
+
+    # Rows from before multi-profile matching (match_id = job_id) belong to
+    # the default profile
+    if "profile_id" not in columns:
+        cursor.execute("ALTER TABLE match_scores ADD COLUMN profile_id TEXT NOT NULL DEFAULT 'profile'")
+        cursor.execute("UPDATE match_scores SET match_id = profile_id || ':' || job_id")
+        for column in ("job", "overall_score", "relevance_score", "semantic_score"):
+            cursor.execute(f"DROP INDEX IF EXISTS idx_match_scores_{column}")
+
+    # Per-(profile, job) lookups, plus one ranking index per list_matches
+    # order so top-K reads walk an index instead of sorting the table
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_match_scores_profile_job ON match_scores(profile_id, job_id)"
+    )
+    for column in ("overall_score", "relevance_score", "semantic_score", "outcome_probability"):
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_match_scores_profile_{column} "
+            f"ON match_scores(profile_id, {column} DESC, job_id)"
+        )
+
+    # Skills of every profile version that scored a row, to diff against later
     cursor.execute("""
-        INSERT OR REPLACE INTO match_scores
-        (match_id, job_id, overall_score, skills_score, experience_score,
-         domain_score, recommended_variant, skills_to_emphasize)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        job_id,
-        job_id,
-        scores["overall_score"],
-        scores["skills_score"],
-        scores["experience_score"],
-        scores["domain_score"],
-        scores["recommended_variant"],
-        json.dumps(scores["skills_to_emphasize"])
-    ))
-
-    # Update job status
+        CREATE TABLE IF NOT EXISTS profile_versions (
+            version TEXT PRIMARY KEY,
+            signature TEXT NOT NULL,
+            skill_names TEXT NOT NULL,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Logistic calibration of sub-scores against application outcomes, per profile
     cursor.execute("""
-        UPDATE jobs
-        SET status = 'matched'
-        WHERE job_id = ?
-    """, (job_id,))
+        CREATE TABLE IF NOT EXISTS score_calibration (
+            profile_id TEXT PRIMARY KEY,
+            features TEXT NOT NULL,
+            coefficients TEXT NOT NULL,
+            intercept FLOAT NOT NULL,
+            samples INTEGER NOT NULL,
+            positives INTEGER NOT NULL,
+            outcome_statuses TEXT NOT NULL,
+            fitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _record_profile_version(cursor: sqlite3.Cursor, index: ProfileIndex, config: "ScoringConfig") -> None:
+    """Remember a profile version's skills so later versions can be diffed against it"""
+    version, signature = _scoring_version(index, config)
+    cursor.execute(
+        "INSERT OR IGNORE INTO profile_versions (version, signature, skill_names) VALUES (?, ?, ?)",
+        (version, signature, json.dumps(sorted(index.skill_names.items())))
+    )
+
+
+def _store_match_score(index: ProfileIndex, config: "ScoringConfig", job_id: str, scores: Dict) -> None:
+    """Store match score in database"""
+    _store_match_scores_bulk(index, config, {job_id: scores})
+
+
+def _store_match_scores_bulk(index: ProfileIndex, config: "ScoringConfig",
+                             scores_by_job: Dict[str, Dict]) -> None:
+    """Upsert many match scores of one profile"""
+    _store_match_matrix(config, [(index, scores_by_job)])
+
+
+# match_scores columns rewritten by a rescore, in upsert parameter order
+MATCH_SCORE_COLUMNS = ("overall_score", "skills_score", "experience_score", "domain_score",
+                       "relevance_score", "semantic_score", "outcome_probability",
+                       "recommended_variant", "skills_to_emphasize", "profile_version", "analysis_version")
+
+# Rows whose values are unchanged are left alone, so re-matching an
+# unchanged corpus doesn't rewrite every row and its ranking indexes
+_UPSERT_MATCH_SCORE = f"""
+    INSERT INTO match_scores (match_id, profile_id, job_id, {", ".join(MATCH_SCORE_COLUMNS)})
+    VALUES ({", ".join("?" * (3 + len(MATCH_SCORE_COLUMNS)))})
+    ON CONFLICT(match_id) DO UPDATE SET
+        {", ".join(f"{column} = excluded.{column}" for column in MATCH_SCORE_COLUMNS)},
+        calculated_at = CURRENT_TIMESTAMP
+    WHERE ({", ".join(MATCH_SCORE_COLUMNS)}) IS NOT ({", ".join(f"excluded.{column}" for column in MATCH_SCORE_COLUMNS)})
+"""
+
+
+def _store_match_matrix(config: "ScoringConfig", results: List[Tuple[ProfileIndex, Dict[str, Dict]]]) -> None:
+    """Upsert the match scores of several profiles and update job statuses in one transaction"""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    _ensure_match_table(cursor)
+
+    for index, scores_by_job in results:
+        _record_profile_version(cursor, index, config)
+        version = _scoring_version(index, config)[0]
+
+        # Insert or update
+        cursor.executemany(_UPSERT_MATCH_SCORE, [
+            (
+                f"{index.profile_id}:{job_id}",
+                index.profile_id,
+                job_id,
+                scores["overall_score"],
+                scores["skills_score"],
+                scores["experience_score"],
+                scores["domain_score"],
+                scores.get("relevance_score"),
+                scores.get("semantic_score"),
+                scores.get("outcome_probability"),
+                scores["recommended_variant"],
+                json.dumps(scores["skills_to_emphasize"]),
+                version,
+                scores["analysis_version"]
+            )
+            for job_id, scores in scores_by_job.items()
+        ])
+
+    # Update job status (don't move applied/skipped jobs back to matched)
+    matched_jobs = {job_id for _, scores_by_job in results for job_id in scores_by_job}
+    unmatched = {row[0] for row in cursor.execute("SELECT job_id FROM jobs WHERE status IN ('new', 'analyzed')")}
+    cursor.executemany(
+        "UPDATE jobs SET status = 'matched' WHERE job_id = ?", [(job_id,) for job_id in matched_jobs & unmatched]
+    )
 
     conn.commit()
     conn.close()
 
 
+class CalibrateScoresInput(BaseModel):
+    """Input for fitting the outcome calibration"""
+    model_config = ConfigDict(extra='forbid')
+    profile_path: str = Field(default="./data/profiles/profile.json", description="Profile whose matches to calibrate")
+    outcome_statuses: List[str] = Field(
+        default_factory=lambda: ["interview", "offer"],
+        description="Application statuses counted as a good outcome"
+    )
+    negative_statuses: List[str] = Field(
+        default_factory=lambda: ["rejected"],
+        description="Application statuses counted as a bad outcome"
+    )
+    pending_statuses: List[str] = Field(
+        default_factory=lambda: ["submitted", "under_review"],
+        description="Statuses without a reply yet; counted as a bad outcome only after min_age_days"
+    )
+    min_age_days: int = Field(default=21, ge=0, description="Days after which a pending application counts as unsuccessful")
+    min_samples: int = Field(default=20, ge=2, description="Minimum number of resolved applications to fit")
+    l2: float = Field(default=1.0, ge=0, description="L2 regularization strength")
+
+
+@mcp.tool(
+    name="calibrate_scores",
+    annotations={
+        "title": "Calibrate Match Scores Against Outcomes",
+        "readOnlyHint": False,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def calibrate_scores(params: CalibrateScoresInput) -> str:
+    """
+    Fit a logistic model of application outcome on the stored sub-scores,
+    store its coefficients and refresh outcome_probability on every row of
+    the profile. Also reports how the fixed recommendation cut-offs convert.
+    """
+    try:
+        started = time.perf_counter()
+        profile_id = stable_profile_id(params.profile_path)
+
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        _ensure_match_table(cursor)
+        claim_legacy_rows(conn, params.profile_path, profile_id)
+
+        if not cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'applications'"
+        ).fetchone():
+            conn.close()
+            return "Error: No applications tracked yet. Please run create_application first."
+
+        columns = ", ".join(f"m.{feature}" for feature in CALIBRATION_FEATURES)
+        samples = {}
+        for row in cursor.execute(f"""
+            SELECT m.job_id, m.overall_score, {columns}, a.status,
+                   julianday('now') - julianday(a.applied_date) AS age_days
+            FROM applications a
+            INNER JOIN match_scores m ON m.job_id = a.job_id AND m.profile_id = ?
+        """, (profile_id,)):
+            if row["status"] in params.outcome_statuses:
+                label = 1
+            elif row["status"] in params.negative_statuses:
+                label = 0
+            elif row["status"] in params.pending_statuses:
+                if (row["age_days"] or 0) < params.min_age_days:
+                    continue  # Too early to tell
+                label = 0
+            else:
+                continue  # Withdrawn or unknown: says nothing about the match
+            # Several applications to one job: any good outcome wins
+            previous = samples.get(row["job_id"])
+            if previous is None or label > previous[1]:
+                samples[row["job_id"]] = (dict(row), label)
+
+        rows = [row for row, _ in samples.values()]
+        y = np.array([label for _, label in samples.values()], dtype=np.float64)
+        positives = int(y.sum())
+        if len(rows) < params.min_samples:
+            conn.close()
+            return (f"Error: Only {len(rows)} resolved applications with match scores, "
+                    f"need at least {params.min_samples} to calibrate")
+        if positives in (0, len(rows)):
+            conn.close()
+            return "Error: Calibration needs both good and bad outcomes"
+
+        # Fit and store
+        X = _feature_matrix(rows)
+        coefficients, intercept = _fit_logistic(X, y, params.l2)
+        cursor.execute("""
+            INSERT OR REPLACE INTO score_calibration
+            (profile_id, features, coefficients, intercept, samples, positives, outcome_statuses)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            profile_id, json.dumps(CALIBRATION_FEATURES), json.dumps(coefficients.tolist()),
+            intercept, len(rows), positives, json.dumps(params.outcome_statuses)
+        ))
+
+        # Refresh every stored row of the profile with the new model
+        stored = [dict(row) for row in cursor.execute(
+            f"SELECT match_id, {', '.join(CALIBRATION_FEATURES)} FROM match_scores WHERE profile_id = ?",
+            (profile_id,)
+        )]
+        probabilities = _sigmoid(_feature_matrix(stored) @ coefficients + intercept)
+        cursor.executemany(
+            "UPDATE match_scores SET outcome_probability = ? WHERE match_id = ?",
+            [(float(p), row["match_id"]) for p, row in zip(probabilities, stored)]
+        )
+        conn.commit()
+        conn.close()
+
+        # In-sample fit, and how the fixed recommendation cut-offs actually convert
+        fitted = _sigmoid(X @ coefficients + intercept)
+        eps = 1e-12
+        base_rate = positives / len(rows)
+        log_loss = -np.mean(y * np.log(fitted + eps) + (1 - y) * np.log(1 - fitted + eps))
+        baseline = -(base_rate * np.log(base_rate) + (1 - base_rate) * np.log(1 - base_rate))
+        overall = np.array([row["overall_score"] or 0.0 for row in rows])
+        cutoffs = []
+        for cutoff in (85, 70, 55):
+            above = overall >= cutoff
+            cutoffs.append({
+                "min_overall_score": cutoff,
+                "applications": int(above.sum()),
+                "good_outcomes": int(y[above].sum()),
+                "observed_rate": round(float(y[above].mean()), 3) if above.any() else None,
+                "mean_probability": round(float(fitted[above].mean()), 3) if above.any() else None
+            })
+
+        return json.dumps({
+            "profile_id": profile_id,
+            "samples": len(rows),
+            "good_outcomes": positives,
+            "base_rate": round(base_rate, 3),
+            "intercept": round(intercept, 4),
+            "coefficients": {
+                feature: round(float(c), 4) for feature, c in zip(CALIBRATION_FEATURES, coefficients)
+            },
+            "log_loss": round(float(log_loss), 4),
+            "baseline_log_loss": round(float(baseline), 4),
+            "cutoffs": cutoffs,
+            "rows_updated": len(stored),
+            "elapsed_seconds": round(time.perf_counter() - started, 3)
+        }, indent=2)
+
+    except Exception as e:
+        return f"Error calibrating scores: {str(e)}"
+
+
 class ListMatchesInput(BaseModel):
     """Input for listing matches"""
     model_config = ConfigDict(extra='forbid')
+    profile_path: str = Field(default="./data/profiles/profile.json", description="Profile whose matches to list")
     min_score: float = Field(default=70.0, description="Minimum match score")
     limit: int = Field(default=20, description="Maximum number of results")
+    rank_by: Literal["overall_score", "relevance_score", "semantic_score", "outcome_probability"] = Field(
+        default="overall_score",
+        description="Order by weighted match score, BM25 relevance, embedding similarity or calibrated outcome probability"
+    )
+    exclude_applied: bool = Field(default=False, description="Skip jobs already applied to or skipped")
+    company: Optional[str] = Field(default=None, description="Only jobs at this company (case-insensitive)")
+    max_age_days: Optional[int] = Field(default=None, ge=0, description="Only jobs scraped within this many days")
 
 
 @mcp.tool(
@@ -377,20 +1444,21 @@ async def list_matches(params: ListMatchesInput) -> str:
     List all matched jobs above a certain score threshold
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = _connect_read_only()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT j.job_id, j.title, j.company, j.location,
-                   m.overall_score, m.recommended_variant
-            FROM jobs j
-            INNER JOIN match_scores m ON j.job_id = m.job_id
-            WHERE m.overall_score >= ?
-            ORDER BY m.overall_score DESC
-            LIMIT ?
-        """, (params.min_score, params.limit))
-
+        # Nothing matched yet (the table is created by the match tools)
+        if not _has_table(cursor, "match_scores"):
+            conn.close()
+            return json.dumps({
+                "count": 0,
+                "matches": [],
+                "min_score": params.min_score,
+                "rank_by": params.rank_by
+            }, indent=2)
+
+        cursor.execute(*_list_matches_query(cursor, params))
         rows = cursor.fetchall()
         conn.close()
 
@@ -399,15 +1467,155 @@ async def list_matches(params: ListMatchesInput) -> str:
         return json.dumps({
             "count": len(results),
             "matches": results,
-            "min_score": params.min_score
-        }, indent=2)
+            "min_score": params.min_score,
+            "rank_by": params.rank_by
+        }, indent=2, ensure_ascii=False)
 
     except Exception as e:
         return f"Error listing matches: {str(e)}"
 
 
+def _list_matches_query(cursor: sqlite3.Cursor, params: ListMatchesInput) -> Tuple[str, List]:
+    """
+    SQL and arguments of a list_matches read.
+    match_scores drives the loop (CROSS JOIN fixes the join order) and
+    INDEXED BY pins the (profile_id, rank_by DESC, job_id) index: left to
+    itself the planner picks the overall_score index for the min_score range
+    and sorts other orders in a temp B-tree. Rows come off the index already
+    sorted, min_score and the job filters are checked per row, and the scan
+    stops after `limit` rows pass. rank_by is restricted to known column
+    names by the input model.
+    """
+    filters = ["m.profile_id = ?", "m.overall_score >= ?"]
+    args = [stable_profile_id(params.profile_path), params.min_score]
+    if params.exclude_applied:
+        filters.append("j.status NOT IN ('applied', 'skipped')")
+    if params.company:
+        filters.append("j.company = ? COLLATE NOCASE")
+        args.append(params.company)
+    if params.max_age_days is not None:
+        filters.append("j.scraped_at >= datetime('now', ?)")
+        args.append(f"-{params.max_age_days} days")
+
+    # Databases not yet migrated by the match tools lack the ranking indexes
+    index = f"idx_match_scores_profile_{params.rank_by}"
+    indexed = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index,)
+    ).fetchone() is not None
+
+    return f"""
+        SELECT j.job_id, j.title, j.company, j.location,
+               m.overall_score, m.relevance_score, m.semantic_score,
+               m.outcome_probability, m.recommended_variant
+        FROM match_scores m {f"INDEXED BY {index}" if indexed else ""}
+        CROSS JOIN jobs j ON j.job_id = m.job_id
+        WHERE {" AND ".join(filters)}
+        ORDER BY m.{params.rank_by} DESC
+        LIMIT ?
+    """, [*args, params.limit]
+
+
+class SimilarJobsInput(BaseModel):
+    """Input for "more like this" search"""
+    model_config = ConfigDict(extra='forbid')
+    job_ids: List[str] = Field(default_factory=list, description="Seed job IDs")
+    seed_statuses: List[str] = Field(
+        default_factory=list,
+        description='Also seed with jobs whose application reached these statuses, e.g. ["interview", "offer"]'
+    )
+    limit: int = Field(default=10, description="Number of similar jobs to return")
+
+
+@mcp.tool(
+    name="similar_jobs",
+    annotations={
+        "title": "Find Jobs Similar to Seeds",
+        "readOnlyHint": True,
+        "destructiveHint": False,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def similar_jobs(params: SimilarJobsInput) -> str:
+    """
+    Find unapplied jobs most similar to the seed jobs (the centroid of
+    their embeddings) via the approximate nearest-neighbour index.
+    Reads stored vectors only - jobs are embedded at ingest and by match_all.
+    """
+    try:
+        started = time.perf_counter()
+
+        store = get_vector_store(DB_PATH)
+
+        conn = _connect_read_only()
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        seeds = list(dict.fromkeys(params.job_ids))
+        applied = set()
+        if _has_table(cursor, "applications"):
+            if params.seed_statuses:
+                placeholders = ",".join("?" * len(params.seed_statuses))
+                cursor.execute(
+                    f"SELECT DISTINCT job_id FROM applications WHERE status IN ({placeholders})",
+                    params.seed_statuses
+                )
+                seeds.extend(row["job_id"] for row in cursor.fetchall() if row["job_id"] not in seeds)
+            applied = {row["job_id"] for row in cursor.execute("SELECT job_id FROM applications")}
+        applied.update(
+            row["job_id"] for row in
+            cursor.execute("SELECT job_id FROM jobs WHERE status IN ('applied', 'skipped')")
+        )
+        conn.close()
+
+        matrix, rows = store.matrix()
+        seed_rows = [rows[job_id] for job_id in seeds if job_id in rows]
+        if not seed_rows:
+            return ("Error: No embedded seed jobs found. Pass job_ids or seed_statuses with existing "
+                    "applications; jobs stored before embedding are backfilled by match_all.")
+
+        centroid = np.asarray(matrix[seed_rows]).mean(axis=0)
+        norm = np.linalg.norm(centroid)
+        if norm:
+            centroid /= norm
+
+        neighbours = store.nearest(centroid, params.limit, exclude=applied.union(seeds))
+
+        conn = _connect_read_only()
+        conn.row_factory = sqlite3.Row
+        jobs = {}
+        if neighbours:
+            placeholders = ",".join("?" * len(neighbours))
+            jobs = {
+                row["job_id"]: row for row in conn.execute(
+                    f"SELECT job_id, title, company, location FROM jobs WHERE job_id IN ({placeholders})",
+                    [job_id for job_id, _ in neighbours]
+                )
+            }
+        conn.close()
+
+        return json.dumps({
+            "seeds": [job_id for job_id in seeds if job_id in rows],
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "similar_jobs": [
+                {
+                    "job_id": job_id,
+                    "title": jobs[job_id]["title"],
+                    "company": jobs[job_id]["company"],
+                    "location": jobs[job_id]["location"],
+                    "similarity": round(similarity * 100, 2)
+                }
+                for job_id, similarity in neighbours if job_id in jobs
+            ]
+        }, indent=2, ensure_ascii=False)
+
+    except Exception as e:
+        return f"Error finding similar jobs: {str(e)}"
+
+
 def main():
     """Run the Matcher MCP server using stdio transport."""
+    _migrate_database()  # Read-only tools don't migrate
     mcp.run()
 
 
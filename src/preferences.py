@@ -19,7 +19,13 @@ DEFAULT_PREFERENCES = {
     "exclude_keywords": ["PhD required", "C++ only"],
     "salary_min": 70000,
     "posted_within": "24h",
-    "match_threshold": 70.0  # Minimum match score to generate resume
+    "match_threshold": 70.0,  # Minimum match score to generate resume
+    "match_weights": {"skills": 0.4, "experience": 0.3, "domain": 0.3},
+    "experience_levels": {
+        "entry": 0, "junior": 0, "mid": 1, "mid-level": 1,
+        "senior": 2, "lead": 3, "staff": 3, "principal": 4
+    },
+    "experience_level_scores": [100.0, 80.0, 60.0, 40.0]  # By level gap; last for larger gaps
 }
 
 
@@ -136,6 +142,8 @@ def display_preferences() -> str:
     output.append(f"\nSearch Settings:")
     output.append(f"  Posted Within: {prefs.get('posted_within', 'N/A')}")
     output.append(f"  Match Threshold: {prefs.get('match_threshold', 70)}%")
+    weights = prefs.get("match_weights", DEFAULT_PREFERENCES["match_weights"])
+    output.append("  Match Weights: " + ", ".join(f"{k} {v}" for k, v in weights.items()))
 
     output.append("=" * 60)
 
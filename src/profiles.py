@@ -0,0 +1,80 @@
+"""
+Stable profile identifiers
+Match scores, calibrations and generated resumes are keyed by profile.
+File names alone collide (alice/profile.json, bob/profile.json), so the
+key is the profile's explicit "profile_id" field, else its resolved path
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional
+
+# Tables keyed by profile: (table, "<profile_id>:<job_id>" key column or None)
+PROFILE_KEYED_TABLES = (
+    ("match_scores", "match_id"),
+    ("generated_resumes", "resume_id"),
+    ("score_calibration", None),
+)
+
+
+def stable_profile_id(profile_path: str, profile: Optional[Dict] = None) -> str:
+    """Key of a profile's rows: its "profile_id" field, else its resolved absolute path"""
+    if profile is None:
+        try:
+            with open(profile_path, 'r', encoding='utf-8') as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            profile = {}
+
+    explicit = profile.get("profile_id") if isinstance(profile, dict) else None
+    if explicit:
+        return str(explicit)
+    return str(Path(profile_path).resolve())
+
+
+def claim_legacy_rows(conn: sqlite3.Connection, profile_path: str, new_id: str) -> int:
+    """
+    Re-key rows written before stable IDs (keyed by the file name without
+    extension) to new_id. Each legacy key is claimed once, by the first
+    profile with that file name to write, and an ID already in use is never
+    treated as legacy. Runs inside the caller's transaction; returns rows moved.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS profile_id_claims (
+            legacy_id TEXT PRIMARY KEY,
+            profile_id TEXT NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO profile_id_claims VALUES (?, ?)", (new_id, new_id))
+
+    legacy_id = Path(profile_path).stem
+    if legacy_id == new_id or conn.execute(
+        "INSERT OR IGNORE INTO profile_id_claims VALUES (?, ?)", (legacy_id, new_id)
+    ).rowcount == 0:
+        return 0
+
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    moved = 0
+    for table, key_column in PROFILE_KEYED_TABLES:
+        if table not in tables:
+            continue
+        # Rows the profile already wrote under new_id win over legacy ones
+        if key_column:
+            conn.execute(f"""
+                DELETE FROM {table} WHERE profile_id = ?
+                AND job_id IN (SELECT job_id FROM {table} WHERE profile_id = ?)
+            """, (legacy_id, new_id))
+            moved += conn.execute(
+                f"UPDATE {table} SET profile_id = ?, {key_column} = ? || ':' || job_id WHERE profile_id = ?",
+                (new_id, new_id, legacy_id)
+            ).rowcount
+        else:
+            conn.execute(f"""
+                DELETE FROM {table} WHERE profile_id = ?
+                AND EXISTS (SELECT 1 FROM {table} WHERE profile_id = ?)
+            """, (legacy_id, new_id))
+            moved += conn.execute(
+                f"UPDATE {table} SET profile_id = ? WHERE profile_id = ?", (new_id, legacy_id)
+            ).rowcount
+    return moved
@@ -0,0 +1,188 @@
+"""
+Corpus-aware BM25 relevance between the profile and job descriptions
+Term statistics are maintained incrementally as jobs are ingested, so a
+new job costs O(its length) instead of a corpus rebuild
+"""
+
+import html
+import math
+import re
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Query terms a job must match (once, at average length) to score 50;
+# raw BM25 is mapped onto 0-100 by the saturating score / (score + K)
+BM25_HALF_SCORE_TERMS = 10
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_URL_RE = re.compile(r"https?://\S+|www\.\S+")
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can
+could did do does for from had has have having he her here his how i if in into
+is it its just may more most must my no not of on once only or other our out over
+own per same she should so some such than that the their them then there these
+they this those through to too under until up very was we were what when where
+which while who whom why will with within without would you your yours
+""".split())
+
+
+def clean_description(text: Optional[str]) -> str:
+    """Strip HTML tags, entities and URLs from a scraped description"""
+    text = html.unescape(_TAG_RE.sub(" ", text or ""))
+    return _URL_RE.sub(" ", text)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase terms without stopwords or single characters"""
+    return [
+        token for token in _TOKEN_RE.findall(clean_description(text).lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _ensure_relevance_tables(conn: sqlite3.Connection) -> None:
+    """Create postings and corpus statistics tables if not exists"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS term_postings (
+            term TEXT NOT NULL,
+            job_id TEXT NOT NULL,
+            tf INTEGER NOT NULL,
+            PRIMARY KEY (term, job_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_term_postings_job ON term_postings(job_id)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS term_stats (
+            term TEXT PRIMARY KEY,
+            doc_freq INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_lengths (
+            job_id TEXT PRIMARY KEY,
+            length INTEGER NOT NULL
+        )
+    """)
+
+
+def index_jobs(conn: sqlite3.Connection, jobs: Iterable[Tuple[str, str]]) -> int:
+    """
+    Add (job_id, text) pairs to the BM25 index, skipping jobs already indexed.
+    Runs inside the caller's transaction; returns the number of jobs indexed.
+    """
+    _ensure_relevance_tables(conn)
+
+    lengths, postings = [], []
+    doc_freq = Counter()
+    seen = set()
+    for job_id, text in jobs:
+        if job_id in seen or conn.execute(
+            "SELECT 1 FROM job_lengths WHERE job_id = ?", (job_id,)
+        ).fetchone():
+            continue
+        seen.add(job_id)
+
+        term_counts = Counter(tokenize(text))
+        lengths.append((job_id, sum(term_counts.values())))
+        postings.extend((term, job_id, tf) for term, tf in term_counts.items())
+        doc_freq.update(term_counts.keys())
+
+    # One upsert per distinct term rather than per (term, job)
+    conn.executemany("INSERT INTO job_lengths (job_id, length) VALUES (?, ?)", lengths)
+    conn.executemany("INSERT INTO term_postings (term, job_id, tf) VALUES (?, ?, ?)", postings)
+    conn.executemany("""
+        INSERT INTO term_stats (term, doc_freq) VALUES (?, ?)
+        ON CONFLICT(term) DO UPDATE SET doc_freq = doc_freq + excluded.doc_freq
+    """, doc_freq.items())
+
+    return len(lengths)
+
+
+def job_text(job: Dict) -> str:
+    """Text of a job used for relevance scoring"""
+    return " ".join(job.get(key) or "" for key in ("title", "description", "requirements"))
+
+
+def index_missing_jobs(conn: sqlite3.Connection) -> int:
+    """Index jobs stored before relevance indexing existed"""
+    _ensure_relevance_tables(conn)
+
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("""
+        SELECT j.job_id, j.title, j.description, j.requirements
+        FROM jobs j
+        LEFT JOIN job_lengths l ON l.job_id = j.job_id
+        WHERE l.job_id IS NULL
+    """).fetchall()
+    conn.row_factory = None
+
+    indexed = index_jobs(conn, ((row["job_id"], job_text(dict(row))) for row in rows))
+    conn.commit()
+    return indexed
+
+
+def bm25_scores(conn: sqlite3.Connection, query_terms: Iterable[str],
+                job_ids: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    BM25 of every indexed job (or just job_ids) against the query terms,
+    mapped onto 0-100. A long query (a whole profile) is never fully
+    matched, so the raw score saturates against BM25_HALF_SCORE_TERMS
+    typical matches of this query rather than the sum over all its terms.
+    """
+    _ensure_relevance_tables(conn)
+
+    doc_count, total_length = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM job_lengths"
+    ).fetchone()
+    if not doc_count:
+        return {}
+    avg_length = max(total_length / doc_count, 1.0)
+
+    terms = sorted(set(query_terms))
+    idf = {}
+    for start in range(0, len(terms), 500):  # Stay below SQLite's parameter limit
+        chunk = terms[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        for term, doc_freq in conn.execute(
+            f"SELECT term, doc_freq FROM term_stats WHERE term IN ({placeholders})", chunk
+        ):
+            idf[term] = math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    if job_ids is None:
+        scores = {row[0]: 0.0 for row in conn.execute("SELECT job_id FROM job_lengths")}
+    else:
+        scores = {job_id: 0.0 for job_id in job_ids}
+    if not idf:
+        return scores
+
+    # Few jobs: read their postings by job; many: read postings by query term
+    by_job = job_ids is not None and len(job_ids) <= 500
+    keys = list(scores) if by_job else sorted(idf)
+    column = "p.job_id" if by_job else "p.term"
+
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(f"""
+            SELECT p.job_id, p.term, p.tf, l.length
+            FROM term_postings p
+            INNER JOIN job_lengths l ON l.job_id = p.job_id
+            WHERE {column} IN ({placeholders})
+        """, chunk)
+
+        for job_id, term, tf, length in rows:
+            if job_id in scores and term in idf:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                scores[job_id] += idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+
+    # A single match at average length contributes the term's idf; short
+    # queries score 50 when every term matches once
+    half_score = min(BM25_HALF_SCORE_TERMS, len(idf)) * sum(idf.values()) / len(idf)
+    return {job_id: 100 * score / (score + half_score) for job_id, score in scores.items()}
@@ -10,8 +10,15 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 import hashlib
 import os
+import sys
 import json
 
+# Add src to path for shared modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from embeddings import get_vector_store
+from relevance import index_jobs, job_text
+
 # Initialize MCP server
 mcp = FastMCP("job_scraper_mcp")
 
@@ -37,9 +44,13 @@ def _init_database() -> None:
             source TEXT,
             url TEXT,
             scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            status TEXT DEFAULT 'new'
+            status TEXT DEFAULT 'new',
+            triage_score FLOAT
         )
     """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_scraped_at ON jobs(scraped_at)")
 
     conn.commit()
     conn.close()
@@ -186,6 +197,7 @@ def _store_jobs(jobs: List[Dict]) -> int:
     cursor = conn.cursor()
 
     stored = 0
+    new_jobs = []
     for job in jobs:
         try:
             cursor.execute("""
@@ -200,12 +212,22 @@ def _store_jobs(jobs: List[Dict]) -> int:
             ))
             if cursor.rowcount > 0:
                 stored += 1
+                new_jobs.append((job["job_id"], job_text(job)))
         except Exception as e:
             print(f"Error storing job {job['job_id']}: {e}")
 
+    # Update BM25 term statistics in the same transaction as the insert
+    index_jobs(conn, new_jobs)
+
     conn.commit()
     conn.close()
 
+    # Embeddings are derived data - the matcher backfills any that fail here
+    try:
+        get_vector_store(DB_PATH).add(new_jobs)
+    except Exception as e:
+        print(f"Error embedding jobs: {e}")
+
     return stored
 
 
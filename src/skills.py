@@ -0,0 +1,573 @@
+"""
+Canonical skill vocabulary
+Maps skill strings and their synonyms to stable integer IDs shared by
+the analysis, matcher and generator servers
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+DB_PATH = "./data/databases/jobs.db"
+
+# Minimum trigram (Dice) similarity for a fuzzy requirement -> skill match
+FUZZY_THRESHOLD = 0.75
+
+# Version of resolve_requirements stored with an analysis's skill IDs;
+# IDs stored by an older version are re-resolved from the text when read
+SKILL_RESOLUTION_VERSION = 2
+
+# Canonical name -> aliases. Seeded into the skills table on first use;
+# skills not listed here get a new ID the first time they are seen.
+DEFAULT_SKILLS = [
+    ("Python", ["python3", "python 3", "python 3.x"]),
+    ("Java", []),
+    ("C++", ["cpp"]),
+    ("C#", ["csharp"]),
+    ("Go", ["golang"]),
+    ("Scala", []),
+    ("JavaScript", ["js"]),
+    ("TypeScript", ["ts"]),
+    ("SQL", []),
+    ("Machine Learning", ["ml"]),
+    ("Deep Learning", ["dl"]),
+    ("Artificial Intelligence", ["ai"]),
+    ("Natural Language Processing", ["nlp"]),
+    ("Computer Vision", []),
+    ("Generative AI", ["genai", "gen ai"]),
+    ("LLMs", ["llm", "large language models", "large language model"]),
+    ("Prompt Engineering", []),
+    ("MLOps", []),
+    ("Data Science", []),
+    ("Statistics", []),
+    ("TensorFlow", ["tf", "tensorflow 2"]),
+    ("PyTorch", ["torch"]),
+    ("Keras", []),
+    ("Scikit-Learn", ["sklearn", "scikit learn", "scikit"]),
+    ("Hugging Face", ["huggingface", "hugging face transformers"]),
+    ("LangChain", []),
+    ("Numpy", ["numpy"]),
+    ("Pandas", []),
+    ("Matplotlib", []),
+    ("Spark", ["apache spark"]),
+    ("Airflow", ["apache airflow"]),
+    ("Kafka", ["apache kafka"]),
+    ("FastAPI", []),
+    ("Flask", []),
+    ("Django", []),
+    ("RESTful APIs", ["rest", "rest api", "rest apis", "restful api"]),
+    ("Node.js", ["node", "nodejs"]),
+    ("React", ["react.js", "reactjs"]),
+    ("AWS", ["amazon web services"]),
+    ("Microsoft Azure", ["azure"]),
+    ("GCP", ["google cloud", "google cloud platform"]),
+    ("Docker", []),
+    ("Kubernetes", ["k8s"]),
+    ("Terraform", []),
+    ("CI/CD", ["ci cd", "continuous integration"]),
+    ("Git", []),
+    ("Linux", []),
+    ("PostgreSQL", ["postgres"]),
+    ("MySQL", []),
+    ("MongoDB", ["mongo"]),
+    ("Redis", []),
+    ("Embedded Systems", ["embedded"]),
+    ("MISRA Standards", ["misra", "misra c"]),
+    ("Cybersecurity", ["cyber security"]),
+    ("Software Testing", []),
+    ("SDLC", []),
+]
+
+# Child => parent implications ("knows PyTorch" implies "knows Deep Learning").
+# The transitive closure is precomputed when the vocabulary loads.
+SKILL_IMPLICATIONS = [
+    ("PyTorch", "Deep Learning"),
+    ("TensorFlow", "Deep Learning"),
+    ("Keras", "Deep Learning"),
+    ("Hugging Face", "Deep Learning"),
+    ("Deep Learning", "Machine Learning"),
+    ("Scikit-Learn", "Machine Learning"),
+    ("Natural Language Processing", "Machine Learning"),
+    ("Computer Vision", "Machine Learning"),
+    ("MLOps", "Machine Learning"),
+    ("Machine Learning", "Artificial Intelligence"),
+    ("LangChain", "LLMs"),
+    ("LLMs", "Generative AI"),
+    ("Generative AI", "Artificial Intelligence"),
+    ("PyTorch", "Python"),
+    ("TensorFlow", "Python"),
+    ("Keras", "Python"),
+    ("Hugging Face", "Python"),
+    ("Scikit-Learn", "Python"),
+    ("Numpy", "Python"),
+    ("Pandas", "Python"),
+    ("Matplotlib", "Python"),
+    ("FastAPI", "Python"),
+    ("Flask", "Python"),
+    ("Django", "Python"),
+    ("FastAPI", "RESTful APIs"),
+    ("Flask", "RESTful APIs"),
+    ("Django", "RESTful APIs"),
+    ("PostgreSQL", "SQL"),
+    ("MySQL", "SQL"),
+    ("TypeScript", "JavaScript"),
+    ("React", "JavaScript"),
+    ("Node.js", "JavaScript"),
+]
+
+# Part of the version stamped on match scores, so scores computed under
+# other implications are rescored by rematch_stale
+SKILL_IMPLICATIONS_VERSION = hashlib.sha256(json.dumps(SKILL_IMPLICATIONS).encode()).hexdigest()[:16]
+
+
+def normalize_skill(text: str) -> str:
+    """Lowercase and collapse whitespace for alias lookup"""
+    return " ".join(str(text).lower().split())
+
+
+def _ensure_skill_tables(conn: sqlite3.Connection) -> None:
+    """Create the skill tables and seed the default vocabulary"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS skills (
+            skill_id INTEGER PRIMARY KEY,
+            canonical_name TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS skill_aliases (
+            alias TEXT PRIMARY KEY,
+            skill_id INTEGER NOT NULL,
+            FOREIGN KEY (skill_id) REFERENCES skills(skill_id)
+        )
+    """)
+
+    for canonical, aliases in DEFAULT_SKILLS:
+        row = conn.execute(
+            "SELECT skill_id FROM skill_aliases WHERE alias = ?", (normalize_skill(canonical),)
+        ).fetchone()
+        if row:
+            skill_id = row[0]
+        else:
+            skill_id = conn.execute(
+                "INSERT INTO skills (canonical_name) VALUES (?)", (canonical,)
+            ).lastrowid
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO skill_aliases (alias, skill_id) VALUES (?, ?)",
+            [(normalize_skill(alias), skill_id) for alias in [canonical] + aliases]
+        )
+
+    conn.commit()
+
+
+def _transitive_closure(edges: Dict[int, Set[int]]) -> Dict[int, FrozenSet[int]]:
+    """Map every node to itself plus all ancestors reachable through edges"""
+    closure: Dict[int, FrozenSet[int]] = {}
+
+    def visit(node: int, path: Set[int]) -> FrozenSet[int]:
+        if node in closure:
+            return closure[node]
+        reachable = {node}
+        path.add(node)
+        for parent in edges.get(node, ()):
+            if parent not in path:  # Ignore accidental cycles
+                reachable |= visit(parent, path)
+        path.discard(node)
+        closure[node] = frozenset(reachable)
+        return closure[node]
+
+    for node in edges:
+        visit(node, set())
+    return closure
+
+
+class SkillVocabulary:
+    """In-memory alias -> ID lookup backed by the skills tables"""
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self._alias_to_id: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._implied: Dict[int, FrozenSet[int]] = {}
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(db_path)
+        _ensure_skill_tables(conn)
+        self._load(conn)
+        conn.close()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _load(self, conn: sqlite3.Connection) -> None:
+        """(Re)load all aliases and names from the database"""
+        self._names = dict(conn.execute("SELECT skill_id, canonical_name FROM skills"))
+        self._alias_to_id = dict(conn.execute("SELECT alias, skill_id FROM skill_aliases"))
+
+        edges: Dict[int, Set[int]] = {}
+        for child, parent in SKILL_IMPLICATIONS:
+            child_id, parent_id = self.lookup(child), self.lookup(parent)
+            if child_id is not None and parent_id is not None:
+                edges.setdefault(child_id, set()).add(parent_id)
+        self._implied = _transitive_closure(edges)
+
+    def lookup(self, text: str) -> Optional[int]:
+        """Return the skill ID for text without touching the database"""
+        return self._alias_to_id.get(normalize_skill(text))
+
+    def resolve(self, text: str, add: bool = True) -> Optional[int]:
+        """Return the skill ID for text, registering unknown skills if add=True"""
+        ids = self.resolve_many([text], add=add)
+        return ids[0] if ids else None
+
+    def resolve_many(self, texts: Iterable[str], add: bool = True) -> List[int]:
+        """
+        Resolve many skill strings to unique IDs, preserving first-seen order.
+        Unknown skills are registered in one transaction (add=True) or dropped.
+        """
+        texts = [str(t) for t in texts if normalize_skill(t)]
+        missing = [t for t in texts if normalize_skill(t) not in self._alias_to_id]
+
+        if missing:
+            conn = sqlite3.connect(self.db_path)
+            # Another server process may have registered them meanwhile
+            self._load(conn)
+            missing = [t for t in missing if normalize_skill(t) not in self._alias_to_id]
+
+            if missing and add:
+                for text in missing:
+                    alias = normalize_skill(text)
+                    if alias in self._alias_to_id:
+                        continue  # Duplicate within this batch
+                    skill_id = conn.execute(
+                        "INSERT INTO skills (canonical_name) VALUES (?)", (text.strip(),)
+                    ).lastrowid
+                    conn.execute(
+                        "INSERT OR IGNORE INTO skill_aliases (alias, skill_id) VALUES (?, ?)",
+                        (alias, skill_id)
+                    )
+                    self._alias_to_id[alias] = skill_id
+                    self._names[skill_id] = text.strip()
+                conn.commit()
+                self._load(conn)
+            conn.close()
+
+        ids = []
+        seen = set()
+        for text in texts:
+            skill_id = self._alias_to_id.get(normalize_skill(text))
+            if skill_id is not None and skill_id not in seen:
+                seen.add(skill_id)
+                ids.append(skill_id)
+        return ids
+
+    def implied(self, skill_id: int) -> FrozenSet[int]:
+        """The skill itself plus every skill it implies (transitively)"""
+        return self._implied.get(skill_id) or frozenset((skill_id,))
+
+    def expand(self, skill_ids: Iterable[int]) -> FrozenSet[int]:
+        """Union of implied skills - computed once per profile version"""
+        expanded = set()
+        for skill_id in skill_ids:
+            expanded |= self.implied(skill_id)
+        return frozenset(expanded)
+
+    def aliases(self, skill_ids: Iterable[int]) -> List[Tuple[str, int]]:
+        """All (alias, skill_id) pairs for the given skills"""
+        wanted = set(skill_ids)
+        return [(alias, skill_id) for alias, skill_id in self._alias_to_id.items() if skill_id in wanted]
+
+    def sync(self, skill_ids: Iterable[int]) -> None:
+        """Reload from the database if another process registered any of skill_ids"""
+        if any(skill_id not in self._names for skill_id in skill_ids):
+            conn = sqlite3.connect(self.db_path)
+            self._load(conn)
+            conn.close()
+
+    def name(self, skill_id: int) -> str:
+        """Canonical name for a skill ID"""
+        return self._names.get(skill_id, str(skill_id))
+
+    def ids(self) -> FrozenSet[int]:
+        """Every known skill ID"""
+        return frozenset(self._names)
+
+
+# ============================================================================
+# FUZZY RESOLUTION - messy requirement strings -> known skills
+# ============================================================================
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9+#]+)*")
+_SEGMENT_SPLIT_RE = re.compile(r"[/,;:()\[\]|&]|\band\b|\bor\b")
+
+
+def _words(text: str) -> str:
+    """Punctuation-free, space-separated words of a normalized string"""
+    return " ".join(_WORD_RE.findall(text))
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Character trigrams of each word, padded so word boundaries count"""
+    grams = set()
+    for word in text.split():
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def transient_skill_id(text: str) -> int:
+    """
+    Negative ID for a requirement naming no known skill, stable across
+    processes. Counts as an unmet requirement without registering the
+    string in the vocabulary.
+    """
+    digest = hashlib.sha256(normalize_skill(text).encode()).hexdigest()
+    return -1 - int(digest[:12], 16)
+
+
+class FuzzySkillResolver:
+    """
+    Map raw requirement strings ("experience with PyTorch/TensorFlow",
+    "AWS (EC2, S3)") onto a fixed set of target skills through a
+    character-trigram inverted index. Results are memoized per string;
+    the vocabulary is only read, never extended.
+    """
+
+    def __init__(self, vocabulary: SkillVocabulary, target_ids: Iterable[int],
+                 threshold: float = FUZZY_THRESHOLD):
+        self.vocabulary = vocabulary
+        self.targets = frozenset(target_ids)
+        self.threshold = threshold
+        self._aliases: List[Tuple[str, int, Set[str]]] = []
+        self._index: Dict[str, List[int]] = {}
+        self._cache: Dict[str, List[int]] = {}
+
+        for alias, skill_id in vocabulary.aliases(self.targets):
+            words = _words(alias)
+            if not words:
+                continue
+            grams = _trigrams(words)
+            position = len(self._aliases)
+            self._aliases.append((words, skill_id, grams))
+            for gram in grams:
+                self._index.setdefault(gram, []).append(position)
+
+    def resolve(self, text: str) -> List[int]:
+        """
+        Target skills a requirement string names: its exact alias if that
+        is a target, else every target matching the string or one of its
+        segments ("PyTorch/TensorFlow" names both). Empty if none match.
+        """
+        key = normalize_skill(text)
+        if key not in self._cache:
+            exact = self.vocabulary.lookup(key)
+            self._cache[key] = [exact] if exact in self.targets else self._matching_targets(key)
+        return self._cache[key]
+
+    def _matching_targets(self, key: str) -> List[int]:
+        """Targets scoring above threshold, earliest phrase in the text first"""
+        # Ties go to the phrase earliest in the text, then to alias order,
+        # so results don't depend on set iteration order
+        best: Dict[int, Tuple[float, int, int]] = {}
+        for rank, skill_id in self._scored(key):
+            if rank[0] >= self.threshold and rank > best.get(skill_id, (0.0, 0, 0)):
+                best[skill_id] = rank
+
+        return sorted(best, key=lambda skill_id: (-best[skill_id][1], -best[skill_id][0], -best[skill_id][2]))
+
+    def _scored(self, key: str) -> Iterator[Tuple[Tuple[float, int, int], int]]:
+        """((score, -offset, -position), skill_id) for aliases sharing trigrams with key"""
+        segments = [key] + [seg for seg in _SEGMENT_SPLIT_RE.split(key) if seg.strip()]
+        key_words = f" {_words(key)} "
+        for segment in segments:
+            words = _words(segment)
+            if not words:
+                continue
+            grams = _trigrams(words)
+
+            shared = Counter()
+            for gram in grams:
+                for position in self._index.get(gram, ()):
+                    shared[position] += 1
+
+            for position, count in shared.items():
+                alias, skill_id, alias_grams = self._aliases[position]
+                if f" {alias} " in f" {words} ":
+                    score = 1.0  # Alias appears as a whole phrase
+                elif len(alias) < 4:
+                    continue  # Short aliases ("go", "ai") only match whole words
+                else:
+                    score = 2 * count / (len(grams) + len(alias_grams))
+
+                offset = key_words.find(f" {alias} ")
+                if offset < 0:
+                    offset = len(key_words)
+
+                yield (score, -offset, -position), skill_id
+
+
+# db_path -> SkillVocabulary, one per process
+_vocabularies: Dict[str, SkillVocabulary] = {}
+
+
+def get_vocabulary(db_path: str = DB_PATH) -> SkillVocabulary:
+    """Return the shared vocabulary for a database, loading it once"""
+    key = os.path.abspath(db_path)
+    if key not in _vocabularies:
+        _vocabularies[key] = SkillVocabulary(db_path)
+    return _vocabularies[key]
+
+
+# db_path -> (vocabulary size, resolver over the whole vocabulary)
+_requirement_resolvers: Dict[str, Tuple[int, FuzzySkillResolver]] = {}
+
+
+def _requirement_resolver(db_path: str) -> FuzzySkillResolver:
+    """Resolver targeting every known skill, rebuilt when the vocabulary grows"""
+    vocabulary = get_vocabulary(db_path)
+    key = os.path.abspath(db_path)
+    cached = _requirement_resolvers.get(key)
+    if cached is None or cached[0] != len(vocabulary):
+        cached = (len(vocabulary), FuzzySkillResolver(vocabulary, vocabulary.ids()))
+        _requirement_resolvers[key] = cached
+    return cached[1]
+
+
+def _requirement_ids(texts: List[str], db_path: str, register: bool) -> List[int]:
+    """Unique skill IDs named by requirement strings, first mentioned first"""
+    resolver = _requirement_resolver(db_path)
+    texts = [str(text) for text in texts if normalize_skill(text)]
+    named = [resolver.resolve(text) for text in texts]
+
+    unknown = [text for text, skill_ids in zip(texts, named) if not skill_ids]
+    if unknown and register:
+        get_vocabulary(db_path).resolve_many(unknown)  # One transaction for the whole analysis
+
+    ids = []
+    for text, skill_ids in zip(texts, named):
+        if not skill_ids:
+            known = get_vocabulary(db_path).lookup(text) if register else None
+            skill_ids = [known if known is not None else transient_skill_id(text)]
+        for skill_id in skill_ids:
+            if skill_id not in ids:
+                ids.append(skill_id)
+    return ids
+
+
+def resolve_requirements(texts: Iterable[str], db_path: str = DB_PATH) -> List[int]:
+    """
+    Skill IDs for an analysis's requirement strings, resolved once when
+    the job is analyzed and stored with it. Each string maps to its exact
+    alias or to every known skill it names; strings naming none are
+    registered as new skills so they still count as requirements.
+    """
+    return _requirement_ids(list(texts), db_path, register=True)
+
+
+def analysis_skill_ids(analysis: Dict, field: str, db_path: str = DB_PATH) -> List[int]:
+    """
+    Skill IDs for an analysis field ("required_skills" or "nice_to_have_skills").
+    Uses the IDs stored at analysis time. Rows analyzed before skill IDs
+    (or by an older resolution version) are resolved from the text without
+    writing: strings naming no known skill get a transient ID instead.
+    """
+    return batch_skill_ids([analysis], field, db_path)[0]
+
+
+def batch_skill_ids(analyses: List[Dict], field: str, db_path: str = DB_PATH) -> List[List[int]]:
+    """
+    analysis_skill_ids of many analyses at once: the stored ID lists are
+    parsed in a single json.loads and the vocabulary is synced once
+    """
+    id_field = field.replace("_skills", "_skill_ids")
+    skill_ids: List[Optional[List[int]]] = [None] * len(analyses)
+    stored_ids: Set[int] = set()
+    stored_rows, stored_json = [], []
+    for row, analysis in enumerate(analyses):
+        stored = analysis.get(id_field)
+        if stored is None or analysis.get("skill_ids_version") != SKILL_RESOLUTION_VERSION:
+            skill_ids[row] = _requirement_ids(analysis.get(field) or [], db_path, register=False)
+        elif isinstance(stored, str):
+            stored_rows.append(row)
+            stored_json.append(stored)
+        else:
+            skill_ids[row] = list(stored)
+            stored_ids.update(stored)
+
+    if stored_json:
+        for row, ids in zip(stored_rows, json.loads(f"[{','.join(stored_json)}]")):
+            skill_ids[row] = ids
+            stored_ids.update(ids)
+    get_vocabulary(db_path).sync(stored_ids)
+    return skill_ids
+
+
+# ============================================================================
+# SKILL -> JOBS INDEX - which jobs a profile skill change can affect
+# ============================================================================
+
+def _ensure_job_skill_tables(conn: sqlite3.Connection) -> None:
+    """Create the inverted skill -> jobs index if not exists"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_skill_mentions (
+            skill_id INTEGER NOT NULL,
+            job_id TEXT NOT NULL,
+            PRIMARY KEY (skill_id, job_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_skill_mentions_job ON job_skill_mentions(job_id)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_skill_index_state (
+            job_id TEXT PRIMARY KEY,
+            analysis_version TEXT NOT NULL,
+            max_skill_id INTEGER NOT NULL   -- Vocabulary size when the entry was indexed
+        )
+    """)
+
+
+def jobs_mentioning(conn: sqlite3.Connection, skill_ids: Iterable[int],
+                    analyses: Dict[str, Tuple[str, Dict]], db_path: str = DB_PATH) -> Set[str]:
+    """
+    Jobs among analyses ({job_id: (analysis_version, analysis)}) whose
+    required or nice-to-have skill IDs include any of skill_ids. Entries
+    are refreshed when the analysis changed; runs inside the caller's
+    transaction.
+    """
+    skill_ids = sorted(set(skill_ids))
+    if not skill_ids or not analyses:
+        return set()
+
+    _ensure_job_skill_tables(conn)
+    state = dict(conn.execute("SELECT job_id, analysis_version FROM job_skill_index_state"))
+    stale = [job_id for job_id, (version, _) in analyses.items() if state.get(job_id) != version]
+
+    if stale:
+        max_skill_id = max(get_vocabulary(db_path).ids())
+        stale_analyses = [analyses[job_id][1] for job_id in stale]
+        required = batch_skill_ids(stale_analyses, "required_skills", db_path)
+        nice_to_have = batch_skill_ids(stale_analyses, "nice_to_have_skills", db_path)
+        postings = [
+            (skill_id, job_id)
+            for job_id, required_ids, nice_ids in zip(stale, required, nice_to_have)
+            for skill_id in set(required_ids) | set(nice_ids) if skill_id >= 0
+        ]
+
+        conn.executemany("DELETE FROM job_skill_mentions WHERE job_id = ?", [(job_id,) for job_id in stale])
+        conn.executemany("INSERT OR IGNORE INTO job_skill_mentions (skill_id, job_id) VALUES (?, ?)", postings)
+        conn.executemany(
+            "INSERT OR REPLACE INTO job_skill_index_state VALUES (?, ?, ?)",
+            [(job_id, analyses[job_id][0], max_skill_id) for job_id in stale]
+        )
+
+    found = set()
+    for start in range(0, len(skill_ids), 500):  # Stay below SQLite's parameter limit
+        chunk = skill_ids[start:start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        found.update(row[0] for row in conn.execute(
+            f"SELECT DISTINCT job_id FROM job_skill_mentions WHERE skill_id IN ({placeholders})", chunk
+        ))
+    return found & set(analyses)
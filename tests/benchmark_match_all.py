@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+match_all Benchmark
+Times the real match_all tool against a synthetic corpus ingested the way
+the scraper and analysis servers store jobs (BM25 postings, embeddings
+and skill IDs written at ingest time).
+
+Usage: python tests/benchmark_match_all.py [--jobs 10000] [--runs 3]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import analysis.analysis_server as analysis_server
+import matcher.matcher_server as matcher_server
+import preferences
+import scraper.job_scraper_server as scraper_server
+from skills import DEFAULT_SKILLS, SKILL_RESOLUTION_VERSION, resolve_requirements
+
+PROFILE = {
+    "skills": {
+        "programming_languages": ["Python", "SQL"],
+        "ml_frameworks": ["TensorFlow", "PyTorch", "Scikit-Learn"],
+        "cloud_platforms": ["AWS", "Docker"]
+    },
+    "experience": [
+        {
+            "highlights": [
+                "Developed machine-learning models for Bosch vehicles",
+                "Built FastAPI services serving model predictions"
+            ],
+            "technologies": ["Python", "PyTorch", "FastAPI", "Docker"]
+        }
+    ],
+    "metadata": {"years_of_experience": "3.5"}
+}
+
+CATEGORIES = ["ML Engineer", "Backend Engineer", "Data Scientist", "Software Engineer", "Product Manager"]
+LEVELS = ["Entry", "Mid", "Senior", "Lead"]
+WORDS = ("build ship scale model pipeline service platform team customer data product "
+         "research deploy monitor cloud latency training inference design review mentor").split()
+
+
+def _build_corpus(n_jobs: int, seed: int) -> None:
+    """Store n_jobs jobs and analyses through the servers' own ingest paths"""
+    rng = random.Random(seed)
+    skills = [name for name, _ in DEFAULT_SKILLS] + ["Salesforce", "SAP", "Excel", "Jira"]
+
+    scraper_server._init_database()
+    jobs, analyses = [], []
+    for i in range(n_jobs):
+        required = rng.sample(skills, rng.randint(3, 8))
+        nice = rng.sample(skills, rng.randint(0, 4))
+        description = " ".join(rng.choice(WORDS + required) for _ in range(rng.randint(80, 200)))
+        job_id = f"job-{i}"
+        jobs.append({
+            "job_id": job_id, "title": f"{rng.choice(CATEGORIES)} {i}", "company": f"Company {i % 500}",
+            "location": "Munich", "description": description, "requirements": ", ".join(required),
+            "posted_date": "", "source": "benchmark", "url": "", "status": "analyzed"
+        })
+        analyses.append((job_id, required, nice, rng.choice(CATEGORIES), rng.choice(LEVELS)))
+
+    scraper_server._store_jobs(jobs)
+
+    conn = sqlite3.connect(analysis_server.DB_PATH)
+    cursor = conn.cursor()
+    analysis_server._ensure_analysis_table(cursor)
+    cursor.executemany("""
+        INSERT OR REPLACE INTO job_analysis
+        (analysis_id, job_id, required_skills, nice_to_have_skills, ats_keywords, role_category,
+         experience_level, required_skill_ids, nice_to_have_skill_ids, skill_ids_version)
+        VALUES (?, ?, ?, ?, '[]', ?, ?, ?, ?, ?)
+    """, [
+        (job_id, job_id, json.dumps(required), json.dumps(nice), category, level,
+         json.dumps(resolve_requirements(required, analysis_server.DB_PATH)),
+         json.dumps(resolve_requirements(nice, analysis_server.DB_PATH)), SKILL_RESOLUTION_VERSION)
+        for job_id, required, nice, category, level in analyses
+    ])
+    conn.commit()
+    conn.close()
+
+
+def _match_all(profile_path: str) -> float:
+    """Seconds one match_all call takes, measured around the tool call"""
+    started = time.perf_counter()
+    result = asyncio.run(matcher_server.match_all(matcher_server.MatchAllInput(profile_path=profile_path)))
+    elapsed = time.perf_counter() - started
+    if result.startswith("Error"):
+        raise SystemExit(result)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time match_all on a synthetic corpus")
+    parser.add_argument("--jobs", type=int, default=10000, help="Number of analyzed jobs")
+    parser.add_argument("--runs", type=int, default=3, help="Warm runs after the first call")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "jobs.db")
+        for server in (scraper_server, analysis_server, matcher_server):
+            server.DB_PATH = db_path
+        preferences.PREFERENCES_FILE = Path(directory) / "preferences.json"
+
+        profile_path = os.path.join(directory, "profile.json")
+        with open(profile_path, "w", encoding="utf-8") as f:
+            json.dump(PROFILE, f)
+
+        started = time.perf_counter()
+        _build_corpus(args.jobs, args.seed)
+        print(f"Ingested {args.jobs} jobs in {time.perf_counter() - started:.2f}s")
+
+        print(f"match_all first call: {_match_all(profile_path):.3f}s")
+        warm = [_match_all(profile_path) for _ in range(args.runs)]
+        print(f"match_all warm: best {min(warm):.3f}s, mean {sum(warm) / len(warm):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
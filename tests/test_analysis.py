@@ -0,0 +1,174 @@
+"""
+Analysis Server Tests
+Background worker and triage logic, without a running Ollama
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import analysis.analysis_server as analysis_server
+import preferences
+
+
+def _make_jobs_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "jobs.db")
+    monkeypatch.setattr(analysis_server, "DB_PATH", db_path)
+    monkeypatch.setattr(preferences, "PREFERENCES_FILE", tmp_path / "preferences.json")
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            job_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            company TEXT NOT NULL,
+            location TEXT,
+            description TEXT,
+            requirements TEXT,
+            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'new'
+        )
+    """)
+    conn.commit()
+    return conn
+
+
+def test_background_worker_analyzes_new_jobs(tmp_path, monkeypatch):
+    """Jobs inserted by another connection get analyzed without a tool call"""
+    conn = _make_jobs_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(analysis_server, "BACKGROUND_POLL_INTERVAL", 0.01)
+
+    async def fake_check_ollama():
+        return None
+
+    async def fake_run_analysis(job):
+        analysis = {
+            "required_skills": ["Python"],
+            "nice_to_have_skills": [],
+            "ats_keywords": [],
+            "role_category": "ML Engineer",
+            "experience_level": "Mid"
+        }
+        analysis_server._store_analysis(job["job_id"], analysis)
+        return analysis
+
+    monkeypatch.setattr(analysis_server, "_check_ollama", fake_check_ollama)
+    monkeypatch.setattr(analysis_server, "_run_analysis", fake_run_analysis)
+
+    async def scenario():
+        analysis_server._start_background_worker()
+        await asyncio.sleep(0.05)
+
+        conn.execute("INSERT INTO jobs (job_id, title, company) VALUES ('j1', 'ML Engineer', 'Bosch')")
+        conn.execute("INSERT INTO jobs (job_id, title, company) VALUES ('j2', 'Data Scientist', 'BMW')")
+        conn.commit()
+
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if analysis_server._worker_state["analyzed"] >= 2:
+                break
+        await analysis_server._stop_background_worker()
+
+    analysis_server._worker_state["analyzed"] = 0
+    asyncio.run(scenario())
+
+    statuses = dict(conn.execute("SELECT job_id, status FROM jobs").fetchall())
+    conn.close()
+    assert statuses == {"j1": "analyzed", "j2": "analyzed"}
+
+
+def test_background_failures_are_retried_bounded_and_pruned(tmp_path, monkeypatch):
+    """A failing job is retried on rescans up to the limit and forgotten once it stops being new"""
+    conn = _make_jobs_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(analysis_server, "BACKGROUND_POLL_INTERVAL", 0.01)
+    attempts = []
+
+    async def fake_check_ollama():
+        return None
+
+    async def failing_run_analysis(job):
+        attempts.append(job["job_id"])
+        raise ValueError("invalid JSON from model")
+
+    monkeypatch.setattr(analysis_server, "_check_ollama", fake_check_ollama)
+    monkeypatch.setattr(analysis_server, "_run_analysis", failing_run_analysis)
+    monkeypatch.setitem(analysis_server._worker_state, "failed", {})
+
+    async def commit_and_wait(sql):
+        conn.execute(sql)
+        conn.commit()
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        analysis_server._start_background_worker()
+        await commit_and_wait("INSERT INTO jobs (job_id, title, company) VALUES ('bad', 'ML Engineer', 'Bosch')")
+        for i in range(analysis_server.BACKGROUND_MAX_ATTEMPTS + 2):
+            await commit_and_wait(f"INSERT INTO jobs (job_id, title, company, status) VALUES ('x{i}', 'x', 'x', 'analyzed')")
+        failed_before = dict(analysis_server._worker_state["failed"])
+
+        await commit_and_wait("UPDATE jobs SET status = 'analyzed' WHERE job_id = 'bad'")
+        await analysis_server._stop_background_worker()
+        return failed_before
+
+    failed_before = asyncio.run(scenario())
+    conn.close()
+
+    assert attempts == ["bad"] * analysis_server.BACKGROUND_MAX_ATTEMPTS
+    assert failed_before == {"bad": analysis_server.BACKGROUND_MAX_ATTEMPTS}
+    assert analysis_server._worker_state["failed"] == {}
+
+
+def test_analysis_logs_stay_off_stdout(tmp_path, monkeypatch, capsys):
+    """stdout is the MCP transport: batch errors go to stderr"""
+    conn = _make_jobs_db(tmp_path, monkeypatch)
+    conn.execute("INSERT INTO jobs (job_id, title, company) VALUES ('j1', 'ML Engineer', 'Bosch')")
+    conn.commit()
+    conn.close()
+
+    async def fake_check_ollama():
+        return None
+
+    async def failing_run_analysis(job):
+        raise ValueError("invalid JSON from model")
+
+    monkeypatch.setattr(analysis_server, "_check_ollama", fake_check_ollama)
+    monkeypatch.setattr(analysis_server, "_run_analysis", failing_run_analysis)
+
+    result = json.loads(asyncio.run(analysis_server.analyze_batch(analysis_server.AnalyzeBatchInput())))
+    assert result["failed"] == ["j1"]
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "Error analyzing job j1" in captured.err
+
+
+def test_triage_orders_relevant_jobs_first(tmp_path, monkeypatch):
+    """Skill, title and location overlap rank a matching posting above an unrelated one"""
+    conn = _make_jobs_db(tmp_path, monkeypatch)
+
+    profile_path = tmp_path / "profile.json"
+    profile_path.write_text(json.dumps({
+        "skills": {"ml_frameworks": ["PyTorch", "TensorFlow", "Scikit-Learn"],
+                   "programming_languages": ["Python"]}
+    }))
+
+    conn.execute("""
+        INSERT INTO jobs (job_id, title, company, location, description) VALUES
+        ('good', 'Machine Learning Engineer', 'Bosch', 'Munich, Germany',
+         'Build models with Python, PyTorch and scikit-learn.'),
+        ('bad', 'Sales Manager', 'Acme', 'Hamburg, Germany',
+         'Drive revenue growth across the DACH region.')
+    """)
+    conn.commit()
+
+    scored = analysis_server._triage_new_jobs(conn, str(profile_path))
+    scores = dict(conn.execute("SELECT job_id, triage_score FROM jobs").fetchall())
+    conn.close()
+
+    assert scored == 2
+    assert scores["good"] > 50
+    assert scores["bad"] == 0
@@ -0,0 +1,88 @@
+"""
+Embedding Store Tests
+Hashed vectors and the memory-mapped job matrix
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import embeddings
+from embeddings import IVFIndex, VectorStore, embed_texts
+
+
+JOBS = [
+    ("ml", "Machine learning engineer training PyTorch models for vehicle perception"),
+    ("backend", "Java Spring backend developer for payment services"),
+    ("data", "Data analyst building SQL dashboards for marketing"),
+]
+
+
+def test_hashed_vectors_are_unit_and_deterministic():
+    """Same text gives the same unit vector; related text is closer than unrelated"""
+    vectors = embed_texts([
+        "PyTorch deep learning models",
+        "PyTorch deep learning models",
+        "deep learning with pytorch",
+        "quarterly sales report"
+    ], model="")
+
+    assert vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert np.array_equal(vectors[0], vectors[1])
+    assert vectors[0] @ vectors[2] > vectors[0] @ vectors[3]
+
+
+def test_store_appends_once_and_is_shared(tmp_path):
+    """Vectors are written once and visible to another store on the same database"""
+    db_path = str(tmp_path / "jobs.db")
+    writer = VectorStore(db_path, model="")
+
+    assert writer.add(JOBS[:2]) == 2
+    assert writer.add(JOBS) == 1  # Only the new job is embedded
+    assert os.path.getsize(writer.path) == 3 * writer.matrix()[0].shape[1] * 4
+
+    reader = VectorStore(db_path, model="")  # e.g. another server process
+    query = embed_texts(["PyTorch machine learning for vehicles"], model="")[0]
+    similarities = reader.similarities(query)
+    assert max(similarities, key=similarities.get) == "ml"
+    assert reader.similarities(query, ["backend", "missing"]).keys() == {"backend"}
+
+
+def test_backend_change_switches_file_after_commit(tmp_path, monkeypatch):
+    """A new backend writes a new file generation; mapped readers keep valid pages"""
+    db_path = str(tmp_path / "jobs.db")
+    reader = VectorStore(db_path, model="")
+    reader.add(JOBS)
+    mapped, _ = reader.matrix()
+    snapshot = np.array(mapped)
+    old_path = reader.path
+
+    monkeypatch.setattr(embeddings, "HASHED_DIM", 512)  # Another backend name
+    writer = VectorStore(db_path, model="")
+    assert writer.add(JOBS[:1]) == 1
+
+    assert writer.path != old_path and not os.path.exists(old_path)
+    assert np.array_equal(mapped, snapshot)  # Never truncated under the reader
+    assert list(writer.matrix()[1]) == ["ml"]
+    assert reader.matrix()[1] == {}  # Old backend: nothing comparable stored
+
+
+def test_ivf_index_finds_nearest_rows():
+    """Approximate search agrees with an exact scan on clustered data and honours exclusions"""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 32))
+    matrix = centers[rng.integers(0, 20, 4000)] + 0.3 * rng.normal(size=(4000, 32))
+    matrix = (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).astype(np.float32)
+    index = IVFIndex(matrix)
+
+    excluded = np.zeros(len(matrix), dtype=bool)
+    for row in range(0, 4000, 400):
+        exact = np.argsort(-(matrix @ matrix[row]))[:5]
+        assert [r for r, _ in index.search(matrix, matrix[row], 5, excluded)] == list(exact)
+
+    excluded[0] = True
+    assert 0 not in [r for r, _ in index.search(matrix, matrix[0], 5, excluded)]
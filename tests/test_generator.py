@@ -0,0 +1,583 @@
+"""
+Document Generator Tests
+LaTeX template environment and rendering
+"""
+
+import asyncio
+import copy
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import generator.document_generator_server as generator_server
+import matcher.matcher_server as matcher_server
+import preferences
+
+SHIPPED_TEMPLATES = os.path.join(os.path.dirname(__file__), '..', 'templates')
+
+
+PROFILE = {
+    "personal": {
+        "name": "Ada Lovelace",
+        "email": "ada@example.com",
+        "phone": "+44 1",
+        "location": "London",
+        "linkedin": "linkedin.com/in/ada#top",
+        "summary": "Improved R&D throughput by 30% with C# and_underscores"
+    },
+    "skills": {"programming_languages": ["C++", "C#"]},
+    "experience": [
+        {
+            "role": "Analyst",
+            "company": "Babbage & Co",
+            "duration": "1842",
+            "highlights": ["Wrote notes on the Analytical Engine {Note G}"]
+        }
+    ],
+    "education": [],
+    "projects": [],
+    "certifications": [],
+    "achievements": []
+}
+
+
+@pytest.fixture
+def template_env(tmp_path, monkeypatch):
+    """Fresh template environment over a temporary template directory"""
+    monkeypatch.setattr(generator_server, "TEMPLATE_DIR", tmp_path / "templates")
+    monkeypatch.setattr(generator_server, "TEMPLATE_PATH", tmp_path / "templates" / "resume_template.tex")
+    monkeypatch.setattr(generator_server, "TEMPLATE_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(generator_server, "_template_envs", {})
+    (tmp_path / "templates").mkdir()
+    return tmp_path / "templates"
+
+
+def test_latex_escape_special_characters():
+    """Special characters are escaped once; safe text is left alone"""
+    escaped = generator_server.latex_escape(r"R&D 100% $5 #1 a_b {x} ~ ^ \ <")
+    assert escaped == (r"R\&D 100\% \$5 \#1 a\_b \{x\} \textasciitilde{} "
+                       r"\textasciicircum{} \textbackslash{} \textless{}")
+    assert generator_server.latex_escape(escaped) == escaped
+    assert generator_server.latex_url("https://x.org/a_b%20#c") == r"https://x.org/a_b\%20\#c"
+
+
+def test_resume_template_escapes_profile_values(template_env):
+    """The shipped template renders with LaTeX-safe delimiters and escaped values"""
+    shutil.copytree(SHIPPED_TEMPLATES, template_env, dirs_exist_ok=True)
+
+    env = generator_server._get_template_env()
+    project = {"title": "Engine", "description": "Notes", "highlights": ["Computed Bernoulli numbers 100% by hand"]}
+    latex = env.get_template("resume_template.tex").render(**dict(PROFILE, projects=[project]))
+
+    assert r"\textbf{Ada Lovelace}" in latex
+    assert r"Improved R\&D throughput by 30\% with C\# and\_underscores" in latex
+    assert r"\textbf{Programming Languages:} C++, C\#" in latex
+    assert r"\item Wrote notes on the Analytical Engine \{Note G\}" in latex
+    assert r"\href{linkedin.com/in/ada\#top}{LinkedIn}" in latex
+    assert r"\item Computed Bernoulli numbers 100\% by hand" in latex  # Customized with include_projects
+    assert r"\VAR{" not in latex and r"\BLOCK{" not in latex
+
+
+def test_template_compiled_once_and_reloaded_on_change(template_env):
+    """The environment is shared and keeps the compiled template until the file changes"""
+    path = template_env / "t.tex"
+    path.write_text(r"\textbf{\VAR{name}}")
+
+    env = generator_server._get_template_env()
+    assert generator_server._get_template_env() is env
+    first = env.get_template("t.tex")
+    assert env.get_template("t.tex") is first
+    assert first.render(name="A&B") == r"\textbf{A\&B}"
+
+    path.write_text(r"\emph{\VAR{name | safe}}")
+    os.utime(path, ns=(10**18, 10**18))  # Force a different mtime on coarse filesystems
+    second = env.get_template("t.tex")
+    assert second is not first
+    assert second.render(name=r"\LaTeX") == r"\emph{\LaTeX}"
+
+
+def test_invariant_sections_rendered_once_per_profile_version(template_env, monkeypatch):
+    """Renders with cached sections match a full render; sections are reused until the profile changes"""
+    shutil.copytree(SHIPPED_TEMPLATES, template_env, dirs_exist_ok=True)
+    monkeypatch.setattr(generator_server, "_invariant_sections_cache", generator_server.OrderedDict())
+    env = generator_server._get_template_env()
+    template = env.get_template("resume_template.tex")
+    profile = dict(PROFILE, education=[{"degree": "BSc", "institution": "Home", "duration": "1830"}])
+
+    rendered = []
+    macros = env.get_template("resume_sections.tex").module
+    original_macro = macros.education
+    monkeypatch.setattr(macros, "education", lambda education: rendered.append(1) or original_macro(education))
+
+    for skills in (["C++", "C#"], ["C#", "C++"]):
+        customized = dict(profile, skills={"programming_languages": skills})
+        invariant = generator_server._invariant_sections(profile, "v1")
+        latex = generator_server._render_latex(template, customized, invariant)
+        assert latex == template.render(**customized)
+        assert r"\textbf{BSc} | Home" in latex
+    assert len(rendered) == 1 + 2  # Once for the cache, once per full render above
+
+    generator_server._invariant_sections(profile, "v2")
+    assert len(rendered) == 4
+
+
+def test_invariant_sections_cache_evicts_least_recently_used(template_env, monkeypatch):
+    """A hit refreshes an entry, so the one used longest ago is evicted first"""
+    shutil.copytree(SHIPPED_TEMPLATES, template_env, dirs_exist_ok=True)
+    monkeypatch.setattr(generator_server, "_invariant_sections_cache", generator_server.OrderedDict())
+    monkeypatch.setattr(generator_server, "INVARIANT_CACHE_MAX_ENTRIES", 2)
+
+    first = generator_server._invariant_sections(PROFILE, "v1")
+    generator_server._invariant_sections(PROFILE, "v2")
+    assert generator_server._invariant_sections(PROFILE, "v1") is first
+    generator_server._invariant_sections(PROFILE, "v3")
+
+    cached = [profile_hash for _, profile_hash in generator_server._invariant_sections_cache]
+    assert cached == ["v1", "v3"]
+
+
+@pytest.fixture
+def matched_db(tmp_path, monkeypatch, template_env):
+    """Jobs matched against PROFILE, with the shipped template and a temporary output dir"""
+    db_path = str(tmp_path / "jobs.db")
+    for module in (generator_server, matcher_server):
+        monkeypatch.setattr(module, "DB_PATH", db_path)
+    monkeypatch.setattr(generator_server, "OUTPUT_DIR", tmp_path / "out")
+    monkeypatch.setattr(preferences, "PREFERENCES_FILE", tmp_path / "preferences.json")
+    shutil.copytree(SHIPPED_TEMPLATES, template_env, dirs_exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            job_id TEXT PRIMARY KEY, title TEXT NOT NULL, company TEXT NOT NULL, location TEXT,
+            description TEXT, requirements TEXT, scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'analyzed'
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE job_analysis (
+            analysis_id TEXT PRIMARY KEY, job_id TEXT, required_skills TEXT, nice_to_have_skills TEXT,
+            ats_keywords TEXT, role_category TEXT, experience_level TEXT,
+            analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for job_id, required in [("cpp", ["C++"]), ("csharp", ["C#", "C++"]), ("java", ["Java", "Spring", "Kafka"])]:
+        conn.execute("INSERT INTO jobs (job_id, title, company) VALUES (?, ?, ?)",
+                     (job_id, f"{job_id} developer", f"{job_id.title()} Corp"))
+        conn.execute("INSERT INTO job_analysis VALUES (?, ?, ?, '[]', '[]', 'Software Engineer', 'Mid', CURRENT_TIMESTAMP)",
+                     (job_id, job_id, json.dumps(required)))
+    conn.commit()
+    conn.close()
+
+    profile_path = tmp_path / "profile.json"
+    profile_path.write_text(json.dumps(PROFILE))
+    asyncio.run(matcher_server.match_all(matcher_server.MatchAllInput(profile_path=str(profile_path))))
+    return {"db_path": db_path, "profile_path": profile_path, "output_dir": tmp_path / "out"}
+
+
+def test_batch_generates_shortlist_once(matched_db):
+    """Jobs above the threshold get a resume and a manifest entry; unchanged ones are skipped next time"""
+    scores = dict(sqlite3.connect(matched_db["db_path"]).execute("SELECT job_id, overall_score FROM match_scores"))
+    threshold = (scores["csharp"] + scores["java"]) / 2
+    assert scores["cpp"] >= threshold > scores["java"]
+
+    batch = lambda **kwargs: json.loads(asyncio.run(generator_server.generate_resumes_batch(
+        generator_server.GenerateResumesBatchInput(
+            profile_path=str(matched_db["profile_path"]), min_score=threshold,
+            use_ai_customization=False, **kwargs
+        )
+    )))
+
+    result = batch()
+    assert (result["shortlisted"], result["generated"], result["up_to_date"]) == (2, 2, 0)
+    manifest = json.loads((matched_db["output_dir"] / "manifest.json").read_text())
+    assert {entry["job_id"] for entry in manifest["resumes"]} == {"cpp", "csharp"}
+    for entry in manifest["resumes"]:
+        latex = open(entry["file"], encoding="utf-8").read()
+        assert r"\textbf{Programming Languages:} C++, C\#" in latex
+
+    result = batch()
+    assert (result["generated"], result["up_to_date"]) == (0, 2)
+
+    # A profile edit makes every resume stale
+    profile = dict(PROFILE, personal=dict(PROFILE["personal"], phone="+44 2"))
+    matched_db["profile_path"].write_text(json.dumps(profile))
+    assert batch()["generated"] == 2
+
+
+def test_identical_resumes_share_one_stored_file(matched_db):
+    """Byte-identical renders are stored once and never rewritten; the manifest groups their jobs"""
+    batch = lambda **kwargs: json.loads(asyncio.run(generator_server.generate_resumes_batch(
+        generator_server.GenerateResumesBatchInput(
+            profile_path=str(matched_db["profile_path"]), min_score=0, use_ai_customization=False, **kwargs
+        )
+    )))
+
+    result = batch()
+    assert (result["generated"], result["distinct_resumes"], result["files_written"]) == (3, 1, 1)
+    manifest = json.loads((matched_db["output_dir"] / "manifest.json").read_text())
+    [(content_hash, output)] = manifest["outputs"].items()
+    assert sorted(output["job_ids"]) == ["cpp", "csharp", "java"]
+    assert {entry["file"] for entry in manifest["resumes"]} == {output["file"]}
+
+    stored = list((matched_db["output_dir"] / "by_hash").iterdir())
+    assert [path.name for path in stored] == [f"resume_{content_hash[:16]}.tex"]
+    os.utime(stored[0], ns=(1, 1))
+
+    result = batch(force=True)
+    assert (result["generated"], result["files_written"]) == (3, 0)
+    assert stored[0].stat().st_mtime_ns == 1
+
+    hashes = sqlite3.connect(matched_db["db_path"]).execute(
+        "SELECT DISTINCT content_hash FROM generated_resumes"
+    ).fetchall()
+    assert hashes == [(content_hash,)]
+
+
+STUB_TEX_ENGINE = """
+import pathlib, sys
+tex, outdir = map(pathlib.Path, sys.argv[1:3])
+with open(outdir.parent.parent / "calls.txt", "a") as calls:
+    calls.write(tex.name + "\\n")
+if "FAIL" in tex.read_text():
+    print("! Undefined control sequence.")
+    sys.exit(12)
+print("Output written on", tex.stem + ".pdf")
+(outdir / (tex.stem + ".pdf")).write_bytes(b"%PDF-stub")
+"""
+
+
+def test_compile_resumes_once_per_content_hash(matched_db, monkeypatch):
+    """Distinct resumes are compiled once, unchanged ones skipped, failures reported per job with logs"""
+    engine = matched_db["output_dir"].parent / "engine.py"
+    engine.write_text(STUB_TEX_ENGINE)
+    monkeypatch.setattr(generator_server, "TEX_COMMAND", f'"{sys.executable}" "{engine}" {{tex}} {{outdir}}')
+    calls = matched_db["output_dir"] / "calls.txt"
+
+    asyncio.run(generator_server.generate_resumes_batch(generator_server.GenerateResumesBatchInput(
+        profile_path=str(matched_db["profile_path"]), min_score=0, use_ai_customization=False
+    )))
+    compile_all = lambda **kwargs: json.loads(asyncio.run(generator_server.compile_resumes(
+        generator_server.CompileResumesInput(profile_path=str(matched_db["profile_path"]), **kwargs)
+    )))
+
+    result = compile_all()
+    assert (result["jobs"], result["distinct_resumes"], result["compiled"], result["failed_jobs"]) == (3, 1, 1, 0)
+    assert len({entry["pdf"] for entry in result["resumes"]}) == 1
+    assert open(result["resumes"][0]["log"]).read().startswith("Output written on")
+    assert len(calls.read_text().splitlines()) == 1
+
+    result = compile_all(job_ids=["cpp", "missing"])
+    assert [entry["status"] for entry in result["resumes"]] == ["up_to_date", "failed"]
+    assert len(calls.read_text().splitlines()) == 1
+
+    # A resume the engine rejects fails for every job sharing it, keeping the log
+    tex_file = generator_server.Path(result["resumes"][0]["pdf"]).with_suffix(".tex")
+    tex_file.write_text(tex_file.read_text() + "% FAIL\n")
+    result = compile_all(force=True)
+    assert result["failed_jobs"] == 3
+    assert result["resumes"][0]["error"] == "exit code 12: ! Undefined control sequence."
+    assert "Undefined control sequence" in open(result["resumes"][0]["log"]).read()
+    assert not any((matched_db["output_dir"] / "build").glob("*"))
+
+
+def test_ollama_client_closes_with_its_last_session():
+    """Nested sessions share one client; it is closed before the event loop is"""
+    async def use():
+        async with generator_server._ollama_session():
+            async with generator_server._ollama_session():
+                client, _ = generator_server._get_ollama_client()
+            assert not client.is_closed
+            assert generator_server._get_ollama_client()[0] is client
+        with pytest.raises(RuntimeError):
+            generator_server._get_ollama_client()
+        return client
+
+    first, second = asyncio.run(use()), asyncio.run(use())
+    assert first is not second
+    assert first.is_closed and second.is_closed
+
+
+def test_ai_customization_runs_entries_concurrently(tmp_path, monkeypatch):
+    """Entries are customized in parallel; one past the deadline has its highlights ranked instead"""
+    monkeypatch.setattr(generator_server, "DB_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(generator_server, "AI_DEADLINE", 0.6)
+
+    async def ollama(request):
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": []})
+        highlights = json.loads(request.content)["prompt"].split("Original Highlights")[1].split("\n")[1]
+        highlights = json.loads(highlights)
+        await asyncio.sleep(5 if "slow" in highlights[0] else 0.3)
+        return httpx.Response(200, json={"response": json.dumps(highlights[::-1])})
+
+    def mock_client():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(ollama))
+        return client, asyncio.Semaphore(4)
+    monkeypatch.setattr(generator_server, "_get_ollama_client", mock_client)
+
+    profile = {
+        "skills": {"programming_languages": ["Python"]},
+        "experience": [
+            {"company": "A", "highlights": ["a1", "a2"]},
+            {"company": "B", "highlights": ["b1", "b2", "b3"]},
+            {"company": "C", "highlights": ["slow c1", "c2"]},
+        ]
+    }
+    started = time.perf_counter()
+    customized = asyncio.run(generator_server._customize_profile_safe(
+        profile, {"required_skills": ["Python"]}, {}
+    ))
+    elapsed = time.perf_counter() - started
+
+    assert [exp["highlights"] for exp in customized["experience"]] == [
+        ["a2", "a1"], ["b3", "b2", "b1"], ["slow c1", "c2"]
+    ]
+    assert elapsed < 1.0  # Sequential calls alone would take 0.6 s before the slow one
+
+
+def test_single_request_mode_validates_each_section(tmp_path, monkeypatch):
+    """One schema-constrained request covers every section; a bad section alone falls back"""
+    monkeypatch.setattr(generator_server, "DB_PATH", str(tmp_path / "jobs.db"))
+    requests = []
+
+    async def ollama(request):
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": []})
+        body = json.loads(request.content)
+        requests.append(body)
+        answer = {key: spec["minItems"] * ["x"] for key, spec in body["format"]["properties"].items()}
+        answer["experience_1"] = ["too", "few"]
+        return httpx.Response(200, json={"response": json.dumps(answer)})
+
+    monkeypatch.setattr(generator_server, "_get_ollama_client", lambda: (
+        httpx.AsyncClient(transport=httpx.MockTransport(ollama)), asyncio.Semaphore(4)
+    ))
+    profile = {
+        "skills": {},
+        "experience": [{"highlights": ["a1", "a2"]}, {"highlights": ["b1", "b2", "b3"]}],
+        "projects": [{"title": "P", "highlights": ["p1"]}, {"title": "Q"}]
+    }
+    customized = asyncio.run(generator_server._customize_profile_safe(
+        profile, {"required_skills": []}, {}, mode="single_request", include_projects=True
+    ))
+
+    assert len(requests) == 1
+    assert requests[0]["format"]["required"] == ["experience_0", "experience_1", "projects_0"]
+    assert [exp["highlights"] for exp in customized["experience"]] == [["x", "x"], ["b1", "b2", "b3"]]
+    assert customized["projects"][0]["highlights"] == ["x"]
+
+
+def test_single_request_processes_job_requirements_once(tmp_path, monkeypatch):
+    """single_request sends one prompt for every entry where per_entry sends one per entry"""
+    requests = []
+
+    def mock_client():
+        async def ollama(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": []})
+            body = json.loads(request.content)
+            requests.append(body)
+            if "format" in body:
+                answer = {key: spec["minItems"] * ["x"] for key, spec in body["format"]["properties"].items()}
+            else:
+                answer = int(body["prompt"].split("keep count=")[1].split(")")[0]) * ["x"]
+            return httpx.Response(200, json={"response": json.dumps(answer)})
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(ollama)), asyncio.Semaphore(4)
+    monkeypatch.setattr(generator_server, "_get_ollama_client", mock_client)
+
+    profile = {"skills": {}, "experience": [{"highlights": [f"h{j}.{i}" for i in range(4)]} for j in range(6)]}
+    analysis = {"required_skills": ["Python", "PyTorch"]}
+    results, sent = {}, {}
+    for mode in ("per_entry", "single_request"):
+        monkeypatch.setattr(generator_server, "DB_PATH", str(tmp_path / f"{mode}.db"))  # Cold highlight cache
+        requests.clear()
+        results[mode] = asyncio.run(generator_server._customize_profile_safe(
+            copy.deepcopy(profile), analysis, {}, mode=mode
+        ))
+        sent[mode] = [body["prompt"].count('"Python", "PyTorch"') for body in requests]
+
+    assert results["per_entry"]["experience"] == results["single_request"]["experience"]
+    assert results["per_entry"]["experience"][0]["highlights"] == 4 * ["x"]
+    # Requirements are prompt-processed once per request: 6 passes vs 1
+    assert sent == {"per_entry": 6 * [1], "single_request": [1]}
+
+
+def test_highlight_cache_skips_ollama_for_same_skills(tmp_path, monkeypatch):
+    """Same highlights and canonical required skills hit the cache; concurrent resumes share a request"""
+    monkeypatch.setattr(generator_server, "DB_PATH", str(tmp_path / "jobs.db"))
+    prompts = []
+
+    async def ollama(request):
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": []})
+        prompt = json.loads(request.content)["prompt"]
+        prompts.append(prompt)
+        await asyncio.sleep(0.05)
+        highlights = json.loads(prompt.split("Original Highlights")[1].split("\n")[1])
+        return httpx.Response(200, json={"response": json.dumps(highlights[::-1])})
+
+    monkeypatch.setattr(generator_server, "_get_ollama_client", lambda: (
+        httpx.AsyncClient(transport=httpx.MockTransport(ollama)), asyncio.Semaphore(4)
+    ))
+    profile = {"skills": {}, "experience": [{"highlights": ["a1", "a2"]}, {"highlights": ["b1", "b2"]}]}
+    customize = lambda required: generator_server._customize_profile_safe(
+        copy.deepcopy(profile), {"required_skills": required}, {}
+    )
+
+    async def two_similar_jobs():
+        return await asyncio.gather(customize(["Python", "PyTorch"]), customize(["PyTorch", "Python"]))
+
+    first, second = asyncio.run(two_similar_jobs())
+    assert len(prompts) == 2  # One per experience entry, shared by both resumes
+    assert first["experience"] == second["experience"]
+    assert first["experience"][0]["highlights"] == ["a2", "a1"]
+
+    cached = asyncio.run(customize(["pytorch", "python"]))  # Same canonical skills
+    assert len(prompts) == 2
+    assert cached["experience"] == first["experience"]
+
+    asyncio.run(customize(["Java"]))
+    assert len(prompts) == 4
+
+
+def test_highlight_cache_key_covers_every_prompt_input(tmp_path, monkeypatch):
+    """Modes never share answers; job fields the prompts do not contain do not split the cache"""
+    monkeypatch.setattr(generator_server, "DB_PATH", str(tmp_path / "jobs.db"))
+    prompts = []
+
+    async def ollama(request):
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": []})
+        body = json.loads(request.content)
+        prompts.append(body["prompt"])
+        if "format" in body:
+            answer = {key: spec["minItems"] * ["x"] for key, spec in body["format"]["properties"].items()}
+        else:
+            answer = json.loads(body["prompt"].split("Original Highlights")[1].split("\n")[1])[::-1]
+        return httpx.Response(200, json={"response": json.dumps(answer)})
+
+    monkeypatch.setattr(generator_server, "_get_ollama_client", lambda: (
+        httpx.AsyncClient(transport=httpx.MockTransport(ollama)), asyncio.Semaphore(4)
+    ))
+    profile = {"skills": {}, "experience": [{"highlights": ["a1", "a2"]}]}
+    customize = lambda analysis, mode: asyncio.run(generator_server._customize_profile_safe(
+        profile, dict({"required_skills": ["Python"]}, **analysis), {}, mode=mode
+    ))
+
+    per_entry = customize({"ats_keywords": ["Kubernetes"], "title": "ML Engineer"}, "per_entry")
+    assert "Kubernetes" not in prompts[0] and "ML Engineer" not in prompts[0]
+    assert customize({"ats_keywords": ["Excel"], "title": "Analyst"}, "per_entry") == per_entry
+    assert len(prompts) == 1
+
+    single = customize({}, "single_request")
+    assert len(prompts) == 2
+    assert single["experience"][0]["highlights"] == ["x", "x"] != per_entry["experience"][0]["highlights"]
+
+    required_key = generator_server._required_skills_key({"required_skills": ["Python"]})
+    keys = {
+        mode: generator_server._highlight_cache_key(["a1", "a2"], required_key, mode)
+        for mode in generator_server.CUSTOMIZATION_PROMPTS
+    }
+    assert len(set(keys.values())) == len(generator_server.PROMPT_VERSIONS) == 2
+
+
+def test_highlight_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    """Over the entry budget, the entries used longest ago are dropped"""
+    monkeypatch.setattr(generator_server, "DB_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(generator_server, "HIGHLIGHT_CACHE_MAX_ENTRIES", 2)
+
+    generator_server._highlight_cache_put({"a": ["1"]})
+    generator_server._highlight_cache_put({"b": ["2"]})
+    assert generator_server._highlight_cache_get(["a"]) == {"a": ["1"]}  # a is now more recent than b
+    generator_server._highlight_cache_put({"c": ["3"]})
+    assert generator_server._highlight_cache_get(["a", "b", "c"]).keys() == {"a", "c"}
+
+    monkeypatch.setattr(generator_server, "HIGHLIGHT_CACHE_MAX_ENTRIES", 100)
+    monkeypatch.setattr(generator_server, "HIGHLIGHT_CACHE_MAX_BYTES", 12)  # Room for two '["x"]' entries
+    generator_server._highlight_cache_get(["c"])
+    generator_server._highlight_cache_put({"d": ["4"]})
+    assert generator_server._highlight_cache_get(["a", "c", "d"]).keys() == {"c", "d"}
+
+
+def test_rank_highlights_orders_by_job_overlap_without_dropping():
+    """Bullets mentioning required skills and ATS keywords move up; ties keep profile order"""
+    highlights = [
+        "Organised the team offsite",
+        "Built dashboards for finance",
+        "Deployed PyTorch models on AWS with Docker",
+        "Trained deep-learning models in Python",
+    ]
+    job_terms = generator_server._job_terms({
+        "required_skills": ["PyTorch", "AWS", "Python", "Deep Learning"],
+        "ats_keywords": ["dashboards"]
+    })
+
+    ranked = generator_server.rank_highlights(highlights, job_terms)
+    assert ranked == [
+        "Deployed PyTorch models on AWS with Docker",
+        "Trained deep-learning models in Python",
+        "Built dashboards for finance",
+        "Organised the team offsite",
+    ]
+    assert generator_server.rank_highlights(highlights, []) == highlights
+
+
+def test_no_ai_customization_keeps_every_highlight(tmp_path, monkeypatch):
+    """The rule-based path ranks all bullets, steered by the recommended variant, without adding any"""
+    monkeypatch.setattr(generator_server, "DB_PATH", str(tmp_path / "jobs.db"))
+    highlights = ["Wrote Java services", "Led hiring", "Built payment services for the backend", "Shipped Python tooling"]
+    profile = {
+        "skills": {},
+        "experience": [{
+            "highlights": highlights,
+            "latex_variants": {"backend_focused": "Built backend payment services"}
+        }]
+    }
+    customized = generator_server._customize_profile_no_ai(
+        copy.deepcopy(profile), {"required_skills": ["Python"], "ats_keywords": []},
+        {"recommended_variant": "backend_focused"}
+    )
+    assert customized["experience"][0]["highlights"] == [
+        "Shipped Python tooling", "Built payment services for the backend", "Wrote Java services", "Led hiring"
+    ]
+    assert generator_server._validate_structure(profile, customized)
+
+
+def test_customization_overlays_leave_shared_profile_untouched(template_env, tmp_path, monkeypatch):
+    """Jobs customize one shared profile through overlays: no copies, no leaks between jobs"""
+    monkeypatch.setattr(generator_server, "DB_PATH", str(tmp_path / "jobs.db"))
+    shutil.copytree(SHIPPED_TEMPLATES, template_env, dirs_exist_ok=True)
+    profile = dict(PROFILE, experience=[
+        {"role": "Analyst", "company": "Babbage & Co", "duration": "1842",
+         "highlights": ["Wrote C++ drivers", "Ran C# tooling"]},
+        {"role": "Scribe", "company": "Royal Society", "duration": "1843", "highlights": ["Took notes"]}
+    ])
+    snapshot = copy.deepcopy(profile)
+    options = generator_server.CustomizationOptions(use_ai=False)
+
+    customize = lambda skill: asyncio.run(generator_server._customize_for_job(
+        profile, {"required_skills": [skill], "ats_keywords": []}, {}, options
+    ))
+    for_cs, for_cpp = customize("C#"), customize("C++")
+
+    assert profile == snapshot
+    assert for_cs["experience"][0]["highlights"] == ["Ran C# tooling", "Wrote C++ drivers"]
+    assert for_cpp["experience"][0]["highlights"] == ["Wrote C++ drivers", "Ran C# tooling"]
+    assert for_cs["skills"]["programming_languages"] == ["C#", "C++"]
+    assert for_cs["personal"] is profile["personal"] and for_cs["education"] is profile["education"]
+
+    template = generator_server._get_template_env().get_template("resume_template.tex")
+    merged = dict(copy.deepcopy(profile), skills=for_cs["skills"])
+    merged["experience"][0]["highlights"] = ["Ran C# tooling", "Wrote C++ drivers"]
+    merged["experience"][1]["highlights"] = for_cs["experience"][1]["highlights"]
+    assert template.render(**for_cs) == template.render(**merged)
@@ -0,0 +1,584 @@
+"""
+Matcher Server Tests
+Scoring logic against a temporary SQLite database
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import embeddings
+import matcher.matcher_server as matcher_server
+import preferences
+import relevance
+from profiles import stable_profile_id
+from skills import get_vocabulary
+
+
+PROFILE = {
+    "skills": {
+        "programming_languages": ["Python"],
+        "ml_frameworks": ["TensorFlow", "PyTorch"],
+        "cloud_platforms": ["AWS"]
+    },
+    "experience": [
+        {
+            "highlights": ["Developed machine-learning models for Bosch vehicles"],
+            "technologies": ["Python", "PyTorch", "FastAPI"]
+        }
+    ],
+    "metadata": {"years_of_experience": "3.5"}
+}
+
+ANALYSES = {
+    "ml": (["Python", "PyTorch", "Docker"], ["AWS"], "ML Engineer", "Mid"),
+    "backend": (["Java", "Spring"], [], "Backend Engineer", "Senior"),
+    "open": ([], ["Python"], "Data Scientist", "Lead"),
+}
+
+DESCRIPTIONS = {
+    "ml": "<p>Train <b>PyTorch</b> models for vehicle perception with Python.</p>",
+    "backend": "Build Java Spring services for our payments platform.",
+    "open": "Analyse product metrics and build dashboards.",
+}
+
+
+@pytest.fixture
+def jobs_db(tmp_path, monkeypatch):
+    """Temporary jobs.db with analyzed jobs and a profile file"""
+    db_path = str(tmp_path / "jobs.db")
+    monkeypatch.setattr(matcher_server, "DB_PATH", db_path)
+    monkeypatch.setattr(preferences, "PREFERENCES_FILE", tmp_path / "preferences.json")
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            job_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            company TEXT NOT NULL,
+            location TEXT,
+            description TEXT,
+            requirements TEXT,
+            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            status TEXT DEFAULT 'new'
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE job_analysis (
+            analysis_id TEXT PRIMARY KEY,
+            job_id TEXT,
+            required_skills TEXT,
+            nice_to_have_skills TEXT,
+            ats_keywords TEXT,
+            role_category TEXT,
+            experience_level TEXT,
+            analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for job_id, (required, nice, category, level) in ANALYSES.items():
+        conn.execute(
+            "INSERT INTO jobs (job_id, title, company, description, status) VALUES (?, ?, ?, ?, 'analyzed')",
+            (job_id, f"{category} role", "Acme", DESCRIPTIONS[job_id])
+        )
+        conn.execute(
+            "INSERT INTO job_analysis VALUES (?, ?, ?, ?, '[]', ?, ?, CURRENT_TIMESTAMP)",
+            (job_id, job_id, json.dumps(required), json.dumps(nice), category, level)
+        )
+    conn.commit()
+    conn.close()
+
+    profile_path = tmp_path / "profile.json"
+    profile_path.write_text(json.dumps(PROFILE))
+
+    return {"db_path": db_path, "profile_path": str(profile_path)}
+
+
+def _stored_scores(db_path):
+    """Match rows of the fixture profile (stored next to the database)"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    rows = {row["job_id"]: dict(row) for row in conn.execute(
+        "SELECT * FROM match_scores WHERE profile_id = ?",
+        (stable_profile_id(os.path.join(os.path.dirname(db_path), "profile.json")),)
+    )}
+    conn.close()
+    return rows
+
+
+def test_match_all_agrees_with_match_profile(jobs_db):
+    """Vectorized batch scores equal the per-job scores"""
+    result = json.loads(asyncio.run(matcher_server.match_all(
+        matcher_server.MatchAllInput(profile_path=jobs_db["profile_path"])
+    )))
+    assert result["matched"] == len(ANALYSES)
+    batch = _stored_scores(jobs_db["db_path"])
+
+    for job_id in ANALYSES:
+        asyncio.run(matcher_server.match_profile(
+            matcher_server.MatchProfileInput(job_id=job_id, profile_path=jobs_db["profile_path"])
+        ))
+    single = _stored_scores(jobs_db["db_path"])
+
+    for job_id in ANALYSES:
+        for key in ("overall_score", "skills_score", "experience_score", "domain_score",
+                    "relevance_score", "semantic_score", "recommended_variant", "skills_to_emphasize"):
+            assert batch[job_id][key] == pytest.approx(single[job_id][key]), (job_id, key)
+
+
+def test_match_all_resolves_skill_ids_once_and_skips_unchanged_rows(jobs_db, monkeypatch):
+    """Skill IDs are read per field for the whole corpus; a rerun rewrites no unchanged row"""
+    calls = []
+    batch_skill_ids = matcher_server.batch_skill_ids
+
+    def counting(analyses, field, db_path):
+        calls.append((len(analyses), field))
+        return batch_skill_ids(analyses, field, db_path)
+
+    monkeypatch.setattr(matcher_server, "batch_skill_ids", counting)
+    match_all = lambda: asyncio.run(matcher_server.match_all(
+        matcher_server.MatchAllInput(profile_path=jobs_db["profile_path"])
+    ))
+    match_all()
+    assert calls == [(len(ANALYSES), "required_skills"), (len(ANALYSES), "nice_to_have_skills")]
+
+    conn = sqlite3.connect(jobs_db["db_path"])
+    conn.execute("CREATE TABLE writes (job_id TEXT)")
+    conn.execute("CREATE TRIGGER log_writes AFTER UPDATE ON match_scores BEGIN INSERT INTO writes VALUES (new.job_id); END")
+    conn.commit()
+
+    match_all()
+    assert conn.execute("SELECT job_id FROM writes").fetchall() == []
+
+    conn.execute("UPDATE job_analysis SET experience_level = 'Entry' WHERE job_id = 'open'")
+    conn.commit()
+    match_all()
+    assert conn.execute("SELECT job_id FROM writes").fetchall() == [("open",)]
+    conn.close()
+
+
+def test_profile_index_cached_until_file_changes(jobs_db):
+    """Same index object while unchanged, rebuilt after an edit"""
+    path = jobs_db["profile_path"]
+    vocabulary = get_vocabulary(jobs_db["db_path"])
+    first = matcher_server._load_profile_index(path)
+    assert matcher_server._load_profile_index(path) is first
+    assert vocabulary.lookup("pytorch") in first.skills
+    assert first.has_ml and first.has_automotive
+
+    profile = json.loads(open(path).read())
+    profile["skills"]["cloud_platforms"].append("Kubernetes Operators")
+    with open(path, "w") as f:
+        json.dump(profile, f)
+    os.utime(path, ns=(1, 1))  # Force a different mtime on coarse filesystems
+
+    second = matcher_server._load_profile_index(path)
+    assert second is not first
+    assert second.version != first.version
+    assert vocabulary.lookup("kubernetes operators") in second.skills
+
+
+def test_implied_skills_count_towards_requirements(jobs_db):
+    """A job asking for Deep Learning is covered by PyTorch/TensorFlow in the profile"""
+    index = matcher_server._load_profile_index(jobs_db["profile_path"])
+    analysis = {"required_skills": ["Deep Learning", "Machine Learning"], "nice_to_have_skills": []}
+
+    assert matcher_server._calculate_skills_match(index, analysis) == 100.0
+    assert matcher_server._identify_skills_to_emphasize(index, analysis) == ["TensorFlow"]
+
+
+def test_messy_requirements_resolve_fuzzily(jobs_db):
+    """LLM-extracted requirement strings still match the profile's skills"""
+    index = matcher_server._load_profile_index(jobs_db["profile_path"])
+    analysis = {
+        "required_skills": ["Python 3.x", "experience with PyTorch/TensorFlow", "AWS (EC2, S3)", "Tensorflow2"],
+        "nice_to_have_skills": []
+    }
+
+    assert matcher_server._calculate_skills_match(index, analysis) == 100.0
+    assert matcher_server._identify_skills_to_emphasize(index, analysis) == ["Python", "PyTorch", "TensorFlow", "AWS"]
+
+
+def test_relevance_ranks_matching_descriptions_first(jobs_db):
+    """BM25 relevance is stored with the scores and usable as list_matches order"""
+    asyncio.run(matcher_server.match_all(
+        matcher_server.MatchAllInput(profile_path=jobs_db["profile_path"])
+    ))
+    stored = _stored_scores(jobs_db["db_path"])
+    assert stored["ml"]["relevance_score"] > stored["open"]["relevance_score"] == 0.0
+    assert stored["ml"]["semantic_score"] > 0.0
+
+    # Jobs below the match threshold are not text-scored
+    assert stored["backend"]["overall_score"] < 70.0
+    assert stored["backend"]["relevance_score"] is None
+    assert stored["backend"]["semantic_score"] is None
+
+    preferences.update_preference("match_threshold", 0.0)
+    asyncio.run(matcher_server.match_all(
+        matcher_server.MatchAllInput(profile_path=jobs_db["profile_path"])
+    ))
+    stored = _stored_scores(jobs_db["db_path"])
+    assert stored["ml"]["relevance_score"] > stored["backend"]["relevance_score"]
+    assert stored["ml"]["semantic_score"] > stored["backend"]["semantic_score"]
+
+    result = json.loads(asyncio.run(matcher_server.list_matches(
+        matcher_server.ListMatchesInput(profile_path=jobs_db["profile_path"], min_score=0, rank_by="relevance_score")
+    )))
+    assert result["matches"][0]["job_id"] == "ml"
+
+    # Jobs added later are indexed incrementally without touching existing postings
+    conn = sqlite3.connect(jobs_db["db_path"])
+    assert relevance.index_jobs(conn, [("ml", "ignored"), ("new", "Python PyTorch vehicle")]) == 1
+    conn.commit()
+    doc_freq = dict(conn.execute("SELECT term, doc_freq FROM term_stats"))
+    conn.close()
+    assert doc_freq["pytorch"] == 2
+    assert doc_freq["java"] == 1
+
+
+def test_unreachable_embedding_backend_leaves_semantic_unknown(jobs_db, monkeypatch):
+    """With EMBEDDING_MODEL set and Ollama down, matching still succeeds without semantic scores"""
+    monkeypatch.setattr(embeddings, "EMBEDDING_MODEL", "nomic-embed-text")
+    monkeypatch.setattr(embeddings, "OLLAMA_EMBEDDINGS_URL", "http://127.0.0.1:9/api/embeddings")
+
+    result = json.loads(asyncio.run(matcher_server.match_profile(
+        matcher_server.MatchProfileInput(job_id="ml", profile_path=jobs_db["profile_path"])
+    )))
+    assert result["breakdown"]["semantic"] is None
+    assert result["overall_score"] > 0
+
+    result = json.loads(asyncio.run(matcher_server.match_all(
+        matcher_server.MatchAllInput(profile_path=jobs_db["profile_path"])
+    )))
+    assert result["matched"] == len(ANALYSES)
+    assert {scores["semantic_score"] for scores in _stored_scores(jobs_db["db_path"]).values()} == {None}
+
+
+def test_relevance_scale_on_realistic_descriptions():
+    """A whole-profile query spreads real job descriptions over 0-100 instead of near zero"""
+    profile_text = """Developed deep learning perception models in PyTorch for autonomous driving at Bosch,
+        deployed with Docker and Kubernetes on AWS. Built FastAPI microservices and data pipelines in
+        Python with PostgreSQL and Kafka. Led a team of four engineers; optimized inference latency with
+        TensorRT and ONNX. Projects: lane detection with computer vision, sensor fusion of radar and
+        lidar, MLOps platform with MLflow and Airflow."""
+    jobs = {
+        "ml": """Machine Learning Engineer, Perception. You will develop deep learning models for
+            autonomous driving using PyTorch, deploy them with Docker and Kubernetes on AWS, and optimize
+            inference with TensorRT. Experience with computer vision, sensor fusion, lidar and radar is a
+            plus. You will work with MLflow and Airflow in our MLOps platform.""",
+        "backend": """Senior Backend Engineer. Build Python FastAPI microservices backed by PostgreSQL
+            and Kafka, deployed with Docker on AWS. You will own data pipelines and mentor engineers.""",
+        "data": """Data Analyst. Write SQL queries, build dashboards in Tableau, analyse product metrics
+            and present insights to stakeholders. Python is a plus.""",
+        "frontend": """Frontend Developer. Build React and TypeScript interfaces, work with designers on
+            accessibility and write unit tests with Jest.""",
+        "sales": """Account Executive. Own the full sales cycle, negotiate contracts with enterprise
+            customers and exceed quarterly revenue targets.""",
+    }
+    conn = sqlite3.connect(":memory:")
+    relevance.index_jobs(conn, jobs.items())
+    scores = relevance.bm25_scores(conn, set(relevance.tokenize(profile_text)))
+    conn.close()
+
+    assert all(0.0 <= score < 100.0 for score in scores.values())
+    assert scores["ml"] > 50.0
+    assert 30.0 < scores["backend"] < scores["ml"]
+    assert scores["data"] < 20.0
+    assert scores["frontend"] == scores["sales"] == 0.0
+
+
+def test_similar_jobs_seeded_by_interviews(jobs_db):
+    """Jobs like the one that got an interview rank first; applied and seed jobs are excluded"""
+    conn = sqlite3.connect(jobs_db["db_path"])
+    conn.execute("CREATE TABLE applications (application_id TEXT, job_id TEXT, status TEXT)")
+    conn.execute("INSERT INTO applications VALUES ('a1', 'ml', 'interview')")
+    conn.execute("INSERT INTO applications VALUES ('a2', 'open', 'submitted')")
+    conn.execute(
+        "INSERT INTO jobs (job_id, title, company, description) VALUES (?, ?, ?, ?)",
+        ("ml2", "ML Engineer role", "Initech", "Train PyTorch perception models for vehicles in Python.")
+    )
+    conn.commit()
+    conn.close()
+    # Vectors are written at ingest; the fixture stores jobs directly
+    embeddings.get_vector_store(jobs_db["db_path"]).add_missing_jobs()
+
+    result = json.loads(asyncio.run(matcher_server.similar_jobs(
+        matcher_server.SimilarJobsInput(seed_statuses=["interview"], limit=5)
+    )))
+    assert result["seeds"] == ["ml"]
+    assert [job["job_id"] for job in result["similar_jobs"]] == ["ml2", "backend"]
+
+
+def test_rematch_stale_rescores_only_affected_jobs(jobs_db):
+    """A skill-only profile edit rescores just the jobs mentioning that skill"""
+    path = jobs_db["profile_path"]
+    rematch = lambda: json.loads(asyncio.run(matcher_server.rematch_stale(
+        matcher_server.RematchStaleInput(profile_path=path)
+    )))
+
+    assert rematch()["rescored"] == len(ANALYSES)  # Nothing matched yet
+    assert rematch()["rescored"] == 0
+
+    profile = json.loads(open(path).read())
+    profile["skills"]["programming_languages"].append("Java")
+    with open(path, "w") as f:
+        json.dump(profile, f)
+    os.utime(path, ns=(2, 2))
+
+    result = rematch()
+    assert (result["rescored"], result["restamped"]) == (1, len(ANALYSES) - 1)
+    incremental = _stored_scores(jobs_db["db_path"])
+
+    asyncio.run(matcher_server.match_all(matcher_server.MatchAllInput(profile_path=path)))
+    full = _stored_scores(jobs_db["db_path"])
+    for job_id in ANALYSES:
+        for key in ("overall_score", "skills_score", "skills_to_emphasize", "profile_version"):
+            assert incremental[job_id][key] == full[job_id][key], (job_id, key)
+
+    # Re-analyzing a job makes just that row stale
+    conn = sqlite3.connect(jobs_db["db_path"])
+    conn.execute("UPDATE job_analysis SET experience_level = 'Entry' WHERE job_id = 'open'")
+    conn.commit()
+    conn.close()
+    assert rematch()["rescored"] == 1
+
+
+def test_weights_come_from_preferences_and_simulate(jobs_db):
+    """Stored scores follow preference weights; simulate_weights re-ranks without rescoring"""
+    path = jobs_db["profile_path"]
+    asyncio.run(matcher_server.match_all(matcher_server.MatchAllInput(profile_path=path)))
+    default = _stored_scores(jobs_db["db_path"])
+
+    preferences.update_preference("match_weights", {"skills": 1, "experience": 0, "domain": 0})
+    result = json.loads(asyncio.run(matcher_server.rematch_stale(
+        matcher_server.RematchStaleInput(profile_path=path)
+    )))
+    assert result["rescored"] == len(ANALYSES)  # A config change invalidates every row
+    skills_only = _stored_scores(jobs_db["db_path"])
+    for job_id in ANALYSES:
+        assert skills_only[job_id]["overall_score"] == pytest.approx(default[job_id]["skills_score"])
+
+    conn = sqlite3.connect(jobs_db["db_path"])
+    conn.execute("CREATE TABLE applications (application_id TEXT, job_id TEXT, status TEXT)")
+    conn.execute("INSERT INTO applications VALUES ('a1', 'ml', 'interview')")
+    conn.commit()
+    conn.close()
+
+    result = json.loads(asyncio.run(matcher_server.simulate_weights(matcher_server.SimulateWeightsInput(
+        profile_path=jobs_db["profile_path"], weights=[[0.4, 0.3, 0.3], [0, 0, 2]], threshold=50, top_n=2
+    ))))
+    first, second = result["simulations"]
+    assert result["good_outcomes"] == 1
+    assert first["ranking"][0]["overall_score"] == pytest.approx(
+        max(row["overall_score"] for row in default.values()), abs=0.01
+    )
+    assert second["weights"] == [0, 0, 1]
+    assert second["passing"] == sum(row["domain_score"] >= 50 for row in default.values())
+    assert first["good_outcomes_passing"] == int(default["ml"]["overall_score"] >= 50)
+
+
+def test_list_matches_filters_and_uses_ranking_index(jobs_db):
+    """Top-K reads walk the ranked column's index (no sort); filters drop applied jobs and other companies"""
+    asyncio.run(matcher_server.match_all(matcher_server.MatchAllInput(profile_path=jobs_db["profile_path"])))
+    conn = sqlite3.connect(jobs_db["db_path"])
+    conn.execute("UPDATE jobs SET status = 'applied' WHERE job_id = 'ml'")
+    conn.execute("UPDATE jobs SET company = 'Globex' WHERE job_id = 'backend'")
+    conn.commit()
+
+    list_matches = lambda **kwargs: json.loads(asyncio.run(matcher_server.list_matches(
+        matcher_server.ListMatchesInput(profile_path=jobs_db["profile_path"], min_score=0, **kwargs)
+    )))["matches"]
+    all_ids = [match["job_id"] for match in list_matches()]
+    assert "ml" not in [match["job_id"] for match in list_matches(exclude_applied=True)]
+    assert [match["job_id"] for match in list_matches(company="globex")] == ["backend"]
+    assert len(list_matches(max_age_days=1)) == len(all_ids)
+
+    # The query list_matches runs walks the index of the ranked column for every order
+    for rank_by in ("overall_score", "relevance_score", "semantic_score", "outcome_probability"):
+        for filters in ({}, {"exclude_applied": True, "company": "globex", "max_age_days": 7}):
+            params = matcher_server.ListMatchesInput(
+                profile_path=jobs_db["profile_path"], rank_by=rank_by, **filters
+            )
+            sql, args = matcher_server._list_matches_query(conn.cursor(), params)
+            plan = " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", args))
+            assert f"idx_match_scores_profile_{rank_by} " in plan, (rank_by, plan)
+            assert "TEMP B-TREE" not in plan, (rank_by, plan)
+    conn.close()
+
+
+def test_read_only_tools_leave_database_untouched(jobs_db):
+    """list_matches, simulate_weights and similar_jobs don't create, migrate or backfill tables"""
+    def schema():
+        conn = sqlite3.connect(jobs_db["db_path"])
+        rows = conn.execute("SELECT name, sql FROM sqlite_master ORDER BY name").fetchall()
+        conn.close()
+        return rows
+
+    before = schema()
+    result = json.loads(asyncio.run(matcher_server.list_matches(matcher_server.ListMatchesInput(min_score=0))))
+    assert result["count"] == 0
+    assert asyncio.run(matcher_server.simulate_weights(
+        matcher_server.SimulateWeightsInput(weights=[[1, 0, 0]])
+    )).startswith("Error: No match scores found")
+    assert asyncio.run(matcher_server.similar_jobs(
+        matcher_server.SimilarJobsInput(job_ids=["ml"])
+    )).startswith("Error: No embedded seed jobs found")
+    assert schema() == before
+
+    matcher_server._migrate_database()
+    assert "match_scores" in [name for name, _ in schema()]
+
+
+def test_match_profiles_scores_matrix_per_profile(jobs_db, tmp_path):
+    """Each profile gets its own rows, equal to matching it alone"""
+    backend = {
+        "profile_id": "backend",
+        "skills": {"programming_languages": ["Java"], "frameworks": ["Spring"]},
+        "experience": [{"highlights": ["Built payment services"], "technologies": ["Java", "Spring"]}],
+        "metadata": {"years_of_experience": "8"}
+    }
+    backend_path = tmp_path / "backend.json"
+    backend_path.write_text(json.dumps(backend))
+    paths = [jobs_db["profile_path"], str(backend_path)]
+
+    result = json.loads(asyncio.run(matcher_server.match_profiles(
+        matcher_server.MatchProfilesInput(profile_paths=paths, limit=1)
+    )))
+    assert result["profiles"] == 2 and result["jobs"] == len(ANALYSES)
+
+    conn = sqlite3.connect(jobs_db["db_path"])
+    conn.row_factory = sqlite3.Row
+    matrix = {(row["profile_id"], row["job_id"]): dict(row) for row in conn.execute("SELECT * FROM match_scores")}
+    conn.close()
+    assert len(matrix) == 2 * len(ANALYSES)
+    profile_id = stable_profile_id(jobs_db["profile_path"])
+    assert matrix[("backend", "backend")]["skills_score"] > matrix[(profile_id, "backend")]["skills_score"]
+    best = max(ANALYSES, key=lambda job_id: matrix[("backend", job_id)]["overall_score"])
+    assert result["top_matches"]["backend"][0]["job_id"] == best
+
+    for path in paths:
+        asyncio.run(matcher_server.match_all(matcher_server.MatchAllInput(profile_path=path)))
+    conn = sqlite3.connect(jobs_db["db_path"])
+    conn.row_factory = sqlite3.Row
+    single = {(row["profile_id"], row["job_id"]): dict(row) for row in conn.execute("SELECT * FROM match_scores")}
+    conn.close()
+    assert single.keys() == matrix.keys()
+    for key, row in matrix.items():
+        for column in ("overall_score", "skills_score", "experience_score", "domain_score",
+                       "relevance_score", "semantic_score", "skills_to_emphasize", "profile_version"):
+            assert row[column] == pytest.approx(single[key][column]), (key, column)
+
+    backend_only = json.loads(asyncio.run(matcher_server.list_matches(
+        matcher_server.ListMatchesInput(profile_path=str(backend_path), min_score=0)
+    )))
+    assert backend_only["count"] == len(ANALYSES)
+    assert backend_only["matches"][0]["job_id"] == best
+
+
+def test_profiles_with_same_file_name_keep_separate_rows(jobs_db, tmp_path):
+    """alice/profile.json and bob/profile.json don't collide; pre-ID rows go to the first claimant"""
+    conn = sqlite3.connect(jobs_db["db_path"])
+    matcher_server._ensure_match_table(conn.cursor())
+    conn.execute(
+        "INSERT INTO match_scores (match_id, profile_id, job_id, overall_score) VALUES ('profile:legacy', 'profile', 'legacy', 50)"
+    )
+    conn.commit()
+    conn.close()
+
+    paths = []
+    for name in ("alice", "bob"):
+        (tmp_path / name).mkdir()
+        paths.append(tmp_path / name / "profile.json")
+        paths[-1].write_text(json.dumps(PROFILE))
+        asyncio.run(matcher_server.match_all(matcher_server.MatchAllInput(profile_path=str(paths[-1]))))
+
+    conn = sqlite3.connect(jobs_db["db_path"])
+    rows = conn.execute("SELECT profile_id, match_id, job_id FROM match_scores").fetchall()
+    conn.close()
+    alice, bob = (stable_profile_id(str(path)) for path in paths)
+    assert alice != bob
+    assert {job_id for profile_id, _, job_id in rows if profile_id == bob} == set(ANALYSES)
+    assert {job_id for profile_id, _, job_id in rows if profile_id == alice} == set(ANALYSES) | {"legacy"}
+    assert "profile" not in {profile_id for profile_id, _, _ in rows}
+    assert all(match_id == f"{profile_id}:{job_id}" for profile_id, match_id, job_id in rows)
+
+    # An explicit profile_id shared by two profiles is reported by name
+    for path in paths:
+        path.write_text(json.dumps({**PROFILE, "profile_id": "shared"}))
+    result = asyncio.run(matcher_server.match_profiles(
+        matcher_server.MatchProfilesInput(profile_paths=[str(path) for path in paths])
+    ))
+    assert result.startswith("Error: Profiles share the profile_id shared,")
+    assert '"profile_id" fields' in result
+
+
+def test_fit_logistic_recovers_coefficients():
+    """Newton's method finds the generating coefficients on plenty of data"""
+    rng = np.random.default_rng(0)
+    X = rng.random((5000, 2))
+    y = (rng.random(5000) < 1 / (1 + np.exp(-(4 * X[:, 0] - 2 * X[:, 1] - 1)))).astype(float)
+
+    coefficients, intercept = matcher_server._fit_logistic(X, y, l2=0.0)
+    assert coefficients == pytest.approx([4, -2], abs=0.4)
+    assert intercept == pytest.approx(-1, abs=0.3)
+
+
+def test_calibrate_scores_from_application_outcomes(jobs_db):
+    """Outcomes that follow the skills score give it a positive weight and a stored probability"""
+    path = jobs_db["profile_path"]
+    rng = np.random.default_rng(1)
+    conn = sqlite3.connect(jobs_db["db_path"])
+    matcher_server._ensure_match_table(conn.cursor())
+    conn.execute("""
+        CREATE TABLE applications (
+            application_id TEXT PRIMARY KEY, job_id TEXT, status TEXT,
+            applied_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for i in range(60):
+        skills = float(rng.uniform(0, 100))
+        conn.execute(
+            "INSERT INTO match_scores (match_id, profile_id, job_id, overall_score, skills_score, "
+            "experience_score, domain_score) VALUES (?, 'profile', ?, ?, ?, 80, 60)",
+            (f"profile:old{i}", f"old{i}", skills, skills)
+        )
+        status = "interview" if skills + rng.normal(0, 15) > 60 else "rejected"
+        conn.execute("INSERT INTO applications (application_id, job_id, status) VALUES (?, ?, ?)",
+                     (f"a{i}", f"old{i}", status))
+    # Pending and recent: not an outcome yet; withdrawn: never an outcome
+    conn.execute("INSERT INTO applications (application_id, job_id, status) VALUES ('fresh', 'ml', 'submitted')")
+    for status in ("under_review", "withdrawn"):
+        conn.execute(
+            "INSERT INTO match_scores (match_id, profile_id, job_id, overall_score, skills_score, "
+            "experience_score, domain_score) VALUES (?, 'profile', ?, 90, 90, 80, 60)",
+            (f"profile:{status}", status)
+        )
+        conn.execute("INSERT INTO applications (application_id, job_id, status, applied_date) "
+                     "VALUES (?, ?, ?, datetime('now', ?))",
+                     (status, status, status, "-1 days" if status == "under_review" else "-90 days"))
+    conn.commit()
+    conn.close()
+
+    result = json.loads(asyncio.run(matcher_server.calibrate_scores(
+        matcher_server.CalibrateScoresInput(profile_path=path)
+    )))
+    assert result["samples"] == 60
+    assert result["coefficients"]["skills_score"] > 0
+    assert result["log_loss"] < result["baseline_log_loss"]
+
+    matched = json.loads(asyncio.run(matcher_server.match_all(matcher_server.MatchAllInput(profile_path=path))))
+    assert all(0 < match["outcome_probability"] < 1 for match in matched["top_matches"])
+
+    stored = _stored_scores(jobs_db["db_path"])
+    ranked = json.loads(asyncio.run(matcher_server.list_matches(
+        matcher_server.ListMatchesInput(profile_path=path, min_score=0, rank_by="outcome_probability", limit=100)
+    )))["matches"]
+    probabilities = [match["outcome_probability"] for match in ranked]
+    assert probabilities == sorted(probabilities, reverse=True)
+    assert stored["old0"]["outcome_probability"] is not None
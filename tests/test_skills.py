@@ -0,0 +1,100 @@
+"""
+Skill Vocabulary Tests
+Canonical IDs, synonyms and matching helpers
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from skills import DEFAULT_SKILLS, FuzzySkillResolver, get_vocabulary, resolve_requirements
+
+
+def test_synonyms_share_skill_ids(tmp_path):
+    """Aliases resolve to the canonical skill ID, unknown skills get new IDs"""
+    vocabulary = get_vocabulary(str(tmp_path / "jobs.db"))
+
+    assert vocabulary.lookup("k8s") == vocabulary.lookup("Kubernetes")
+    assert vocabulary.lookup("ML") == vocabulary.lookup("machine learning")
+    assert vocabulary.lookup(" PyTorch ") == vocabulary.lookup("pytorch")
+
+    rust_id = vocabulary.resolve("Rust")
+    assert rust_id is not None
+    assert vocabulary.resolve_many(["rust", "RUST", "Python"]) == [rust_id, vocabulary.lookup("python")]
+
+
+def test_implications_are_transitive(tmp_path):
+    """PyTorch implies Deep Learning, Machine Learning and AI; parents don't imply children"""
+    vocabulary = get_vocabulary(str(tmp_path / "jobs.db"))
+    pytorch = vocabulary.lookup("PyTorch")
+
+    implied = vocabulary.implied(pytorch)
+    for name in ("PyTorch", "Deep Learning", "Machine Learning", "Artificial Intelligence", "Python"):
+        assert vocabulary.lookup(name) in implied
+
+    assert pytorch not in vocabulary.implied(vocabulary.lookup("Deep Learning"))
+    assert vocabulary.expand([vocabulary.lookup("PostgreSQL")]) == frozenset(
+        [vocabulary.lookup("PostgreSQL"), vocabulary.lookup("SQL")]
+    )
+
+
+def test_framework_implications_are_consistent(tmp_path):
+    """Every Python library implies Python, so no framework outranks another just by a gap in the table"""
+    vocabulary = get_vocabulary(str(tmp_path / "jobs.db"))
+    deep_learning = {"Deep Learning", "Machine Learning", "Artificial Intelligence", "Python"}
+    web = {"Python", "RESTful APIs"}
+    expected = {
+        "PyTorch": deep_learning,
+        "TensorFlow": deep_learning,
+        "Keras": deep_learning,
+        "Hugging Face": deep_learning,
+        "Scikit-Learn": {"Machine Learning", "Artificial Intelligence", "Python"},
+        "LangChain": {"LLMs", "Generative AI", "Artificial Intelligence"},
+        "Numpy": {"Python"},
+        "Pandas": {"Python"},
+        "Matplotlib": {"Python"},
+        "FastAPI": web,
+        "Flask": web,
+        "Django": web,
+        "React": {"JavaScript"},
+        "Node.js": {"JavaScript"},
+        "Spark": set(),
+        "Airflow": set(),
+        "Kafka": set(),
+    }
+    assert set(expected) <= {name for name, _ in DEFAULT_SKILLS}
+    for framework, implied in expected.items():
+        closure = {vocabulary.name(skill_id) for skill_id in vocabulary.implied(vocabulary.lookup(framework))}
+        assert closure == implied | {framework}, framework
+
+
+def test_fuzzy_resolver_snaps_to_targets(tmp_path):
+    """Phrases, segments and near-misses resolve to target skills; unrelated strings don't"""
+    vocabulary = get_vocabulary(str(tmp_path / "jobs.db"))
+    targets = vocabulary.resolve_many(["Python", "PyTorch", "AWS", "Scikit-Learn"])
+    resolver = FuzzySkillResolver(vocabulary, targets)
+
+    size = len(vocabulary)
+
+    assert resolver.resolve("strong Python skills") == [vocabulary.lookup("Python")]
+    assert resolver.resolve("pytorch-lightning") == [vocabulary.lookup("PyTorch")]
+    assert resolver.resolve("AWS (EC2, S3)") == [vocabulary.lookup("AWS")]
+    assert resolver.resolve("scikitlearn") == [vocabulary.lookup("Scikit-Learn")]
+    assert resolver.resolve("PyTorch/Python") == [vocabulary.lookup("PyTorch"), vocabulary.lookup("Python")]
+    assert resolver.resolve("Go") == []
+    assert resolver.resolve("Kubernetes") == []
+    assert resolver.resolve("some brand new framework") == []
+    assert len(vocabulary) == size  # Resolving never registers skills
+
+
+def test_requirements_resolved_against_whole_vocabulary(tmp_path):
+    """Every skill a segmented string names is kept; strings naming none are registered once"""
+    db_path = str(tmp_path / "jobs.db")
+    vocabulary = get_vocabulary(db_path)
+
+    ids = resolve_requirements(["PyTorch/TensorFlow", "k8s", "pytorch", "Quantum Basket Weaving"], db_path)
+
+    assert ids[:3] == [vocabulary.lookup("PyTorch"), vocabulary.lookup("TensorFlow"), vocabulary.lookup("Kubernetes")]
+    assert ids[3] == vocabulary.lookup("Quantum Basket Weaving")
+    assert len(ids) == 4